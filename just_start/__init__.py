@@ -1,10 +1,11 @@
 from ._just_start import (
     ActionRunner, NULLARY_ACTION_KEYS, UNARY_ACTION_KEYS, UNARY_ACTION_PROMPTS, just_start, Action
 )
+from ._just_start_async import AsyncActionRunner, just_start_async
 from .config_reader import ConfigError, get_client_config
 from .logging import logger
 from .os_utils import (
-    JustStartError, TaskWarriorError, ActionError, UserInputError, notify,
+    JustStartError, TaskWarriorError, ActionError, UserInputError, notify, TaskData,
 )
 
 
@@ -12,4 +13,5 @@ __all__ = [
     'Action', 'UNARY_ACTION_KEYS', 'ActionRunner', 'NULLARY_ACTION_KEYS', 'ActionError',
     'JustStartError', 'TaskWarriorError', 'UserInputError', 'logger', 'ConfigError',
     'UNARY_ACTION_PROMPTS', 'get_client_config', 'ActionRunner', 'just_start', 'notify',
+    'AsyncActionRunner', 'just_start_async', 'TaskData',
 ]
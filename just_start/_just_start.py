@@ -1,20 +1,35 @@
 from collections import OrderedDict
+from concurrent.futures import Future
 from contextlib import contextmanager
 from enum import Enum, auto
-from functools import wraps
+from functools import wraps, partial
 from os import makedirs
 from signal import signal, SIGTERM
 import sys
 from threading import Timer
-from typing import Callable, Generator
+from typing import Any, Callable, Generator, List, Dict, Optional
 
 from .constants import (
     KEYBOARD_HELP, RECURRENCE_OFF, CONFIRMATION_OFF, MODIFY_PROMPT, ADD_PROMPT, TASK_IDS_PROMPT,
     CUSTOM_COMMAND_PROMPT, CONFIG_DIR, UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH, UNHANDLED_ERROR,
+    TASK_ID_PROMPT, TASK_NOT_FOUND, STALE_TASKS, PROFILE_PROMPT, PROFILE_NOT_FOUND,
+    AUTOMATIC_PROFILE, BULK_PROMPT,
 )
+from just_start.action_profiler import action_profiler
+from just_start.action_queue import ActionQueue
+from just_start.bulk import BulkOperation, prepare_bulk_operation
+from just_start.config_reader import get_location_name, get_profile_names, set_profile_override
 from just_start.logging import logger
-from just_start.pomodoro import PomodoroTimer, StatusWriter, PomodoroSerializer
-from just_start.os_utils import run_task, db, get_task_list, notify
+from just_start.memory_diagnostics import memory_diagnostics
+from just_start.pomodoro import PomodoroTimer, StatusWriter, PomodoroSerializer, Clock, Countdown
+from just_start.os_utils import (
+    run_task, db, get_task_list, notify, UserInputError, JustStartError, CommandClass,
+    command_supervisor, format_command_stats, get_task_data, TaskData,
+)
+from just_start.status_file import StatusFile
+from just_start.task_cache import TaskCache
+from just_start.task_watcher import TaskWatcher, get_data_location
+from just_start.time_tracking import add_task_time_totals, TaskTimeTracker
 
 
 def update_status(f: Callable[..., str]):
@@ -32,7 +47,7 @@ def refresh_tasks(f: Callable[..., str]):
     @wraps(f)
     def wrapper(self: 'ActionRunner', *args, **kwargs) -> str:
         out = f(self, *args, **kwargs)
-        self._refresh_tasks()
+        self.refresh_tasks().add_done_callback(self._report_refresh_error)
         return out
 
     return wrapper
@@ -40,41 +55,59 @@ def refresh_tasks(f: Callable[..., str]):
 
 class ActionRunner:
     def __init__(self, pomodoro_timer: PomodoroTimer, status_setter: StatusWriter,
-                 refresh_tasks: Callable):
+                 refresh_tasks: Callable, action_queue: Optional[ActionQueue] = None):
         self._pomodoro_timer = pomodoro_timer
         self._status_setter = status_setter
-        self._refresh_tasks = refresh_tasks
-
-    def __call__(self, action: 'Action', *args, **kwargs):
-        try:
-            return getattr(self, action.value)(*args, **kwargs)
-        except KeyboardInterrupt:
-            pass
+        self._action_queue = action_queue or ActionQueue(refresh_tasks)
+        # Tasks of the last refresh, replaced as a whole so that clients can read them anytime.
+        # Refreshes only export them when a client shows them, otherwise they're None
+        self.task_data = None  # type: Optional[List[TaskData]]
+
+    def __call__(self, action: 'Action', *args, **kwargs) -> Future:
+        if action is Action.REFRESH_TASKS:
+            # Queuing refresh_tasks itself would only resolve to the refresh's future
+            future = self.refresh_tasks()
+            future.add_done_callback(self._report_refresh_error)
+            return future
+        return self._action_queue.submit(action_profiler.wrap(action.value,
+                                                              getattr(self, action.value)),
+                                         *args, **kwargs)
 
     @update_status
     @refresh_tasks
     def add(self, task_data: str) -> str:
-        return run_task('add', *task_data.split())
+        return run_task(*get_add_command(task_data), command_class=CommandClass.WRITE)
 
     @update_status
     @refresh_tasks
     def delete(self, ids: str) -> str:
-        return run_task(CONFIRMATION_OFF, RECURRENCE_OFF, ids, 'delete')
+        return run_task(*get_delete_command(ids), command_class=CommandClass.WRITE)
 
     @update_status
     @refresh_tasks
     def complete(self, ids: str) -> str:
-        return run_task(ids, 'done')
+        return run_task(*get_complete_command(ids), command_class=CommandClass.WRITE)
 
     @update_status
     @refresh_tasks
     def modify(self, ids: str, task_data: str) -> str:
-        return run_task(RECURRENCE_OFF, ids, 'modify', *task_data.split())
+        return run_task(*get_modify_command(ids, task_data), command_class=CommandClass.WRITE)
 
     @update_status
     @refresh_tasks
     def custom_command(self, command: str) -> str:
-        return run_task(*command.split())
+        return run_task(*get_custom_command(command), command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    def bulk(self, operation: BulkOperation) -> str:
+        return run_task(*get_bulk_command(operation), command_class=CommandClass.WRITE)
+
+    def preview_bulk(self, command: str) -> BulkOperation:
+        task_data = self.task_data
+        if task_data is None:
+            task_data = self.task_data = get_task_data()
+        return prepare_bulk_operation(command, task_data)
 
     @update_status
     def show_help(self, help_message: str = KEYBOARD_HELP) -> str:
@@ -83,7 +116,25 @@ class ActionRunner:
     @update_status
     @refresh_tasks
     def sync(self) -> str:
-        return run_task('sync')
+        return run_task(*SYNC_COMMAND, command_class=CommandClass.SYNC)
+
+    @update_status
+    def track_task(self, task_id: str) -> str:
+        uuids = run_task(*get_uuids_command(task_id))
+        return _track_task(self._pomodoro_timer, task_id, uuids)
+
+    @update_status
+    @refresh_tasks
+    def switch_profile(self, profile: str) -> str:
+        return _switch_profile(profile)
+
+    @update_status
+    def show_memory_usage(self) -> str:
+        return _get_diagnostics()
+
+    @update_status
+    def toggle_profiler(self) -> str:
+        return _toggle_profiler()
 
     def toggle_timer(self):
         self._pomodoro_timer.toggle()
@@ -91,8 +142,28 @@ class ActionRunner:
     def stop_timer(self):
         self._pomodoro_timer.reset()
 
-    def refresh_tasks(self):
-        return self._refresh_tasks()
+    def refresh_tasks(self) -> Future:
+        return self._action_queue.request_refresh()
+
+    def close(self):
+        self._action_queue.close()
+
+    @staticmethod
+    def cancel_commands():
+        command_supervisor.cancel()
+
+    @property
+    def countdown(self) -> Countdown:
+        return self._pomodoro_timer.countdown
+
+    @property
+    def command_stats(self) -> Dict[str, int]:
+        return command_supervisor.get_stats()
+
+    def _report_refresh_error(self, future: Future):
+        error = future.exception()
+        if error is not None:
+            self._status_setter(_get_error_status(error))
 
 
 class Action(Enum):
@@ -110,46 +181,201 @@ class Action(Enum):
     STOP_TIMER = auto()
     SYNC = auto()
     CUSTOM_COMMAND = auto()
+    TRACK_TASK = auto()
+    SWITCH_PROFILE = auto()
+    SHOW_MEMORY_USAGE = auto()
+    TOGGLE_PROFILER = auto()
+    BULK = auto()
 
 
 @contextmanager
 def just_start(status_writer: StatusWriter, on_tasks_refresh: Callable,
-               pomodoro_status_writer: StatusWriter = notify) \
+               pomodoro_status_writer: StatusWriter = notify,
+               on_task_data_refresh: Optional[Callable[[List[TaskData]], Any]] = None) \
         -> Generator['ActionRunner', None, None]:
-    def refresh_tasks_():
-        on_tasks_refresh(get_task_list())
+    memory_diagnostics.start()
+    task_cache = TaskCache()
+    profile = get_location_name()
 
-    pomodoro_timer = PomodoroTimer(notifier=pomodoro_status_writer, timer=TimerRunner())
-    pomodoro_serializer = _init_just_start(refresh_tasks_, pomodoro_timer)
+    def show_tasks(task_list: List[str]):
+        on_tasks_refresh(add_task_time_totals(task_list, pomodoro_timer.task_tracker))
+
+    def refresh_tasks_():
+        current_profile = get_location_name()
+        if current_profile != profile:
+            show_profile_tasks(current_profile)
+
+        task_watcher.mark_refreshed()
+        task_list = get_task_list()
+        task_data = _get_refreshed_task_data(on_task_data_refresh is not None,
+                                             pomodoro_timer.task_tracker)
+        action_runner.task_data = task_data
+        task_cache.set(current_profile, task_list)
+        show_tasks(task_list)
+        if on_task_data_refresh is not None and task_data is not None:
+            on_task_data_refresh(task_data)
+        memory_diagnostics.take_snapshot()
+
+    def show_profile_tasks(new_profile: str):
+        # The new profile's cached tasks are shown while its database is being read
+        nonlocal profile
+        profile = new_profile
+        task_watcher.watch(get_data_location())
+        cached_task_list = task_cache.get(profile)
+        if cached_task_list is not None:
+            show_tasks(cached_task_list)
+
+    def show_initial_tasks():
+        snapshot = task_cache.get(profile)
+        if snapshot is None:
+            refresh_tasks_()
+        else:
+            show_tasks(snapshot)
+            status_writer(STALE_TASKS)
+            action_runner.refresh_tasks().add_done_callback(
+                partial(_on_stale_tasks_refreshed, status_writer))
+
+    action_queue = ActionQueue(action_profiler.wrap(Action.REFRESH_TASKS.value, refresh_tasks_))
+    clock = Clock()
+    pomodoro_timer = PomodoroTimer(notifier=pomodoro_status_writer, timer=TimerRunner(),
+                                   clock=clock,
+                                   task_tracker=TaskTimeTracker(clock, action_queue.submit),
+                                   status_file=StatusFile())
+    action_runner = ActionRunner(pomodoro_timer, status_writer, refresh_tasks_, action_queue)
+    task_watcher = TaskWatcher(action_runner.refresh_tasks)
+    pomodoro_serializer = _init_just_start(show_initial_tasks, pomodoro_timer)
+    task_watcher.start()
 
     with _handle_errors():
         try:
-            yield ActionRunner(pomodoro_timer, status_writer, refresh_tasks_)
+            yield action_runner
         finally:
+            task_watcher.stop()
             _quit_just_start(pomodoro_serializer)
+            action_runner.close()
+            memory_diagnostics.stop()
+
+
+def _get_refreshed_task_data(is_shown: bool, task_tracker: TaskTimeTracker) \
+        -> Optional[List[TaskData]]:
+    # The export is only worth a command when it's shown or needed for the tracked totals
+    if not is_shown and not task_tracker.totals:
+        return None
+    task_data = get_task_data()
+    task_tracker.set_task_ids(task_data)
+    return task_data
 
 
 class TimerRunner:
     def __init__(self):
         self.timer = None
 
-    def start(self, seconds: int, callback: Callable[[], None]):
-        self.timer = Timer(seconds, callback)
+    def start(self, seconds: float, callback: Callable[[], None]):
+        self.timer = Timer(seconds, _log_errors(callback))
         self.timer.start()
 
     def stop(self):
         self.timer.cancel()
 
 
-def _init_just_start(refresh_tasks_: Callable, pomodoro_timer: PomodoroTimer) -> PomodoroSerializer:
+def _log_errors(f: Callable[[], None]) -> Callable[[], None]:
+    # Errors in other threads can't reach the client, so they're at least logged
+    @wraps(f)
+    def wrapper():
+        try:
+            f()
+        except Exception:
+            logger.exception(UNHANDLED_ERROR)
+
+    return wrapper
+
+
+def _init_just_start(show_initial_tasks: Callable,
+                     pomodoro_timer: PomodoroTimer) -> PomodoroSerializer:
     pomodoro_serializer = PomodoroSerializer(pomodoro_timer)
     pomodoro_serializer.set_serialized_timer_data(db)
     signal(SIGTERM, lambda *_, **__: _quit_just_start(pomodoro_serializer))
     makedirs(CONFIG_DIR, exist_ok=True)
-    refresh_tasks_()
+    show_initial_tasks()
     return pomodoro_serializer
 
 
+def _on_stale_tasks_refreshed(status_writer: StatusWriter, future: Future) -> None:
+    error = future.exception()
+    status_writer('' if error is None else _get_error_status(error))
+
+
+def _get_error_status(error: BaseException) -> str:
+    if isinstance(error, JustStartError):
+        return str(error)
+    return UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH
+
+
+def _switch_profile(profile: str) -> str:
+    if profile == AUTOMATIC_PROFILE:
+        set_profile_override(None)
+        return f'Following the locations, current profile is {get_location_name()}'
+    if profile not in get_profile_names():
+        raise UserInputError(f'{PROFILE_NOT_FOUND} "{profile}"')
+
+    set_profile_override(profile)
+    return f'Switched to profile {profile}'
+
+
+def _get_diagnostics() -> str:
+    return f'{memory_diagnostics.report()}; {format_command_stats(command_supervisor.get_stats())}'
+
+
+# The TaskWarrior commands behind the actions, shared with the asyncio runner
+SYNC_COMMAND = ('sync',)
+
+
+def get_add_command(task_data: str) -> List[str]:
+    return ['add', *task_data.split()]
+
+
+def get_delete_command(ids: str) -> List[str]:
+    return [CONFIRMATION_OFF, RECURRENCE_OFF, ids, 'delete']
+
+
+def get_complete_command(ids: str) -> List[str]:
+    return [ids, 'done']
+
+
+def get_modify_command(ids: str, task_data: str) -> List[str]:
+    return [RECURRENCE_OFF, ids, 'modify', *task_data.split()]
+
+
+def get_custom_command(command: str) -> List[str]:
+    return command.split()
+
+
+def get_uuids_command(task_id: str) -> List[str]:
+    return [task_id, '_uuids']
+
+
+def get_bulk_command(operation: BulkOperation) -> List[str]:
+    # The previewed tasks are passed by uuid, so that blocked tasks or ids renumbered since the
+    # last refresh can't be affected without being previewed
+    return [CONFIRMATION_OFF, RECURRENCE_OFF, *(task['uuid'] for task in operation.tasks),
+            operation.verb, *operation.modifications]
+
+
+def _track_task(pomodoro_timer: PomodoroTimer, task_id: str, uuids: str) -> str:
+    task_uuid = uuids.strip()
+    if not task_uuid or len(task_uuid.split()) > 1:
+        raise UserInputError(f'{TASK_NOT_FOUND} "{task_id}"')
+
+    pomodoro_timer.track_task(task_uuid, task_id)
+    return f'Tracking time for task {task_id}'
+
+
+def _toggle_profiler() -> str:
+    if action_profiler.toggle():
+        return f'Profiling actions to {action_profiler.directory}'
+    return 'Actions are no longer profiled'
+
+
 def _quit_just_start(pomodoro_serializer: PomodoroSerializer) -> None:
     db.update(pomodoro_serializer.serializable_data)
 
@@ -167,6 +393,8 @@ def _handle_errors():
 
 NULLARY_ACTION_KEYS = OrderedDict([
     ('h', Action.SHOW_HELP),
+    ('M', Action.SHOW_MEMORY_USAGE),
+    ('P', Action.TOGGLE_PROFILER),
     ('p', Action.TOGGLE_TIMER),
     ('r', Action.REFRESH_TASKS),
     ('s', Action.STOP_TIMER),
@@ -178,8 +406,11 @@ UNARY_ACTION_PROMPTS = OrderedDict([
     (Action.DELETE, TASK_IDS_PROMPT),
     (Action.MODIFY, MODIFY_PROMPT),
     (Action.CUSTOM_COMMAND, CUSTOM_COMMAND_PROMPT),
+    (Action.TRACK_TASK, TASK_ID_PROMPT),
+    (Action.SWITCH_PROFILE, PROFILE_PROMPT),
+    (Action.BULK, BULK_PROMPT),
 ])
-UNARY_ACTION_KEYS = dict(zip(['a', 'c', 'd', 'm', '!'], UNARY_ACTION_PROMPTS))
+UNARY_ACTION_KEYS = dict(zip(['a', 'c', 'd', 'm', '!', 't', 'w', 'b'], UNARY_ACTION_PROMPTS))
 assert len(UNARY_ACTION_PROMPTS) == len(UNARY_ACTION_KEYS)
 # noinspection PyTypeChecker
 assert len(NULLARY_ACTION_KEYS) + len(UNARY_ACTION_KEYS) == len(Action)
@@ -0,0 +1,291 @@
+from asyncio import Lock, Queue, Task, TimerHandle, ensure_future, get_running_loop, shield, sleep
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from .action_profiler import action_profiler
+from .action_queue import REFRESH_WINDOW_SECONDS
+from .config_reader import get_location_name
+from .constants import KEYBOARD_HELP, STALE_TASKS
+from .logging import logger
+from .memory_diagnostics import memory_diagnostics
+from .bulk import BulkOperation, prepare_bulk_operation
+from .os_utils import (
+    run_task_async, JustStartError, CommandClass, db, TaskData, TASK_DATA_COMMAND,
+    parse_task_data,
+)
+from .pomodoro import PomodoroTimer, PomodoroSerializer, StatusWriter, Clock
+from .site_blocking import block_sites
+from .status_file import StatusFile
+from .task_cache import TaskCache
+from .time_tracking import TaskTimeTracker, add_task_time_totals
+
+from ._just_start import (
+    Action, _quit_just_start, _switch_profile, _get_diagnostics, _toggle_profiler, _track_task,
+    get_add_command, get_delete_command, get_complete_command, get_modify_command,
+    get_custom_command, get_uuids_command, get_bulk_command, SYNC_COMMAND,
+)
+
+
+def update_status(f: Callable[..., Awaitable[str]]):
+    @wraps(f)
+    async def wrapper(self: 'AsyncActionRunner', *args, **kwargs) -> str:
+        self._status_setter('')
+        status = await f(self, *args, **kwargs)
+        self._status_setter(status)
+        return status
+
+    return wrapper
+
+
+def refresh_tasks(f: Callable[..., Awaitable[str]]):
+    @wraps(f)
+    async def wrapper(self: 'AsyncActionRunner', *args, **kwargs) -> str:
+        out = await f(self, *args, **kwargs)
+        self.request_refresh()
+        return out
+
+    return wrapper
+
+
+def write_lock(f: Callable[..., Awaitable[str]]):
+    # Reads run concurrently, but TaskWarrior's database only takes one write at a time
+    @wraps(f)
+    async def wrapper(self: 'AsyncActionRunner', *args, **kwargs) -> str:
+        async with self._write_lock:
+            return await f(self, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncTimerRunner:
+    def __init__(self):
+        self.timer: Optional[TimerHandle] = None
+
+    def start(self, seconds: float, callback: Callable[[], None]):
+        self.timer = get_running_loop().call_later(seconds, callback)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+
+
+class TimerEvents:
+    def __init__(self):
+        self._queue = Queue()  # type: Queue[Optional[str]]
+
+    def __call__(self, status: str) -> None:
+        self._queue.put_nowait(status)
+
+    def close(self) -> None:
+        self._queue.put_nowait(None)
+
+    def __aiter__(self) -> 'TimerEvents':
+        return self
+
+    async def __anext__(self) -> str:
+        status = await self._queue.get()
+        if status is None:
+            raise StopAsyncIteration
+        return status
+
+
+class AsyncActionRunner:
+    def __init__(self, pomodoro_timer: PomodoroTimer, status_setter: StatusWriter,
+                 on_tasks_refresh: Callable[[List[str]], None], timer_events: TimerEvents,
+                 task_cache: Optional[TaskCache] = None):
+        self.timer_events = timer_events
+        self._pomodoro_timer = pomodoro_timer
+        self._status_setter = status_setter
+        self._on_tasks_refresh = on_tasks_refresh
+        self._task_cache = task_cache or TaskCache()
+        self._write_lock = Lock()
+        self._pending_refresh = None  # type: Optional[Task]
+        self._profile = get_location_name()
+        self.task_data: List[TaskData] = []
+
+    async def __call__(self, action: Action, *args, **kwargs):
+        # Other coroutines running meanwhile on the loop are part of the action's profile
+        with action_profiler.profiling(action.value):
+            return await getattr(self, action.value)(*args, **kwargs)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def add(self, task_data: str) -> str:
+        return await run_task_async(*get_add_command(task_data),
+                                    command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def delete(self, ids: str) -> str:
+        return await run_task_async(*get_delete_command(ids), command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def complete(self, ids: str) -> str:
+        return await run_task_async(*get_complete_command(ids), command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def modify(self, ids: str, task_data: str) -> str:
+        return await run_task_async(*get_modify_command(ids, task_data),
+                                    command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def custom_command(self, command: str) -> str:
+        return await run_task_async(*get_custom_command(command),
+                                    command_class=CommandClass.WRITE)
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def bulk(self, operation: BulkOperation) -> str:
+        return await run_task_async(*get_bulk_command(operation),
+                                    command_class=CommandClass.WRITE)
+
+    def preview_bulk(self, command: str) -> BulkOperation:
+        return prepare_bulk_operation(command, self.task_data)
+
+    @update_status
+    async def show_help(self, help_message: str = KEYBOARD_HELP) -> str:
+        return help_message
+
+    @update_status
+    @refresh_tasks
+    @write_lock
+    async def sync(self) -> str:
+        return await run_task_async(*SYNC_COMMAND, command_class=CommandClass.SYNC)
+
+    @update_status
+    async def track_task(self, task_id: str) -> str:
+        uuids = await run_task_async(*get_uuids_command(task_id))
+        return _track_task(self._pomodoro_timer, task_id, uuids)
+
+    @update_status
+    @refresh_tasks
+    async def switch_profile(self, profile: str) -> str:
+        return _switch_profile(profile)
+
+    @update_status
+    async def show_memory_usage(self) -> str:
+        return _get_diagnostics()
+
+    @update_status
+    async def toggle_profiler(self) -> str:
+        return _toggle_profiler()
+
+    async def toggle_timer(self):
+        self._pomodoro_timer.toggle()
+
+    async def stop_timer(self):
+        self._pomodoro_timer.reset()
+
+    async def refresh_tasks(self) -> None:
+        await shield(self.request_refresh())
+
+    def request_refresh(self) -> Task:
+        # Requests that arrive before the pending refresh starts share it
+        if self._pending_refresh is None:
+            self._pending_refresh = ensure_future(self._refresh())
+            self._pending_refresh.add_done_callback(self._report_refresh_error)
+        return self._pending_refresh
+
+    def close(self) -> None:
+        if self._pending_refresh is not None:
+            self._pending_refresh.cancel()
+
+    def submit_write(self, write: Callable[[], None]) -> Task:
+        # Blocking writes outside actions, like time tracking annotations, run in the executor
+        # but still wait for the write lock
+        return ensure_future(self._write_in_executor(write))
+
+    async def _write_in_executor(self, write: Callable[[], None]) -> None:
+        async with self._write_lock:
+            await get_running_loop().run_in_executor(None, write)
+
+    def show_cached_tasks(self) -> bool:
+        task_list = self._task_cache.get(self._profile)
+        if task_list is None:
+            return False
+        self._show_tasks(task_list)
+        return True
+
+    async def _refresh(self) -> None:
+        await sleep(REFRESH_WINDOW_SECONDS)
+        self._pending_refresh = None
+        profile = get_location_name()
+        if profile != self._profile:
+            self._profile = profile
+            self.show_cached_tasks()
+
+        task_list = (await run_task_async()).split('\n')
+        self.task_data = parse_task_data(await run_task_async(*TASK_DATA_COMMAND))
+        self._pomodoro_timer.task_tracker.set_task_ids(self.task_data)
+        self._task_cache.set(profile, task_list)
+        self._show_tasks(task_list)
+        memory_diagnostics.take_snapshot()
+
+    def _show_tasks(self, task_list: List[str]) -> None:
+        self._on_tasks_refresh(add_task_time_totals(task_list,
+                                                    self._pomodoro_timer.task_tracker))
+
+    def _report_refresh_error(self, task: Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if isinstance(error, JustStartError):
+            self._status_setter(str(error))
+        elif error is not None:
+            logger.exception('Tasks could not be refreshed', exc_info=error)
+
+
+@asynccontextmanager
+async def just_start_async(status_writer: StatusWriter,
+                           on_tasks_refresh: Callable[[List[str]], None]) \
+        -> AsyncIterator[AsyncActionRunner]:
+    memory_diagnostics.start()
+    loop = get_running_loop()
+    timer_events = TimerEvents()
+    clock = Clock()
+    # Timer side effects (hosts file, annotations) still block, so they run in the executor.
+    # Annotations are TaskWarrior writes, so they go through the runner's write lock too
+    task_tracker = TaskTimeTracker(clock, lambda write: action_runner.submit_write(write))
+    pomodoro_timer = PomodoroTimer(notifier=timer_events, timer=AsyncTimerRunner(), clock=clock,
+                                   task_tracker=task_tracker,
+                                   site_blocker=partial(_block_sites_in_executor, loop),
+                                   status_file=StatusFile())
+    pomodoro_serializer = PomodoroSerializer(pomodoro_timer)
+    pomodoro_serializer.set_serialized_timer_data(db)
+    action_runner = AsyncActionRunner(pomodoro_timer, status_writer, on_tasks_refresh,
+                                      timer_events)
+
+    if action_runner.show_cached_tasks():
+        status_writer(STALE_TASKS)
+        action_runner.request_refresh().add_done_callback(
+            partial(_clear_stale_tasks_status, status_writer))
+    else:
+        await action_runner.refresh_tasks()
+
+    try:
+        yield action_runner
+    finally:
+        _quit_just_start(pomodoro_serializer)
+        timer_events.close()
+        action_runner.close()
+        memory_diagnostics.stop()
+
+
+def _clear_stale_tasks_status(status_writer: StatusWriter, task: Task) -> None:
+    # Errors are already reported by the refresh itself
+    if not task.cancelled() and task.exception() is None:
+        status_writer('')
+
+
+def _block_sites_in_executor(loop, block: bool) -> None:
+    loop.run_in_executor(None, block_sites, block)
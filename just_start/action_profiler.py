@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+from cProfile import Profile
+from datetime import datetime
+from functools import wraps
+from logging import getLogger
+from os import getenv, makedirs
+from os.path import join
+from typing import Callable, Iterator, Optional
+
+from .constants import ACTION_PROFILES_DIR, PROFILE_ACTIONS_ENV
+
+
+logger = getLogger(__name__)
+
+
+class ActionProfiler:
+    # Each profiled action gets its own pstats file, read them with python -m pstats <file>. While
+    # it's off, profiling an action only costs a flag check
+    def __init__(self, directory: str = ACTION_PROFILES_DIR, enabled: Optional[bool] = None):
+        self.directory = directory
+        self.enabled = bool(getenv(PROFILE_ACTIONS_ENV)) if enabled is None else enabled
+        self._profile = None  # type: Optional[Profile]
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        return self.enabled
+
+    @contextmanager
+    def profiling(self, name: str) -> Iterator[None]:
+        # Only one profiler can run at a time, nested or concurrent actions end up in the outer file
+        if not self.enabled or self._profile is not None:
+            yield
+            return
+
+        profile = self._profile = Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._profile = None
+            self._dump(name, profile)
+
+    def wrap(self, name: str, f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with self.profiling(name):
+                return f(*args, **kwargs)
+
+        return wrapper
+
+    def _dump(self, name: str, profile: Profile) -> None:
+        path = join(self.directory, f'{datetime.now():%Y%m%dT%H%M%S.%f}-{name}.pstats')
+        try:
+            makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError:
+            logger.exception(f'Profile {path} could not be written')
+        else:
+            logger.info(f'Profile of {name} written to {path}')
+
+
+action_profiler = ActionProfiler()
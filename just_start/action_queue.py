@@ -0,0 +1,107 @@
+from concurrent.futures import Future
+from functools import partial
+from logging import getLogger
+from queue import Queue, Empty
+from threading import Thread, Lock
+from time import monotonic
+from typing import Callable, List, Optional
+
+from .constants import UNHANDLED_ERROR
+from .os_utils import JustStartError
+
+
+logger = getLogger(__name__)
+
+
+REFRESH_WINDOW_SECONDS = 0.1
+
+_REFRESH = object()
+_STOP = object()
+
+
+class ActionQueue:
+    # Runs actions strictly in order on a single worker and merges close refresh requests
+    def __init__(self, refresh: Callable[[], None],
+                 refresh_window: float = REFRESH_WINDOW_SECONDS):
+        self.refresh = refresh
+        self.refresh_window = refresh_window
+        self._queue = Queue()  # type: Queue
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    def submit(self, action: Callable, *args, **kwargs) -> Future:
+        future = Future()  # type: Future
+        self._put((partial(action, *args, **kwargs), future))
+        return future
+
+    def request_refresh(self) -> Future:
+        future = Future()  # type: Future
+        self._put((_REFRESH, future))
+        return future
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _put(self, item) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._work, name='action-queue', daemon=True)
+                self._thread.start()
+            self._queue.put(item)
+
+    def _work(self) -> None:
+        refresh_futures = []  # type: List[Future]
+        refresh_deadline: Optional[float] = None
+
+        while True:
+            timeout = (None if refresh_deadline is None
+                       else max(0., refresh_deadline - monotonic()))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                self._run_refresh(refresh_futures)
+                refresh_futures, refresh_deadline = [], None
+                continue
+
+            if item is _STOP:
+                if refresh_futures:
+                    self._run_refresh(refresh_futures)
+                return
+
+            action, future = item
+            if action is _REFRESH:
+                refresh_futures.append(future)
+                if refresh_deadline is None:
+                    refresh_deadline = monotonic() + self.refresh_window
+            else:
+                _run_action(action, future)
+
+    def _run_refresh(self, futures: List[Future]) -> None:
+        running_futures = [future for future in futures if future.set_running_or_notify_cancel()]
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.exception('Tasks could not be refreshed')
+            for future in running_futures:
+                future.set_exception(e)
+        else:
+            for future in running_futures:
+                future.set_result(None)
+
+
+def _run_action(action: Callable, future: Future) -> None:
+    if not future.set_running_or_notify_cancel():
+        return
+
+    try:
+        result = action()
+    except Exception as e:
+        if not isinstance(e, JustStartError):
+            logger.exception(UNHANDLED_ERROR)
+        future.set_exception(e)
+    else:
+        future.set_result(result)
@@ -0,0 +1,104 @@
+import re
+from typing import List, NamedTuple, Callable, Optional
+
+from .os_utils import TaskData, UserInputError
+
+
+# Verbs and the words their previews use
+BULK_VERBS = {'done': 'completed', 'delete': 'deleted', 'modify': 'modified'}
+PREVIEWED_TASKS = 5
+# Dates would need TaskWarrior's own parsing (named dates, durations), so they aren't previewed
+DATE_ATTRIBUTES = ('due', 'entry', 'modified', 'scheduled', 'until', 'wait', 'end', 'start')
+
+ID_RANGE = re.compile(r'(\d+)(?:-(\d+))?')
+UUID_PREFIX = re.compile(r'[0-9a-f]{8}(?:-?[0-9a-f]{1,4})*')
+ATTRIBUTE = re.compile(r'([a-z_.]+)[:=](.*)')
+
+TaskPredicate = Callable[[TaskData], bool]
+
+
+class BulkOperation(NamedTuple):
+    verb: str
+    modifications: List[str]
+    tasks: List[TaskData]
+
+    @property
+    def preview(self) -> str:
+        rows = [f'{task.get("id")} {task.get("description", "")}'
+                for task in self.tasks[:PREVIEWED_TASKS]]
+        if len(self.tasks) > PREVIEWED_TASKS:
+            rows.append('...')
+        tasks = 'task' if len(self.tasks) == 1 else 'tasks'
+        return f'{len(self.tasks)} {tasks} will be {BULK_VERBS[self.verb]}: {", ".join(rows)}'
+
+
+def prepare_bulk_operation(command: str, task_data: List[TaskData]) -> BulkOperation:
+    # The filter is matched against the tasks of the last refresh, so the preview needs no command
+    terms = command.split()
+    try:
+        verb_position = next(position for position, term in enumerate(terms)
+                             if term in BULK_VERBS)
+    except StopIteration:
+        raise UserInputError(f'The filter should be followed by {", ".join(BULK_VERBS)}')
+
+    filter_terms, verb = terms[:verb_position], terms[verb_position]
+    modifications = terms[verb_position + 1:]
+    if not filter_terms:
+        raise UserInputError('An empty filter would match every task')
+    if verb == 'modify' and not modifications:
+        raise UserInputError('modify should be followed by the modifications')
+    if verb != 'modify' and modifications:
+        raise UserInputError(f'{verb} takes no modifications')
+
+    tasks = match_tasks(filter_terms, task_data)
+    if not tasks:
+        raise UserInputError(f'No task matches "{" ".join(filter_terms)}"')
+    return BulkOperation(verb, modifications, tasks)
+
+
+def match_tasks(filter_terms: List[str], task_data: List[TaskData]) -> List[TaskData]:
+    # Ids and uuids match any of them, every other term has to match too, like TaskWarrior's
+    # filters
+    id_predicates, predicates = [], []  # type: List[TaskPredicate], List[TaskPredicate]
+    for term in filter_terms:
+        id_predicate = _get_id_predicate(term)
+        if id_predicate is None:
+            predicates.append(_get_predicate(term))
+        else:
+            id_predicates.append(id_predicate)
+
+    return [task for task in task_data
+            if (not id_predicates or any(predicate(task) for predicate in id_predicates))
+            and all(predicate(task) for predicate in predicates)]
+
+
+def _get_id_predicate(term: str) -> Optional[TaskPredicate]:
+    id_ranges = [ID_RANGE.fullmatch(id_range) for id_range in term.split(',')]
+    if all(id_ranges):
+        bounds = [(int(first), int(last or first)) for first, last in
+                  (id_range.groups() for id_range in id_ranges if id_range)]
+        return lambda task: any(first <= task.get('id', 0) <= last for first, last in bounds)
+    if UUID_PREFIX.fullmatch(term):
+        return lambda task: task.get('uuid', '').startswith(term)
+    return None
+
+
+def _get_predicate(term: str) -> TaskPredicate:
+    if term[0] in '+-' and len(term) > 1:
+        tag, has_tag = term[1:], term[0] == '+'
+        return lambda task: (tag in task.get('tags', ())) is has_tag
+
+    attribute = ATTRIBUTE.fullmatch(term)
+    if attribute is None:
+        if term in ('and', 'or', 'xor') or term[0] in '()/':
+            raise UserInputError(f'"{term}" can\'t be previewed, use a custom command instead')
+        return lambda task: term in task.get('description', '')
+
+    name, value = attribute.groups()
+    if '.' in name or name in DATE_ATTRIBUTES:
+        raise UserInputError(f'"{term}" can\'t be previewed, use a custom command instead')
+    if name == 'project':
+        # Like TaskWarrior, projects match their subprojects (and any project they prefix)
+        return lambda task: task.get('project', '').startswith(value) if value else (
+            'project' not in task)
+    return lambda task: str(task.get(name, '')) == value
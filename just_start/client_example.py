@@ -1,11 +1,23 @@
 import sys
+import termios
+import tty
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from os import read
+from selectors import DefaultSelector, EVENT_READ
+from threading import RLock
+from typing import List, Optional, Generator, TextIO, Tuple
 
 from just_start import (
     UNARY_ACTION_KEYS, NULLARY_ACTION_KEYS, JustStartError, UNARY_ACTION_PROMPTS,
     UserInputError, just_start, ActionRunner, Action
 )
+from just_start.bulk import BulkOperation
 from just_start.constants import (
-    EMPTY_STRING, ACTION_PROMPT, INVALID_ACTION_KEY, TASK_IDS_PROMPT,
+    EMPTY_STRING, ACTION_PROMPT, INVALID_ACTION_KEY, TASK_IDS_PROMPT, INPUT_CANCELLED,
+    CONFIRM_PROMPT,
 )
 
 RESTORE_COLOR = '\033[0m'
@@ -13,41 +25,294 @@ GREEN = '\033[92m'
 BLUE = '\033[94m'
 RED = '\033[91m'
 
+FULL_LIST_KEY = 'l'
+TASK_LIST_CHANGES = f'Task list changes (press {FULL_LIST_KEY} for the full list):'
+TASK_LIST_UNCHANGED = 'Task list unchanged'
+# Changed rows at least this similar to a previous one are shown as modified instead of new
+MODIFIED_ROW_SIMILARITY = 0.6
+# Larger blocks of changed rows aren't compared pairwise, their rows are shown as removed and added
+MAX_COMPARED_ROWS = 2500
 
-def on_tasks_refresh(task_list):
-    print('\n'.join(task_list))
+CLEAR_LINE = '\r\033[K'
+ESCAPE = '\x1b'
+ENTER_KEYS = ('\r', '\n')
+BACKSPACE_KEYS = ('\x7f', '\b')
+# Bytes that follow an escape this quickly belong to the same key (arrows, function keys...)
+ESCAPE_SEQUENCE_SECONDS = 0.05
+
+
+class Terminal:
+    # Keys are read one by one in cbreak mode, and output from other threads is written above
+    # the prompt, which is then drawn again with whatever was typed so far
+    def __init__(self, input_fd: Optional[int] = None, output: Optional[TextIO] = None):
+        self._input_fd = input_fd
+        self._output = output
+        self._selector = None  # type: Optional[DefaultSelector]
+        self._prompt = ''
+        self._typed = ''
+        self._unread = ''
+        self._lock = RLock()
+
+    @property
+    def input_fd(self) -> int:
+        return sys.stdin.fileno() if self._input_fd is None else self._input_fd
+
+    @property
+    def output(self) -> TextIO:
+        return self._output or sys.stdout
+
+    @contextmanager
+    def raw_mode(self) -> Generator[None, None, None]:
+        try:
+            fd = self.input_fd
+            previous_attributes = termios.tcgetattr(fd)
+        except (OSError, ValueError, termios.error):
+            yield
+            return
+
+        tty.setcbreak(fd)
+        try:
+            yield
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, previous_attributes)
+
+    def write(self, message: str, stream: Optional[TextIO] = None) -> None:
+        with self._lock:
+            self._clear_prompt()
+            print(message, file=stream or self.output)
+            self._draw_prompt()
+
+    def read_key(self, prompt_: str) -> str:
+        self._show_prompt(f'{prompt_}: ')
+        try:
+            return self._read_key()
+        finally:
+            self._hide_prompt()
+
+    def read_line(self, prompt_: str) -> str:
+        self._show_prompt(f'{prompt_}: ')
+        try:
+            while True:
+                key = self._read_key()
+                if key in ENTER_KEYS:
+                    return self._typed
+                if key == ESCAPE:
+                    raise UserInputError(INPUT_CANCELLED)
+
+                with self._lock:
+                    if key in BACKSPACE_KEYS:
+                        self._typed = self._typed[:-1]
+                    elif key.isprintable():
+                        self._typed += key
+                    self._clear_prompt()
+                    self._draw_prompt()
+        finally:
+            self._hide_prompt()
+
+    def _read_key(self) -> str:
+        selector = self._get_selector()
+        if not self._unread:
+            selector.select()
+            self._unread = read(self.input_fd, 64).decode('utf-8', errors='replace')
+            if not self._unread:
+                raise EOFError
+
+        key, self._unread = self._unread[0], self._unread[1:]
+        if key == ESCAPE:
+            # The rest of an escape sequence is dropped, escape alone is the key
+            self._unread = ''
+            while selector.select(ESCAPE_SEQUENCE_SECONDS):
+                read(self.input_fd, 64)
+        return key
+
+    def _get_selector(self) -> DefaultSelector:
+        if self._selector is None:
+            self._selector = DefaultSelector()
+            self._selector.register(self.input_fd, EVENT_READ)
+        return self._selector
+
+    def _show_prompt(self, prompt_: str) -> None:
+        with self._lock:
+            self._prompt, self._typed = prompt_, ''
+            self._draw_prompt()
+
+    def _hide_prompt(self) -> None:
+        with self._lock:
+            self._clear_prompt()
+            self._prompt = self._typed = ''
+
+    def _draw_prompt(self) -> None:
+        self.output.write(f'{self._prompt}{self._typed}')
+        self.output.flush()
+
+    def _clear_prompt(self) -> None:
+        if self._prompt:
+            self.output.write(CLEAR_LINE)
+
+
+class TaskListPrinter:
+    def __init__(self):
+        self.snapshot = None  # type: Optional[List[str]]
+
+    def __call__(self, task_list: List[str]):
+        if self.snapshot is None:
+            terminal.write('\n'.join(task_list))
+        else:
+            print_task_list_diff(self.snapshot, task_list)
+        self.snapshot = task_list
+
+    def print_full_list(self):
+        terminal.write('\n'.join(self.snapshot or []))
+
+
+def print_task_list_diff(old_task_list: List[str], new_task_list: List[str]):
+    diff = diff_task_lists(old_task_list, new_task_list)
+    terminal.write('\n'.join([TASK_LIST_CHANGES, *diff]) if diff else TASK_LIST_UNCHANGED)
+
+
+def diff_task_lists(old_task_list: List[str], new_task_list: List[str]) -> List[str]:
+    # TaskWarrior renumbers tasks whenever one is completed or deleted, so rows are matched by
+    # their contents without the id
+    old_rows = _get_task_rows(old_task_list)
+    new_rows = _get_task_rows(new_task_list)
+    matcher = SequenceMatcher(None, [_strip_id(row) for row in old_rows],
+                              [_strip_id(row) for row in new_rows], autojunk=False)
+
+    blocks = [(old_rows[old_start:old_end], new_rows[new_start:new_end])
+              for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes()
+              if tag != 'equal']
+    # Moved rows end up in different blocks, they're matched by their contents first
+    old_counts = Counter(_strip_id(row) for old_block, _ in blocks for row in old_block)
+    new_counts = Counter(_strip_id(row) for _, new_block in blocks for row in new_block)
+    moved_counts = old_counts & new_counts
+    old_moved_counts = moved_counts.copy()
+
+    added, removed, modified = [], [], []  # type: List[str], List[str], List[str]
+    for old_block, new_block in blocks:
+        block_added, block_removed, block_modified = _diff_block(
+            _drop_rows(old_block, old_moved_counts), _drop_rows(new_block, moved_counts))
+        added.extend(f'+ {row}' for row in block_added)
+        removed.extend(f'- {row}' for row in block_removed)
+        modified.extend(f'~ {row}' for row in block_modified)
+
+    return added + removed + modified
+
+
+def _diff_block(old_rows: List[str], new_rows: List[str]) \
+        -> Tuple[List[str], List[str], List[str]]:
+    # Rows that only changed a bit (Age and Urg change all the time) are matched by their position
+    # in linear time, only what's left of small blocks is compared pairwise
+    added, modified = [], []  # type: List[str], List[str]
+    remaining_old_rows = []  # type: List[str]
+    for position, new_row in enumerate(new_rows):
+        old_row = old_rows[position] if position < len(old_rows) else None
+        if old_row is not None and _is_similar(old_row, new_row):
+            modified.append(new_row)
+        else:
+            added.append(new_row)
+            if old_row is not None:
+                remaining_old_rows.append(old_row)
+    remaining_old_rows.extend(old_rows[len(new_rows):])
+
+    if len(added) * len(remaining_old_rows) > MAX_COMPARED_ROWS:
+        return added, remaining_old_rows, modified
+
+    still_added = []  # type: List[str]
+    for new_row in added:
+        old_row = _find_modified_row(new_row, remaining_old_rows)
+        if old_row is None:
+            still_added.append(new_row)
+        else:
+            remaining_old_rows.remove(old_row)
+            modified.append(new_row)
+    return still_added, remaining_old_rows, modified
+
+
+def _drop_rows(rows: List[str], counts: Counter) -> List[str]:
+    kept_rows = []  # type: List[str]
+    for row in rows:
+        content = _strip_id(row)
+        if counts[content]:
+            counts[content] -= 1
+        else:
+            kept_rows.append(row)
+    return kept_rows
+
+
+def _get_task_rows(task_list: List[str]) -> List[str]:
+    # Only task rows start with an id, headers and footers are not worth diffing
+    return [row for row, fields in ((row, row.split()) for row in task_list)
+            if fields and fields[0].isdigit()]
+
+
+def _strip_id(row: str) -> str:
+    # Column widths change with the ids too, so whitespace is normalized as well
+    return ' '.join(row.split()[1:])
+
+
+def _get_similarity(old_row: str, new_row: str, cutoff: float) -> float:
+    # The quick upper bounds skip the expensive ratio for rows that can't be similar enough
+    matcher = SequenceMatcher(None, _strip_id(old_row), _strip_id(new_row), autojunk=False)
+    if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+        return 0.
+    return matcher.ratio()
+
+
+def _is_similar(old_row: str, new_row: str) -> bool:
+    return _get_similarity(old_row, new_row, MODIFIED_ROW_SIMILARITY) >= MODIFIED_ROW_SIMILARITY
+
+
+def _find_modified_row(new_row: str, old_rows: List[str]) -> Optional[str]:
+    best_row, best_similarity = None, MODIFIED_ROW_SIMILARITY
+    for old_row in old_rows:
+        similarity = _get_similarity(old_row, new_row, best_similarity)
+        if similarity >= best_similarity and (best_row is None or similarity > best_similarity):
+            best_row, best_similarity = old_row, similarity
+    return best_row
+
+
+terminal = Terminal()
+on_tasks_refresh = TaskListPrinter()
 
 
 def write_status(message):
-    print(f'{GREEN}{message}{RESTORE_COLOR}')
+    terminal.write(f'{GREEN}{message}{RESTORE_COLOR}')
 
 
 def write_pomodoro_status(message):
-    print(f'{BLUE}{message}{RESTORE_COLOR}')
+    terminal.write(f'{BLUE}{message}{RESTORE_COLOR}')
 
 
 def error(message):
-    print(f'{RED}{message}{RESTORE_COLOR}', file=sys.stderr)
+    terminal.write(f'{RED}{message}{RESTORE_COLOR}', sys.stderr)
+
+
+def read_key(prompt_):  # pragma: no cover
+    return terminal.read_key(prompt_)
 
 
 def prompt(prompt_):  # pragma: no cover
-    user_input = input(f'{prompt_}\n')
+    user_input = terminal.read_line(prompt_)
     if user_input == '':
         raise UserInputError(EMPTY_STRING)
     return user_input
 
 
 def main():
-    with just_start(write_status, on_tasks_refresh, write_pomodoro_status) as action_runner:
+    with terminal.raw_mode(), \
+            just_start(write_status, on_tasks_refresh, write_pomodoro_status) as action_runner:
         read_keys(action_runner)
 
 
 def read_keys(action_runner: ActionRunner):
     while True:
         try:
-            key = prompt(ACTION_PROMPT)
+            key = read_key(ACTION_PROMPT)
             if key == 'q':
                 break
+            if key == FULL_LIST_KEY:
+                on_tasks_refresh.print_full_list()
+                continue
 
             run_action(action_runner, key)
         except JustStartError as e:
@@ -68,10 +333,27 @@ def run_action(action_runner: ActionRunner, key):
 
         if action is Action.MODIFY:
             args.append(prompt(TASK_IDS_PROMPT))
+        elif action is Action.BULK:
+            args = [confirm_bulk_operation(action_runner, args[0])]
 
-        action_runner(action, *args)
+        wait_for_action(action_runner, action_runner(action, *args))
     else:
-        action_runner(action)
+        wait_for_action(action_runner, action_runner(action))
+
+
+def confirm_bulk_operation(action_runner: ActionRunner, command: str) -> BulkOperation:
+    bulk_operation = action_runner.preview_bulk(command)
+    if read_key(f'{bulk_operation.preview}\n{CONFIRM_PROMPT}') != 'y':
+        raise UserInputError(INPUT_CANCELLED)
+    return bulk_operation
+
+
+def wait_for_action(action_runner: ActionRunner, future: Future):
+    try:
+        future.result()
+    except KeyboardInterrupt:
+        action_runner.cancel_commands()
+        future.result()
 
 
 if __name__ == '__main__':
@@ -1,14 +1,26 @@
+import pickle
 from dataclasses import field
 from datetime import time, datetime
+from enum import Enum
+from hashlib import sha256
 from ipaddress import IPv4Address
-from os.path import expanduser
-from typing import Dict, List, TypeVar, Optional, cast
+from logging import getLogger
+from os import makedirs, replace, open as os_open, fdopen, fchmod, O_WRONLY, O_CREAT, O_TRUNC
+from os.path import getmtime, dirname
+from typing import Dict, List, TypeVar, Optional, Tuple
 
 from pydantic import PositiveInt, FilePath, SecretStr, ConstrainedInt
 from pydantic.dataclasses import dataclass
-from toml import load
+from toml import loads
 
-from just_start.constants import CONFIG_PATH
+from just_start.constants import CONFIG_PATH, CONFIG_CACHE_PATH
+
+
+logger = getLogger(__name__)
+
+# Bump whenever the config dataclasses change so that stale caches are discarded
+CONFIG_SCHEMA_VERSION = 5
+CONFIG_CACHE_MODE = 0o600
 
 
 ConfigName = str
@@ -26,14 +38,35 @@ class _LocationActivationConfig:
     end: time
     days: List[ISOWeekday]
 
+    def is_active(self, now: datetime) -> bool:
+        # An empty list of days means the location is active every day
+        return (self.start <= now.time() <= self.end
+                and (not self.days or now.isoweekday() in self.days))
+
+
+@dataclass
+class CommandTimeoutsConfig:
+    read: PositiveInt = PositiveInt(30)
+    write: PositiveInt = PositiveInt(30)
+    sync: PositiveInt = PositiveInt(120)
+    sudo: PositiveInt = PositiveInt(30)
+
 
 @dataclass
 class GeneralConfig:
     password: Optional[SecretStr] = None
-    taskrc_path: FilePath = cast(FilePath, expanduser("~/.taskrc"))
+    # TaskWarrior's own TASKRC (or ~/.taskrc) is used unless a taskrc is configured
+    taskrc_path: Optional[FilePath] = None
     blocked_sites: List[str] = field(default_factory=list)
+    blocklist_files: List[FilePath] = field(default_factory=list)
     blocking_ip: IPv4Address = IPv4Address("127.0.0.1")  # NOSONAR
     notifications: bool = True
+    command_timeouts: CommandTimeoutsConfig = field(default_factory=CommandTimeoutsConfig)
+
+
+class SuspendPolicy(Enum):
+    PAUSE = 'pause'
+    SKIP = 'skip'
 
 
 @dataclass
@@ -42,6 +75,7 @@ class PomodoroConfig:
     short_rest: PositiveInt = PositiveInt(5)
     long_rest: PositiveInt = PositiveInt(15)
     cycles_before_long_rest: PositiveInt = PositiveInt(4)
+    suspend_policy: SuspendPolicy = SuspendPolicy.PAUSE
 
 
 @dataclass
@@ -61,14 +95,19 @@ class _FullConfig:
     locations: List[_LocationConfig] = field(default_factory=list)
 
 
+DEFAULT_LOCATION_NAME = 'default'
+
 Section = TypeVar('Section')
+CacheKey = Tuple[int, float, str]
 
 
 class _Config:
-    def __init__(self, config_path: str = CONFIG_PATH):
+    def __init__(self, config_path: str = CONFIG_PATH, cache_path: str = CONFIG_CACHE_PATH):
         self._loaded_config = None  # type: Optional[_FullConfig]
         self.config_path = config_path
-        self._at_work_override = False
+        self.cache_path = cache_path
+        # Pins a location by name instead of choosing it by its activation time
+        self.profile_override = None  # type: Optional[str]
 
     @property
     def read_config(self):
@@ -88,27 +127,78 @@ class _Config:
 
     @property
     def location_name(self) -> str:
-        return 'empty'
+        return self.get_location_name()
+
+    def get_location_name(self, now: Optional[datetime] = None) -> str:
+        location = self._get_location(now)
+        return location.name if location else DEFAULT_LOCATION_NAME
 
     def _load_config(self) -> _FullConfig:
         try:
-            config = _FullConfig(**load(self.config_path))
+            config = self._load_cached_or_validated_config()
         except FileNotFoundError:
             config = _FullConfig()
 
         self._loaded_config = config
         return self._loaded_config
 
-    def _get_location_section_or_default(self, section_name: str) -> Section:
-        try:
-            section = next((getattr(location, section_name)
-                            for location in self.read_config.locations
-                            if location.activation.start <= datetime.now().time()
-                            <= location.activation.end))
-        except StopIteration:
-            section = getattr(self.read_config, section_name)
-
-        return section
+    def _load_cached_or_validated_config(self) -> _FullConfig:
+        with open(self.config_path, 'rb') as config_file:
+            raw_config = config_file.read()
+        cache_key = (CONFIG_SCHEMA_VERSION, getmtime(self.config_path),
+                     sha256(raw_config).hexdigest())
+
+        config = _read_config_cache(self.cache_path, cache_key)
+        if config is None:
+            config = _FullConfig(**loads(raw_config.decode('utf-8')))
+            _write_config_cache(self.cache_path, cache_key, config)
+
+        return config
+
+    def get_profile_names(self) -> List[str]:
+        return [DEFAULT_LOCATION_NAME, *(location.name for location in self.read_config.locations)]
+
+    def _get_location(self, now: Optional[datetime] = None) -> Optional[_LocationConfig]:
+        if self.profile_override is not None:
+            return next((location for location in self.read_config.locations
+                         if location.name == self.profile_override), None)
+
+        now = now or datetime.now()
+        return next((location for location in self.read_config.locations
+                     if location.activation.is_active(now)), None)
+
+    def _get_location_section_or_default(self, section_name: str,
+                                         now: Optional[datetime] = None) -> Section:
+        return getattr(self._get_location(now) or self.read_config, section_name)
+
+
+def _read_config_cache(cache_path: str, cache_key: CacheKey) -> Optional[_FullConfig]:
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            if pickle.load(cache_file) != cache_key:
+                return None
+            return pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning(f'Config cache {cache_path} could not be read, revalidating config')
+        return None
+
+
+def _write_config_cache(cache_path: str, cache_key: CacheKey, config: _FullConfig) -> None:
+    temp_path = f'{cache_path}.tmp'
+    try:
+        makedirs(dirname(cache_path), exist_ok=True)
+        # The config holds the sudo password, so only the user may read its cache
+        with fdopen(os_open(temp_path, O_WRONLY | O_CREAT | O_TRUNC, CONFIG_CACHE_MODE),
+                    'wb') as cache_file:
+            # A leftover temporary file would keep its previous mode
+            fchmod(cache_file.fileno(), CONFIG_CACHE_MODE)
+            pickle.dump(cache_key, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(config, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(temp_path, cache_path)
+    except OSError:
+        logger.exception(f'Config cache {cache_path} could not be written')
 
 
 class ConfigError(Exception):
@@ -122,13 +212,21 @@ def get_general_config() -> GeneralConfig:
     return _config.general
 
 
-def get_pomodoro_config() -> PomodoroConfig:
-    return _config.pomodoro
+def get_pomodoro_config(now: Optional[datetime] = None) -> PomodoroConfig:
+    return _config._get_location_section_or_default('pomodoro', now)
 
 
 def get_client_config(client: str) -> Dict[str, str]:
     return _config.clients.get(client, {})
 
 
-def get_location_name() -> str:
-    return _config.location_name
+def get_location_name(now: Optional[datetime] = None) -> str:
+    return _config.get_location_name(now)
+
+
+def get_profile_names() -> List[str]:
+    return _config.get_profile_names()
+
+
+def set_profile_override(profile: Optional[str]) -> None:
+    _config.profile_override = profile
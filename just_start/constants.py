@@ -9,24 +9,51 @@ CONFIG_DIR = join(getenv('XDG_CONFIG_HOME', expanduser(join('~', '.config'))),
 CONFIG_PATH = join(CONFIG_DIR, 'preferences.toml')
 LOG_PATH = join(LOCAL_DIR, 'log')
 PERSISTENT_PATH = join(LOCAL_DIR, 'db')
+CONFIG_CACHE_PATH = join(LOCAL_DIR, 'config_cache')
+BLOCKLIST_CACHE_PATH = join(LOCAL_DIR, 'blocklist_cache')
+HOSTS_STAGING_PATH = join(LOCAL_DIR, 'hosts')
+HOSTS_PATH = '/etc/hosts'
+TASKS_SNAPSHOTS_DIR = join(LOCAL_DIR, 'tasks_snapshots')
+# just_start_status finds it on its own, keep both in sync
+STATUS_FILE_PATH = join(LOCAL_DIR, 'status')
+ACTION_PROFILES_DIR = join(LOCAL_DIR, 'action_profiles')
+
+# Number of frames kept per traced allocation, memory isn't traced when unset
+TRACE_MEMORY_ENV = 'JUST_START_TRACE_MEMORY'
+# Actions are profiled from the start when set, the profiler can also be toggled with a key
+PROFILE_ACTIONS_ENV = 'JUST_START_PROFILE_ACTIONS'
+
+AUTOMATIC_PROFILE = 'auto'
 
 KEYBOARD_HELP = ('(a)dd task, (c)omplete task, (d)elete task, (h)elp, (m)odify task,'
                  ' (p)omodoro pause/resume, (q)uit, (r)efresh tasks, (s)top pomodoro,'
-                 ' s(y)nc server, (!) custom command')
+                 ' s(y)nc server, (t)rack task time, s(w)itch profile,'
+                 ' (M)emory and command stats, (P)rofile actions on/off, (!) custom command,'
+                 ' (b)ulk action on a filter')
 
-ACTION_PROMPT = 'Enter your action'
+ACTION_PROMPT = 'Press an action key'
 TASK_IDS_PROMPT = "Enter the tasks' ids"
+TASK_ID_PROMPT = "Enter the task's id"
 ADD_PROMPT = "Enter the task's data"
 MODIFY_PROMPT = "Enter the modified tasks' data"
 CUSTOM_COMMAND_PROMPT = 'Enter your custom command'
+BULK_PROMPT = 'Enter a filter followed by done, delete or modify and the modifications'
+PROFILE_PROMPT = f"Enter the profile's name ({AUTOMATIC_PROFILE} to follow the locations)"
 
 INVALID_ACTION_KEY = 'Invalid action key'
 EMPTY_STRING = 'An empty string is not allowed'
+INPUT_CANCELLED = 'Input cancelled'
+CONFIRM_PROMPT = 'Confirm? (y/n)'
+TASK_NOT_FOUND = 'No task found with id'
+PROFILE_NOT_FOUND = 'No profile found with name'
 UNHANDLED_ERROR = 'Unhandled error'
 UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH = (f'{UNHANDLED_ERROR}, please see {LOG_PATH} and/or contact'
                                          f' the author')
 
 STOP_MESSAGE = 'Pomodoro timer stopped'
+STALE_TASKS = 'Showing cached tasks, refreshing...'
+SUSPEND_PAUSE_MESSAGE = 'Paused after the computer was suspended'
 
 RECURRENCE_OFF = 'rc.recurrence.confirmation=off'
 CONFIRMATION_OFF = 'rc.confirmation=off'
+JSON_ARRAY_ON = 'rc.json.array=on'
@@ -0,0 +1,96 @@
+import tracemalloc
+from logging import getLogger, INFO
+from os import getenv, sysconf
+from resource import getrusage, RUSAGE_SELF
+from threading import Lock
+from typing import Optional
+
+from .constants import TRACE_MEMORY_ENV
+
+
+logger = getLogger(__name__)
+
+
+TOP_GROWING_SITES = 10
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                 '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+class MemoryDiagnostics:
+    # Opt-in, since tracing every allocation slows the whole app down
+    def __init__(self, frames: Optional[int] = None):
+        self.frames = _get_traced_frames() if frames is None else frames
+        self.rss_delta = 0
+        self.traced_delta = 0
+        self._snapshot = None  # type: Optional[tracemalloc.Snapshot]
+        self._rss = 0
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.frames > 0
+
+    def start(self) -> None:
+        if self.enabled and not tracemalloc.is_tracing():
+            logger.setLevel(INFO)
+            tracemalloc.start(self.frames)
+            self._rss = get_rss()
+
+    def stop(self) -> None:
+        if self.enabled:
+            tracemalloc.stop()
+
+    def take_snapshot(self) -> None:
+        if not tracemalloc.is_tracing():
+            return
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, path) for path in IGNORED_FILES])
+        rss = get_rss()
+        with self._lock:
+            previous_snapshot, self._snapshot = self._snapshot, snapshot
+            self.rss_delta, self._rss = rss - self._rss, rss
+            if previous_snapshot is None:
+                return
+
+            stats = snapshot.compare_to(previous_snapshot, 'lineno')
+            self.traced_delta = sum(stat.size_diff for stat in stats)
+
+        growing_sites = [str(stat) for stat in stats if stat.size_diff > 0][:TOP_GROWING_SITES]
+        logger.info('\n'.join(['Top growing allocation sites since the previous refresh:',
+                               *growing_sites]))
+
+    def report(self) -> str:
+        rss = f'RSS {format_size(get_rss())}'
+        if not tracemalloc.is_tracing():
+            return f'{rss}, set {TRACE_MEMORY_ENV} to trace allocations'
+
+        traced, _ = tracemalloc.get_traced_memory()
+        with self._lock:
+            return (f'{rss} ({format_size(self.rss_delta, signed=True)} in the last refresh),'
+                    f' traced {format_size(traced)}'
+                    f' ({format_size(self.traced_delta, signed=True)})')
+
+
+def get_rss() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Without /proc the peak RSS is the closest measure (bytes on macOS)
+        return getrusage(RUSAGE_SELF).ru_maxrss
+
+
+def format_size(size: int, signed: bool = False) -> str:
+    return f'{size / 2 ** 20:{"+" if signed else ""}.1f} MiB'
+
+
+def _get_traced_frames() -> int:
+    try:
+        return int(getenv(TRACE_MEMORY_ENV, '0'))
+    except ValueError:
+        logger.warning(f'{TRACE_MEMORY_ENV} should be a number of frames, memory won\'t be traced')
+        return 0
+
+
+memory_diagnostics = MemoryDiagnostics()
@@ -1,31 +1,34 @@
 import shelve
+from asyncio import create_subprocess_exec, wait_for, subprocess as async_subprocess, CancelledError
+from asyncio import TimeoutError as AsyncTimeoutError
+from collections import Counter
 from collections.abc import MutableMapping
+from enum import Enum
+from json import loads
 from logging import getLogger
+from os import replace, killpg, environ
 from pickle import HIGHEST_PROTOCOL
 from platform import system
-from subprocess import run, PIPE, STDOUT
-from typing import List, Callable
+from signal import SIGTERM, SIGKILL
+from subprocess import Popen, PIPE, STDOUT, CompletedProcess, TimeoutExpired
+from threading import Lock
+from typing import Any, List, Callable, Optional, Set, Type, Dict
 
-from pexpect import spawn, EOF
+from pexpect import spawn, EOF, TIMEOUT
 from pydantic import SecretStr
 
 from .config_reader import get_general_config, GeneralConfig
-from .constants import PERSISTENT_PATH
+from .constants import PERSISTENT_PATH, JSON_ARRAY_ON
 
 
 logger = getLogger(__name__)
 
+# Seconds a killed command gets to exit after SIGTERM before it's sent SIGKILL
+KILL_GRACE_SECONDS = 2
 
-BLOCKING_IP = get_general_config().blocking_ip
-
-APP_SPECIFIC_COMMENT = '# just-start'
-BLOCKING_LINES = '\\n'.join(
-    [f'{BLOCKING_IP}\\t{blocked_site}\\t{APP_SPECIFIC_COMMENT}\\n'
-     f'{BLOCKING_IP}\\twww.{blocked_site}\\t{APP_SPECIFIC_COMMENT}'
-     for blocked_site in get_general_config().blocked_sites])
-BLOCK_COMMAND = (f'/bin/bash -c "echo -e \'{BLOCKING_LINES}\' | sudo tee -a'
-                 f' /etc/hosts > /dev/null"')
-UNBLOCK_COMMAND = f"sudo sed -i '' '/^.*{APP_SPECIFIC_COMMENT}$/d' /etc/hosts"
+TaskData = Dict[str, Any]
+# Every attribute of the listed tasks, for clients that work with more than the report rows
+TASK_DATA_COMMAND = (JSON_ARRAY_ON, 'status:pending', '-BLOCKED', 'export')
 
 
 class JustStartError(Exception):
@@ -44,16 +47,114 @@ class UserInputError(JustStartError, ValueError):
     pass
 
 
+class CommandClass(Enum):
+    READ = 'read'
+    WRITE = 'write'
+    SYNC = 'sync'
+    SUDO = 'sudo'
+
+
+class CommandSupervisor:
+    def __init__(self):
+        self.stats = Counter()  # type: Counter
+        self._processes: Set[Popen] = set()
+        self._cancelled: Set[Popen] = set()
+        self._lock = Lock()
+
+    def run(self, args: List[str], timeout: float, error_class: Type[JustStartError],
+            env: Optional[Dict[str, str]] = None) -> CompletedProcess:
+        # Every command gets its own process group, so that its children can be killed too
+        process = Popen(args, stdout=PIPE, stderr=STDOUT, start_new_session=True, env=env)
+        with self._lock:
+            self._processes.add(process)
+
+        try:
+            stdout, _ = process.communicate(timeout=timeout)
+        except TimeoutExpired:
+            self.count('timeouts')
+            self.kill(process)
+            raise error_class(f'"{" ".join(args)}" timed out after {timeout} seconds')
+        except KeyboardInterrupt:
+            self.count('cancellations')
+            self.kill(process)
+            raise
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+                cancelled = process in self._cancelled
+                self._cancelled.discard(process)
+
+        if cancelled:
+            raise error_class(f'"{" ".join(args)}" was cancelled')
+        return CompletedProcess(args, process.returncode, stdout)
+
+    def count(self, event: str) -> None:
+        # Commands are supervised from several threads, so counts are only changed here
+        with self._lock:
+            self.stats[event] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def cancel(self) -> None:
+        with self._lock:
+            processes = list(self._processes)
+            self._cancelled.update(processes)
+
+        for process in processes:
+            self.count('cancellations')
+            self.kill(process)
+
+    def kill(self, process: Popen) -> None:
+        try:
+            killpg(process.pid, SIGTERM)
+            process.wait(KILL_GRACE_SECONDS)
+        except ProcessLookupError:
+            return
+        except TimeoutExpired:
+            killpg(process.pid, SIGKILL)
+            process.wait()
+        self.count('kills')
+        logger.warning(f'Killed {process.args!r} (pid {process.pid})')
+
+
+command_supervisor = CommandSupervisor()
+
+
+def format_command_stats(stats: Dict[str, int]) -> str:
+    counts = ', '.join(f'{count} {event}' for event, count in sorted(stats.items()))
+    return f'commands: {counts or "no timeouts, cancellations or kills"}'
+
+
 def get_task_list() -> List[str]:
     return run_task().split("\n")
 
 
-def block_sites(block: bool) -> None:
-    # Blocked sites could be outdated, so unblock and re-block
-    run_sudo(UNBLOCK_COMMAND)
+def get_task_data() -> List[TaskData]:
+    return parse_task_data(run_task(*TASK_DATA_COMMAND))
+
 
-    if block:
-        run_sudo(BLOCK_COMMAND)
+def parse_task_data(export: str) -> List[TaskData]:
+    return loads(export or '[]')
+
+
+def save_task_snapshot(task_list: List[str], snapshot_path: str) -> None:
+    temp_path = f'{snapshot_path}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as snapshot:
+            snapshot.write('\n'.join(task_list))
+        replace(temp_path, snapshot_path)
+    except OSError:
+        logger.exception(f'Task snapshot {snapshot_path} could not be written')
+
+
+def load_task_snapshot(snapshot_path: str) -> Optional[List[str]]:
+    try:
+        with open(snapshot_path, encoding='utf-8') as snapshot:
+            return snapshot.read().split('\n')
+    except OSError:
+        return None
 
 
 def notify(status: str) -> None:
@@ -62,13 +163,17 @@ def notify(status: str) -> None:
     run_command(*command)
 
 
-def run_command(*args):
-    return run(args, stdout=PIPE, stderr=STDOUT)
+def run_command(*args, command_class: CommandClass = CommandClass.READ,
+                error_class: Type[JustStartError] = ActionError,
+                env: Optional[Dict[str, str]] = None) -> CompletedProcess:
+    timeout = getattr(get_general_config().command_timeouts, command_class.value)
+    return command_supervisor.run(list(args), timeout, error_class, env)
 
 
-def run_task(*args) -> str:
+def run_task(*args, command_class: CommandClass = CommandClass.READ) -> str:
     command = args or ('-BLOCKED',)
-    completed_process = run_command('task', *command)
+    completed_process = run_command('task', *command, command_class=command_class,
+                                    error_class=TaskWarriorError, env=_get_task_env())
     process_output = completed_process.stdout.decode('utf-8')
 
     if completed_process.returncode != 0:
@@ -77,23 +182,82 @@ def run_task(*args) -> str:
     return process_output
 
 
+async def run_task_async(*args, command_class: CommandClass = CommandClass.READ) -> str:
+    command = ['task', *(args or ('-BLOCKED',))]
+    timeout = getattr(get_general_config().command_timeouts, command_class.value)
+    process = await create_subprocess_exec(
+        *command, stdout=async_subprocess.PIPE, stderr=async_subprocess.STDOUT,
+        env=_get_task_env(), start_new_session=True)
+
+    try:
+        stdout, _ = await wait_for(process.communicate(), timeout)
+    except AsyncTimeoutError:
+        command_supervisor.count('timeouts')
+        await _kill_async_process(process)
+        raise TaskWarriorError(f'"{" ".join(command)}" timed out after {timeout} seconds')
+    except CancelledError:
+        command_supervisor.count('cancellations')
+        await _kill_async_process(process)
+        raise
+
+    process_output = stdout.decode('utf-8')
+    if process.returncode != 0:
+        raise TaskWarriorError(process_output)
+
+    return process_output
+
+
+def _get_task_env() -> Optional[Dict[str, str]]:
+    # TASKRC points TaskWarrior to the current profile's database, an rc: argument still wins
+    taskrc_path = get_general_config().taskrc_path
+    return None if taskrc_path is None else {**environ, 'TASKRC': str(taskrc_path)}
+
+
+async def _kill_async_process(process: async_subprocess.Process) -> None:
+    try:
+        killpg(process.pid, SIGTERM)
+        await wait_for(process.wait(), KILL_GRACE_SECONDS)
+    except ProcessLookupError:
+        return
+    except AsyncTimeoutError:
+        killpg(process.pid, SIGKILL)
+        await process.wait()
+    command_supervisor.count('kills')
+    logger.warning(f'Killed task process (pid {process.pid})')
+
+
 def run_sudo(command: str, config_getter: Callable[[], GeneralConfig] = get_general_config) -> None:
-    password = config_getter().password
-    if password:
-        _run_with_password(command, password)
+    config = config_getter()
+    if config.password:
+        _run_with_password(command, config.password, config.command_timeouts.sudo)
 
 
-def _run_with_password(command: str, password: SecretStr):
+def _run_with_password(command: str, password: SecretStr, timeout: float):
     try:
-        _spawn_sudo_command(command, password)
+        _spawn_sudo_command(command, password, timeout)
     except OSError:
         logger.exception(f'"{command}" command failed')
 
 
-def _spawn_sudo_command(command: str, password: SecretStr):
+def _spawn_sudo_command(command: str, password: SecretStr, timeout: float):
     child = spawn(command)
-    child.sendline(password.get_secret_value())
-    child.expect(EOF)
+    try:
+        child.sendline(password.get_secret_value())
+        child.expect(EOF, timeout=timeout)
+    except TIMEOUT:
+        command_supervisor.count('timeouts')
+        _terminate_sudo_command(child)
+        raise ActionError(f'"{command}" timed out after {timeout} seconds')
+    except KeyboardInterrupt:
+        command_supervisor.count('cancellations')
+        _terminate_sudo_command(child)
+        raise
+
+
+def _terminate_sudo_command(child: spawn):
+    child.terminate(force=True)
+    command_supervisor.count('kills')
+    logger.warning(f'Killed "{child.command}" (pid {child.pid})')
 
 
 class Db(MutableMapping):
@@ -1,19 +1,45 @@
 #!/usr/bin/env python3
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 from itertools import cycle
 from logging import getLogger
-from typing import Dict, Any, Tuple, Callable, Iterator, Optional, Mapping
+from typing import Dict, Any, Tuple, Callable, Iterator, Optional, Mapping, NamedTuple
 
-from just_start.constants import STOP_MESSAGE
-from just_start.config_reader import get_location_name, get_pomodoro_config
-from just_start.os_utils import block_sites
+from just_start.constants import STOP_MESSAGE, SUSPEND_PAUSE_MESSAGE
+from just_start.config_reader import (
+    get_location_name, get_pomodoro_config, SuspendPolicy, PomodoroConfig,
+)
+from just_start.site_blocking import block_sites
+from just_start.status_file import StatusFile
+from just_start.time_tracking import TaskTimeTracker
 
 
 logger = getLogger(__name__)
 
 
 StatusWriter = Callable[[str], None]
+SiteBlocker = Callable[[bool], None]
+
+# The timer wakes up at least this often to notice suspensions soon after resuming
+SUSPEND_CHECK_SECONDS = 60
+# Gaps shorter than this are treated as clock noise instead of a suspension
+SUSPEND_THRESHOLD_SECONDS = 5
+
+
+class Clock:
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def boottime(self) -> float:
+        # Unlike the monotonic clock, this one keeps counting while the computer is suspended
+        try:
+            return time.clock_gettime(time.CLOCK_BOOTTIME)
+        except AttributeError:  # pragma: no cover
+            return time.time()
+
+    def now(self) -> datetime:
+        return datetime.now()
 
 
 class PomodoroPhase(Enum):
@@ -22,8 +48,23 @@ class PomodoroPhase(Enum):
     LONG_REST = 'LONG BREAK!!!'
 
 
-def _generate_phase_duration() -> Dict[PomodoroPhase, int]:
-    pomodoro_config = get_pomodoro_config()
+class Countdown(NamedTuple):
+    phase: PomodoroPhase
+    seconds_left: float
+    # Monotonic time when seconds_left was measured, None while the timer is paused
+    measured_at: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.measured_at is not None
+
+    def get_seconds_left(self, monotonic: float) -> float:
+        if self.measured_at is None:
+            return self.seconds_left
+        return max(0., self.seconds_left - (monotonic - self.measured_at))
+
+
+def _generate_phase_duration(pomodoro_config: PomodoroConfig) -> Dict[PomodoroPhase, int]:
     durations = (duration * 60 for duration in (pomodoro_config.pomodoro_length,
                                                 pomodoro_config.short_rest,
                                                 pomodoro_config.long_rest))
@@ -32,29 +73,97 @@ def _generate_phase_duration() -> Dict[PomodoroPhase, int]:
     return phase_duration
 
 
-def _create_cycle() -> Iterator[PomodoroPhase]:
+def _create_cycle(pomodoro_config: PomodoroConfig, start: int = 0) -> Iterator[PomodoroPhase]:
     states = ([PomodoroPhase.WORK, PomodoroPhase.SHORT_REST] *
-              get_pomodoro_config().cycles_before_long_rest)
+              pomodoro_config.cycles_before_long_rest)
     states[-1] = PomodoroPhase.LONG_REST
-    return cycle(states)
+    return cycle(states[start:] + states[:start])
+
+
+def _get_cycle_length(pomodoro_config: PomodoroConfig) -> int:
+    return 2 * pomodoro_config.cycles_before_long_rest
 
 
 class PomodoroTimer:
-    def __init__(self, notifier: StatusWriter, timer):
+    def __init__(self, notifier: StatusWriter, timer, clock: Optional[Clock] = None,
+                 task_tracker: Optional[TaskTimeTracker] = None,
+                 site_blocker: SiteBlocker = block_sites,
+                 status_file: Optional[StatusFile] = None):
         self.start_datetime = None  # type: Optional[datetime]
         self.timer = timer
+        self.clock = clock or Clock()
+        self.task_tracker = task_tracker or TaskTimeTracker(self.clock)
+        self.site_blocker = site_blocker
+        self.status_file = status_file
         self.is_running = False
         self.work_count = 0
-        self.phase_duration = _generate_phase_duration()
+        now = self.clock.now()
+        # The location's lengths are followed from the phase after it changes
+        self.location_name = get_location_name(now)
+        pomodoro_config = get_pomodoro_config(now)
+        self.phase_duration = _generate_phase_duration(pomodoro_config)
+        self.suspend_policy = pomodoro_config.suspend_policy
+        self._last_tick = None  # type: Optional[Tuple[float, float]]
 
-        self.pomodoro_cycle = _create_cycle()
+        self.pomodoro_cycle = _create_cycle(pomodoro_config)
+        self._cycle_length = _get_cycle_length(pomodoro_config)
+        # Position of the current phase in the cycle, the first phase moves it to 0
+        self.cycle_position = -1
         self.pomodoro_phase, self.seconds_left = self._get_next_phase_and_seconds_left()
         self.notifier = notifier
+        self.update_countdown()
 
-    def _get_next_phase_and_seconds_left(self) -> Tuple[PomodoroPhase, int]:
+    def update_countdown(self) -> None:
+        # Replaced as a whole, so that other threads can read it without locking the timer
+        measured_at = self._last_tick[0] if self.is_running and self._last_tick else None
+        self.countdown = Countdown(self.pomodoro_phase, self.seconds_left, measured_at)
+        if self.status_file is not None:
+            self.status_file.write(self.pomodoro_phase.name, self.seconds_left, self.is_running,
+                                   self.work_count, self.location_name)
+
+    def _get_next_phase_and_seconds_left(self) -> Tuple[PomodoroPhase, float]:
         next_phase = next(self.pomodoro_cycle)
+        self.cycle_position = (self.cycle_position + 1) % self._cycle_length
         return next_phase, self.phase_duration[next_phase]
 
+    def _follow_location(self) -> None:
+        # Only checked at phase boundaries, where the loaded config makes it a cheap lookup
+        now = self.clock.now()
+        location_name = get_location_name(now)
+        if location_name == self.location_name:
+            return
+
+        self.location_name = location_name
+        pomodoro_config = get_pomodoro_config(now)
+        self.phase_duration = _generate_phase_duration(pomodoro_config)
+        self.suspend_policy = pomodoro_config.suspend_policy
+        self.fit_cycle(pomodoro_config)
+        logger.info(f'Following the lengths of {location_name} from the next phase')
+
+    def fit_cycle(self, pomodoro_config: PomodoroConfig) -> None:
+        # The pomodoros already done in this round still count towards the long rest, as far as
+        # the new round is long enough
+        pomodoros, phase = divmod(self.cycle_position, 2)
+        last_pomodoro = pomodoro_config.cycles_before_long_rest - 1
+        self._cycle_length = _get_cycle_length(pomodoro_config)
+        self.cycle_position = min(pomodoros, last_pomodoro) * 2 + phase
+        self.pomodoro_cycle = _create_cycle(pomodoro_config, self.cycle_position + 1)
+
+    @property
+    def task_time_state(self) -> Dict[str, Dict[str, Any]]:
+        return self.task_tracker.state
+
+    @task_time_state.setter
+    def task_time_state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        self.task_tracker.state = state
+
+    def track_task(self, task_uuid: str, task_id: str) -> None:
+        self.task_tracker.track(task_uuid, task_id)
+        if not self.is_running:
+            self._run()
+        elif self.pomodoro_phase is PomodoroPhase.WORK:
+            self.task_tracker.start()
+
     def toggle(self) -> None:
         if self.is_running:
             self._pause()
@@ -64,51 +173,112 @@ class PomodoroTimer:
 
     def reset(self) -> None:
         self.stop()
+        self.__init__(notifier=self.notifier, timer=self.timer, clock=self.clock,  # type: ignore
+                      task_tracker=self.task_tracker, site_blocker=self.site_blocker,
+                      status_file=self.status_file)
         self.notifier(STOP_MESSAGE)
-        self.__init__(notifier=self.notifier, timer=self.timer)  # type: ignore
 
     def stop(self):
         self._pause()
+        self.task_tracker.write_time()
 
     def _pause(self) -> None:
         self._cancel_internal_timer()
         self.is_running = False
-        block_sites(True)
+        self.update_countdown()
+        self.site_blocker(True)
 
     def _cancel_internal_timer(self) -> None:
         if self.is_running:
             self.timer.stop()
-            assert self.start_datetime is not None
-            elapsed_timedelta = datetime.now() - self.start_datetime
-            self.seconds_left -= elapsed_timedelta.seconds
+            self._consume_elapsed_time()
+            self.task_tracker.stop()
 
     def _run(self) -> None:
-        self.start_datetime = datetime.now()
+        self.start_datetime = self.clock.now()
+        self._last_tick = self.clock.monotonic(), self.clock.boottime()
+        self._schedule_tick()
+        self.is_running = True
+        # The countdown is updated before notifying, so that clients redrawing it see the new phase
+        self.update_countdown()
+
         now = self.start_datetime.time().strftime('%H:%M')
         pomodoros = 'pomodoro' if self.work_count == 1 else 'pomodoros'
         self.notifier(f'{self.pomodoro_phase.value} - {self.work_count} {pomodoros} so'
-                      f' far at {get_location_name()}.'
+                      f' far at {get_location_name(self.start_datetime)}.'
                       f'\n{now} - {_add_to_time(self.start_datetime, self.seconds_left)}'
                       f' ({int(self.seconds_left / 60)} mins)')
 
-        self.timer.start(self.seconds_left, self._advance_phase)
-        self.is_running = True
-        block_sites(self.pomodoro_phase is self.pomodoro_phase.WORK)
+        if self.pomodoro_phase is PomodoroPhase.WORK:
+            self.task_tracker.start()
+        self.site_blocker(self.pomodoro_phase is self.pomodoro_phase.WORK)
+
+    def _schedule_tick(self) -> None:
+        self.timer.start(max(0., min(self.seconds_left, SUSPEND_CHECK_SECONDS)), self._tick)
+
+    def _tick(self) -> None:
+        suspended_seconds = self._consume_elapsed_time()
+
+        if suspended_seconds:
+            self._handle_suspension(suspended_seconds)
+        elif self.seconds_left <= 0:
+            self._advance_phase()
+        else:
+            self.update_countdown()
+            self._schedule_tick()
+
+    def _consume_elapsed_time(self) -> float:
+        assert self._last_tick is not None
+        last_monotonic, last_boottime = self._last_tick
+        monotonic, boottime = self.clock.monotonic(), self.clock.boottime()
+        self._last_tick = monotonic, boottime
+
+        elapsed_seconds = monotonic - last_monotonic
+        self.seconds_left -= elapsed_seconds
+
+        suspended_seconds = boottime - last_boottime - elapsed_seconds
+        return suspended_seconds if suspended_seconds >= SUSPEND_THRESHOLD_SECONDS else 0.
+
+    def _handle_suspension(self, suspended_seconds: float) -> None:
+        logger.info(f'Suspension of {suspended_seconds:.0f} seconds detected')
+        if self.suspend_policy is SuspendPolicy.SKIP:
+            self.task_tracker.stop()
+            self.seconds_left -= suspended_seconds
+            self._skip_finished_phases()
+            self.task_tracker.write_time()
+            self._run()
+        else:
+            self._pause()
+            self.notifier(SUSPEND_PAUSE_MESSAGE)
+
+    def _skip_finished_phases(self) -> None:
+        while self.seconds_left <= 0:
+            self.work_count += 1
+            self._follow_location()
+            overtime = self.seconds_left
+            self.pomodoro_phase, self.seconds_left = self._get_next_phase_and_seconds_left()
+            self.seconds_left += overtime
 
     def _advance_phase(self) -> None:
         self.work_count += 1
         self._cancel_internal_timer()
+        self.task_tracker.write_time()
 
+        # Carrying the overtime over keeps phases from drifting because of late timer callbacks
+        overtime = min(self.seconds_left, 0.)
+        self._follow_location()
         self.pomodoro_phase, self.seconds_left = self._get_next_phase_and_seconds_left()
+        self.seconds_left += overtime
         self._run()
 
 
-def _add_to_time(time: datetime, seconds_left: int) -> str:
+def _add_to_time(time: datetime, seconds_left: float) -> str:
     return (time + timedelta(seconds=seconds_left)).strftime('%H:%M')
 
 
 class PomodoroSerializer:
-    serializable_attributes = ('pomodoro_cycle', 'pomodoro_phase', 'seconds_left', 'work_count')
+    serializable_attributes = ('pomodoro_cycle', 'pomodoro_phase', 'seconds_left', 'work_count',
+                               'task_time_state', 'cycle_position', 'location_name')
 
     def __init__(self, timer: 'PomodoroTimer'):
         self.timer = timer
@@ -128,3 +298,7 @@ class PomodoroSerializer:
                                f" happen between updates)")
             else:
                 setattr(self.timer, attribute, value)
+        if 'cycle_position' in data:
+            # The round may have been saved with another config's length
+            self.timer.fit_cycle(get_pomodoro_config(self.timer.clock.now()))
+        self.timer.update_countdown()
@@ -0,0 +1,90 @@
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, date, time
+from heapq import heappush, heappop
+from itertools import count
+from typing import Callable, List, Optional
+
+from just_start.pomodoro import PomodoroTimer, Clock
+
+
+class SimulatedClock(Clock):
+    # Both the clock and the timer runner of a PomodoroTimer, so that it can be fast-forwarded
+    def __init__(self, start: datetime):
+        self.start_datetime = start
+        self.seconds = 0.
+        self.suspended_seconds = 0.
+        self._events = []  # type: List[list]
+        self._event_order = count()
+        self._timer = None  # type: Optional[list]
+
+    def monotonic(self) -> float:
+        return self.seconds - self.suspended_seconds
+
+    def boottime(self) -> float:
+        return self.seconds
+
+    def now(self) -> datetime:
+        return self.start_datetime + timedelta(seconds=self.seconds)
+
+    def start(self, seconds: float, callback: Callable[[], None]) -> None:
+        self._timer = [self.monotonic() + seconds, next(self._event_order), callback]
+        heappush(self._events, self._timer)
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer[2] = None
+
+    def advance(self, seconds: float) -> None:
+        end = self.monotonic() + seconds
+        while self._events and self._events[0][0] <= end:
+            due, _, callback = heappop(self._events)
+            if callback is not None:
+                self.seconds += due - self.monotonic()
+                callback()
+        self.seconds += end - self.monotonic()
+
+    def run_until(self, end: datetime) -> None:
+        self.advance((end - self.now()).total_seconds())
+
+    def suspend(self, seconds: float) -> None:
+        # Like a real suspension, timers don't fire while suspended
+        self.seconds += seconds
+        self.suspended_seconds += seconds
+
+
+def simulate_day(clock: SimulatedClock, end: datetime, notifier: Callable[[str], None],
+                 site_blocker: Callable[[bool], None]) -> PomodoroTimer:
+    pomodoro_timer = PomodoroTimer(notifier=notifier, timer=clock, clock=clock,
+                                   site_blocker=site_blocker)
+    pomodoro_timer.toggle()
+    clock.run_until(end)
+    pomodoro_timer.stop()
+    return pomodoro_timer
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description='Simulate a day of pomodoros with your configuration')
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(),
+                        help='day to simulate (YYYY-MM-DD), today by default')
+    parser.add_argument('--start', type=time.fromisoformat, default=time(8),
+                        help='time when the timer is started (HH:MM), 08:00 by default')
+    parser.add_argument('--hours', type=float, default=8,
+                        help='hours the timer runs without pauses, 8 by default')
+    parsed_args = parser.parse_args(args)
+
+    start = datetime.combine(parsed_args.date, parsed_args.start)
+    clock = SimulatedClock(start)
+
+    def notifier(status: str) -> None:
+        print(f'[{clock.now():%H:%M}] {status}')
+
+    def site_blocker(block: bool) -> None:
+        print(f'[{clock.now():%H:%M}] Sites {"blocked" if block else "unblocked"}')
+
+    pomodoro_timer = simulate_day(clock, start + timedelta(hours=parsed_args.hours), notifier,
+                                  site_blocker)
+    print(f'{pomodoro_timer.work_count} phases finished')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+from hashlib import sha256
+from ipaddress import ip_address, IPv4Address
+from logging import getLogger
+from os import makedirs, replace
+from os.path import getmtime, getsize, dirname
+from shlex import quote
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from .config_reader import get_general_config, GeneralConfig
+from .constants import BLOCKLIST_CACHE_PATH, HOSTS_PATH, HOSTS_STAGING_PATH
+from .os_utils import run_sudo
+
+
+logger = getLogger(__name__)
+
+
+APP_SPECIFIC_COMMENT = '# just-start'
+IGNORED_HOSTNAMES = {'localhost', 'localhost.localdomain', 'local', 'broadcasthost',
+                     'ip6-localhost', 'ip6-loopback'}
+
+_blocked_domains_by_key: Dict[str, List[str]] = {}
+
+
+def block_sites(block: bool, config_getter: Callable[[], GeneralConfig] = get_general_config,
+                hosts_path: str = HOSTS_PATH, staging_path: Optional[str] = None,
+                cache_path: Optional[str] = None) -> None:
+    # The app's own files are looked up when called, so that tests can move them away
+    config = config_getter()
+    if not config.password:
+        return
+
+    staging_path = staging_path or HOSTS_STAGING_PATH
+    blocked_domains = get_blocked_domains(config, cache_path) if block else []
+    blocking_lines = _generate_blocking_lines(config.blocking_ip, blocked_domains)
+    if _stage_hosts_file(hosts_path, staging_path, blocking_lines):
+        run_sudo(_get_install_command(staging_path, hosts_path), config_getter)
+
+
+def _get_install_command(staging_path: str, hosts_path: str) -> str:
+    # Paths are quoted twice, once for sh and once for the command line sudo is spawned with
+    temp_path = f'{hosts_path}.just-start'
+    script = (f'cp {quote(staging_path)} {quote(temp_path)}'
+              f' && mv {quote(temp_path)} {quote(hosts_path)}')
+    return f'sudo /bin/sh -c {quote(script)}'
+
+
+def get_blocked_domains(config: GeneralConfig, cache_path: Optional[str] = None) -> List[str]:
+    cache_path = cache_path or BLOCKLIST_CACHE_PATH
+    key = _get_blocklist_key(config)
+    try:
+        return _blocked_domains_by_key[key]
+    except KeyError:
+        pass
+
+    blocked_domains = _read_blocklist_cache(cache_path, key)
+    if blocked_domains is None:
+        blocked_domains = sorted(_normalize_blocklist(config))
+        _write_blocklist_cache(cache_path, key, blocked_domains)
+
+    _blocked_domains_by_key.clear()
+    _blocked_domains_by_key[key] = blocked_domains
+    return blocked_domains
+
+
+def normalize_blocklist_line(line: str) -> Iterator[str]:
+    # Supports both hosts files ("0.0.0.0 domain [domain...]") and one domain per line
+    hostnames = line.split('#', 1)[0].split()
+    if hostnames and _is_ip_address(hostnames[0]):
+        hostnames = hostnames[1:]
+
+    for hostname in hostnames:
+        domain = hostname.lower().rstrip('.')
+        if domain.startswith('www.'):
+            domain = domain[len('www.'):]
+        if domain and domain not in IGNORED_HOSTNAMES and not _is_ip_address(domain):
+            yield domain
+
+
+def _normalize_blocklist(config: GeneralConfig) -> Set[str]:
+    blocked_domains = {domain for site in config.blocked_sites
+                       for domain in normalize_blocklist_line(site)}
+    for path in config.blocklist_files:
+        with open(path, encoding='utf-8', errors='replace') as blocklist:
+            blocked_domains.update(domain for line in blocklist
+                                   for domain in normalize_blocklist_line(line))
+    return blocked_domains
+
+
+def _is_ip_address(hostname: str) -> bool:
+    try:
+        ip_address(hostname)
+    except ValueError:
+        return False
+    return True
+
+
+def _get_blocklist_key(config: GeneralConfig) -> str:
+    files = [(str(path), getmtime(path), getsize(path)) for path in config.blocklist_files]
+    return sha256(repr((config.blocked_sites, files)).encode('utf-8')).hexdigest()
+
+
+def _read_blocklist_cache(cache_path: str, key: str) -> Optional[List[str]]:
+    try:
+        with open(cache_path, encoding='utf-8') as cache:
+            if cache.readline().rstrip('\n') != key:
+                return None
+            return cache.read().split()
+    except FileNotFoundError:
+        return None
+
+
+def _write_blocklist_cache(cache_path: str, key: str, blocked_domains: List[str]) -> None:
+    temp_path = f'{cache_path}.tmp'
+    try:
+        makedirs(dirname(cache_path), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as cache:
+            cache.write(f'{key}\n')
+            cache.writelines(f'{domain}\n' for domain in blocked_domains)
+        replace(temp_path, cache_path)
+    except OSError:
+        logger.exception(f'Blocklist cache {cache_path} could not be written')
+
+
+def _generate_blocking_lines(blocking_ip: IPv4Address,
+                             blocked_domains: Iterable[str]) -> Iterator[str]:
+    for domain in blocked_domains:
+        yield f'{blocking_ip}\t{domain}\t{APP_SPECIFIC_COMMENT}\n'
+        yield f'{blocking_ip}\twww.{domain}\t{APP_SPECIFIC_COMMENT}\n'
+
+
+def _stage_hosts_file(hosts_path: str, staging_path: str, blocking_lines: Iterable[str]) -> bool:
+    # Streams the new hosts file and reports whether the app's lines actually changed
+    previous_lines, new_lines = sha256(), sha256()
+    makedirs(dirname(staging_path), exist_ok=True)
+
+    with open(hosts_path, encoding='utf-8') as hosts, \
+            open(staging_path, 'w', encoding='utf-8') as staging:
+        last_line = '\n'
+        for line in hosts:
+            if line.rstrip('\n').endswith(APP_SPECIFIC_COMMENT):
+                previous_lines.update(_normalize_line_ending(line).encode('utf-8'))
+            else:
+                staging.write(line)
+                last_line = line
+        if not last_line.endswith('\n'):
+            staging.write('\n')
+
+        for line in blocking_lines:
+            new_lines.update(_normalize_line_ending(line).encode('utf-8'))
+            staging.write(line)
+
+    return previous_lines.digest() != new_lines.digest()
+
+
+def _normalize_line_ending(line: str) -> str:
+    return f'{line.rstrip()}\n'
@@ -0,0 +1,46 @@
+from logging import getLogger
+from os import makedirs, replace
+from os.path import dirname
+from threading import Lock
+from time import time
+from typing import Any, Dict, Optional
+
+from .constants import STATUS_FILE_PATH
+
+
+logger = getLogger(__name__)
+
+
+class StatusFile:
+    # Status bars and prompts poll this file through just-start-status, which can't afford to
+    # import just_start, so it only holds what they need to draw a countdown
+    def __init__(self, path: str = STATUS_FILE_PATH):
+        self.path = path
+        self._contents: Optional[str] = None
+        self._lock = Lock()
+
+    def write(self, phase: str, seconds_left: float, is_running: bool, work_count: int,
+              location: str) -> None:
+        status: Dict[str, Any] = {
+            'phase': phase,
+            # Whole seconds, so that timer ticks that don't change anything don't rewrite it
+            'end': round(time() + seconds_left) if is_running else '',
+            'seconds_left': round(seconds_left),
+            'work_count': work_count,
+            'location': location,
+        }
+        # key=value lines, reading JSON would make the reader import json and re
+        contents = ''.join(f'{key}={value}\n' for key, value in status.items())
+
+        with self._lock:
+            if contents == self._contents:
+                return
+            self._contents = contents
+            temp_path = f'{self.path}.tmp'
+            try:
+                makedirs(dirname(self.path), exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as status_file:
+                    status_file.write(contents)
+                replace(temp_path, self.path)
+            except OSError:
+                logger.exception(f'Status file {self.path} could not be written')
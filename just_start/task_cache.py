@@ -0,0 +1,39 @@
+from os import makedirs
+from os.path import join
+from threading import Lock
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from .constants import TASKS_SNAPSHOTS_DIR
+from .os_utils import save_task_snapshot, load_task_snapshot
+
+
+class TaskCache:
+    # Every profile keeps its last task list in memory and on disk, so switching profiles or
+    # starting again shows its tasks before TaskWarrior answers
+    def __init__(self, snapshots_dir: str = TASKS_SNAPSHOTS_DIR):
+        self.snapshots_dir = snapshots_dir
+        self._task_lists: Dict[str, List[str]] = {}
+        self._lock = Lock()
+
+    def get(self, profile: str) -> Optional[List[str]]:
+        with self._lock:
+            try:
+                return self._task_lists[profile]
+            except KeyError:
+                pass
+
+        task_list = load_task_snapshot(self._get_snapshot_path(profile))
+        if task_list is not None:
+            with self._lock:
+                self._task_lists.setdefault(profile, task_list)
+        return task_list
+
+    def set(self, profile: str, task_list: List[str]) -> None:
+        with self._lock:
+            self._task_lists[profile] = task_list
+        makedirs(self.snapshots_dir, exist_ok=True)
+        save_task_snapshot(task_list, self._get_snapshot_path(profile))
+
+    def _get_snapshot_path(self, profile: str) -> str:
+        return join(self.snapshots_dir, quote(profile, safe=''))
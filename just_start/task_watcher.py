@@ -0,0 +1,161 @@
+import struct
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from logging import getLogger
+from os import read, close, pipe, write, stat, strerror, environ
+from os.path import expanduser, join, isdir
+from select import select
+from threading import Thread
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from .config_reader import get_general_config
+
+
+logger = getLogger(__name__)
+
+
+DEBOUNCE_SECONDS = 0.5
+DATA_FILES = ('pending.data', 'completed.data', 'undo.data', 'backlog.data',
+              'taskchampion.sqlite3')
+DEFAULT_DATA_LOCATION = join('~', '.task')
+DEFAULT_TASKRC_PATH = expanduser(join('~', '.taskrc'))
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+Signature = Dict[str, Tuple[float, int]]
+
+
+class TaskWatcher:
+    def __init__(self, on_change: Callable[[], Any], data_location: Optional[str] = None,
+                 debounce_seconds: float = DEBOUNCE_SECONDS):
+        self.on_change = on_change
+        self.data_location = data_location or get_data_location()
+        self.debounce_seconds = debounce_seconds
+        self._signature = None  # type: Optional[Signature]
+        self._thread = None  # type: Optional[Thread]
+        self._stop_pipe = None  # type: Optional[Tuple[int, int]]
+
+    def start(self) -> None:
+        inotify_fd = _add_inotify_watch(self.data_location)
+        if inotify_fd is None:
+            return
+
+        self._stop_pipe = pipe()
+        self._thread = Thread(target=self._watch, args=(inotify_fd, self._stop_pipe[0]),
+                              name='task-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stop_pipe is None or self._thread is None:
+            return
+        write(self._stop_pipe[1], b'.')
+        self._thread.join()
+        close(self._stop_pipe[1])
+        self._stop_pipe = self._thread = None
+
+    def watch(self, data_location: str) -> None:
+        if data_location == self.data_location:
+            return
+        self.stop()
+        self.data_location = data_location
+        self._signature = None
+        self.start()
+
+    def mark_refreshed(self) -> None:
+        self._signature = self._get_signature()
+
+    def _watch(self, inotify_fd: int, stop_fd: int) -> None:
+        try:
+            while self._wait_for_change(inotify_fd, stop_fd):
+                signature = self._get_signature()
+                if signature != self._signature:
+                    self._signature = signature
+                    self._refresh()
+        finally:
+            close(inotify_fd)
+            close(stop_fd)
+
+    def _wait_for_change(self, inotify_fd: int, stop_fd: int) -> bool:
+        timeout = None  # type: Optional[float]
+        # Waits without a timeout until a data file changes and then until the changes settle
+        while True:
+            readable, _, _ = select([inotify_fd, stop_fd], [], [], timeout)
+            if stop_fd in readable:
+                return False
+            if not readable:
+                return True
+            if _read_inotify_names(inotify_fd) & set(DATA_FILES):
+                timeout = self.debounce_seconds
+
+    def _refresh(self) -> None:
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception('Tasks could not be refreshed after a change in the data files')
+
+    def _get_signature(self) -> Signature:
+        signature = {}
+        for data_file in DATA_FILES:
+            try:
+                file_stat = stat(join(self.data_location, data_file))
+            except FileNotFoundError:
+                continue
+            signature[data_file] = file_stat.st_mtime, file_stat.st_size
+        return signature
+
+
+def get_data_location(taskrc_path: Optional[str] = None) -> str:
+    data_location = DEFAULT_DATA_LOCATION
+    try:
+        with open(taskrc_path or get_taskrc_path()) as taskrc:
+            for line in taskrc:
+                key, _, value = line.split('#', 1)[0].partition('=')
+                if key.strip() == 'data.location':
+                    data_location = value.strip()
+    except FileNotFoundError:
+        pass
+    return expanduser(data_location)
+
+
+def get_taskrc_path() -> str:
+    return str(get_general_config().taskrc_path or environ.get('TASKRC', DEFAULT_TASKRC_PATH))
+
+
+def _add_inotify_watch(directory: str) -> Optional[int]:
+    if not isdir(directory):
+        logger.warning(f'TaskWarrior data directory {directory} not found, it will not be watched')
+        return None
+
+    library = find_library('c')
+    libc = CDLL(library, use_errno=True) if library else None
+    if libc is None or not hasattr(libc, 'inotify_init1'):
+        logger.info('inotify is not available, tasks will only be refreshed manually')
+        return None
+
+    inotify_fd = libc.inotify_init1(IN_CLOEXEC)
+    if inotify_fd < 0 or libc.inotify_add_watch(
+            inotify_fd, directory.encode(),
+            IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE) < 0:
+        logger.warning(f"{directory} can't be watched: {strerror(get_errno())}")
+        if inotify_fd >= 0:
+            close(inotify_fd)
+        return None
+    return inotify_fd
+
+
+def _read_inotify_names(inotify_fd: int) -> Set[str]:
+    buffer = read(inotify_fd, 64 * 1024)
+    names = set()  # type: Set[str]
+    offset = 0
+    while offset < len(buffer):
+        _, _, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+        offset += INOTIFY_EVENT.size
+        names.add(buffer[offset:offset + name_length].rstrip(b'\0').decode(errors='replace'))
+        offset += name_length
+    return names
@@ -0,0 +1,106 @@
+from logging import getLogger
+from threading import Lock
+from typing import Dict, List, Optional, Any, Callable
+
+from just_start.os_utils import run_task, TaskWarriorError, CommandClass, TaskData
+
+
+logger = getLogger(__name__)
+
+TRACKED_TIME_ANNOTATION = 'worked with just-start'
+
+
+class TaskTimeTracker:
+    def __init__(self, clock, submit: Callable[[Callable], Any] = lambda write: write()):
+        self.clock = clock
+        self.submit = submit
+        self._lock = Lock()
+        self.task_uuid: Optional[str] = None
+        # Working ids change whenever a task is completed or deleted, so they're only kept until
+        # the next refresh
+        self.task_ids = {}  # type: Dict[str, str]
+        self.totals = {}  # type: Dict[str, float]
+        self._unwritten = {}  # type: Dict[str, float]
+        self._start: Optional[float] = None
+
+    def track(self, task_uuid: str, task_id: str) -> None:
+        self.stop()
+        self.task_uuid = task_uuid
+        self.task_ids[task_uuid] = task_id
+
+    def start(self) -> None:
+        if self.task_uuid is not None and self._start is None:
+            self._start = self.clock.monotonic()
+
+    def stop(self) -> None:
+        if self._start is None:
+            return
+
+        assert self.task_uuid is not None
+        elapsed_seconds = self.clock.monotonic() - self._start
+        self._start = None
+        with self._lock:
+            for times in (self.totals, self._unwritten):
+                times[self.task_uuid] = times.get(self.task_uuid, 0.) + elapsed_seconds
+
+    def write_time(self) -> None:
+        # Less than a minute isn't worth an annotation yet, so it waits for the next phase
+        with self._lock:
+            writable_times = {task_uuid: seconds for task_uuid, seconds in self._unwritten.items()
+                              if seconds >= 60}
+            for task_uuid in writable_times:
+                del self._unwritten[task_uuid]
+
+        if writable_times:
+            self.submit(lambda: self._annotate(writable_times))
+
+    def _annotate(self, times: Dict[str, float]) -> None:
+        for task_uuid, seconds in times.items():
+            try:
+                run_task(task_uuid, 'annotate',
+                         f'{format_duration(seconds)} {TRACKED_TIME_ANNOTATION}',
+                         command_class=CommandClass.WRITE)
+            except TaskWarriorError:
+                logger.exception(f'Tracked time for task {task_uuid} could not be written')
+                with self._lock:
+                    self._unwritten[task_uuid] = self._unwritten.get(task_uuid, 0.) + seconds
+
+    @property
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        return {'totals': self.totals, 'unwritten': self._unwritten}
+
+    @state.setter
+    def state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        self.totals, self._unwritten = state['totals'], state['unwritten']
+        self.task_ids = {}
+
+    def set_task_ids(self, task_data: List[TaskData]) -> None:
+        # The ids come from the refresh's own export. Totals are only shown next to listed tasks
+        # and tracked time is written as annotations, so listed tasks are the only ones kept
+        task_ids = {task['uuid']: str(task['id']) for task in task_data if task.get('id')}
+        with self._lock:
+            self.totals = {task_uuid: seconds for task_uuid, seconds in self.totals.items()
+                           if task_uuid in task_ids or task_uuid == self.task_uuid}
+        self.task_ids = task_ids
+
+    def totals_by_id(self) -> Dict[str, float]:
+        return {self.task_ids[task_uuid]: seconds for task_uuid, seconds in self.totals.items()
+                if task_uuid in self.task_ids}
+
+
+def add_task_time_totals(task_list: List[str], tracker: TaskTimeTracker) -> List[str]:
+    totals_by_id = tracker.totals_by_id()
+    if not totals_by_id:
+        return task_list
+
+    return [_add_task_time_total(row, totals_by_id) for row in task_list]
+
+
+def _add_task_time_total(row: str, totals_by_id: Dict[str, float]) -> str:
+    task_id = next(iter(row.split()), '')
+    return f'{row} [{format_duration(totals_by_id[task_id])}]' if task_id in totals_by_id else row
+
+
+def format_duration(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds // 60), 60)
+    return f'{hours}h{minutes:02}m' if hours else f'{minutes}m'
@@ -0,0 +1,63 @@
+# Prints the running timer's countdown for status bars and shell prompts. It runs on every poll,
+# so it only imports what's already loaded at startup: not just_start (pydantic, toml...), json
+# (re) or even typing, whose names are only imported for mypy
+from __future__ import annotations
+
+import sys
+from os import getenv
+from os.path import expanduser, join
+from time import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional
+
+# Same path as just_start.constants.STATUS_FILE_PATH
+STATUS_FILE_PATH = join(getenv('XDG_DATA_HOME', expanduser(join('~', '.local', 'share'))),
+                        'just-start', 'status')
+DEFAULT_FORMAT = '{state}{phase} {time_left}'
+PHASE_NAMES = {'WORK': 'Work', 'SHORT_REST': 'Short break', 'LONG_REST': 'Long break'}
+
+
+def read_status(path: str = STATUS_FILE_PATH) -> Optional[Dict[str, str]]:
+    try:
+        with open(path, encoding='utf-8') as status_file:
+            lines = status_file.read().splitlines()
+    except OSError:
+        return None
+
+    status = {}  # type: Dict[str, str]
+    for line in lines:
+        key, _, value = line.partition('=')
+        status[key] = value
+    return status
+
+
+def format_status(status: Dict[str, str], format_: str = DEFAULT_FORMAT,
+                  now: Optional[float] = None) -> str:
+    end = status.get('end')
+    if end:
+        seconds_left = max(0., int(end) - (time() if now is None else now))
+    else:
+        seconds_left = float(status.get('seconds_left') or 0)
+
+    minutes, seconds = divmod(int(seconds_left), 60)
+    phase = status.get('phase', '')
+    return format_.format(
+        state='' if end else 'Paused - ',
+        phase=PHASE_NAMES.get(phase, phase),
+        time_left=f'{minutes:02d}:{seconds:02d}',
+        work_count=status.get('work_count', ''),
+        location=status.get('location', ''),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # Usage: just-start-status [format], e.g. '{phase} {time_left} at {location}'
+    args = sys.argv[1:] if argv is None else argv
+    status = read_status()
+    if status is None:
+        return 1
+
+    print(format_status(status, args[0]) if args else format_status(status))
+    return 0
@@ -0,0 +1,6 @@
+import sys
+
+from just_start_status import main
+
+
+sys.exit(main())
@@ -1,34 +1,55 @@
 from functools import partial
+from typing import List
 
-from urwid import LineBox, Columns, TOP, Filler, MainLoop
+from urwid import LineBox, Columns, MainLoop, Pile
 
 from just_start import just_start, notify
 from just_start_urwid.client import (
-    TopWidget, status, on_tasks_refresh, TaskListBox, write_status,
-    ActionHandler, FocusedTask, pomodoro_status, pomodoro_status_box, get_error_colors,
+    TopWidget, status_box, on_tasks_refresh, TaskListBox, write_status,
+    ActionHandler, FocusedTask, write_pomodoro_status, pomodoro_status_box, get_error_colors,
+    render_scheduler, countdown_display, task_details, task_details_box, on_task_data_refresh,
 )
+from just_start_urwid.countdown import CountdownDisplay
+from just_start_urwid.rows import ROW_PALETTE
 
 
 def client_notify(status: str):
     notify(status)
-    pomodoro_status.set_text(status)
+    write_pomodoro_status(status)
 
 
 def main():
     task_list_box = TaskListBox()
+    task_list_box.task_details = task_details
     refresh = partial(on_tasks_refresh, task_list_box)
-    with just_start(write_status, refresh, client_notify) as action_runner:
+    with just_start(write_status, refresh, client_notify,
+                    partial(on_task_data_refresh, task_list_box)) as action_runner:
         task_list_box.action_handler = ActionHandler(action_runner, FocusedTask(task_list_box))
         task_list_box = LineBox(task_list_box, title='Tasks')
-        status_box = LineBox(Filler(status, valign=TOP), title='App Status')
-        columns = Columns([('weight', 1.3, task_list_box), ('weight', 1, status_box)])
+        columns = Columns([('weight', 1.3, task_list_box),
+                           ('weight', 1, Pile([status_box, task_details_box]))])
 
-        MainLoop(
+        loop = MainLoop(
             TopWidget(columns, footer=pomodoro_status_box),
             palette=(
                 ('error', *get_error_colors()),
-            )
-        ).run()
+                *ROW_PALETTE,
+            ),
+            input_filter=partial(_on_input, countdown_display),
+        )
+        render_scheduler.attach(loop)
+        countdown_display.attach(loop, lambda: action_runner.countdown)
+        try:
+            loop.run()
+        finally:
+            countdown_display.detach()
+            render_scheduler.detach()
+            task_details.close()
+
+
+def _on_input(countdown_display_: CountdownDisplay, keys: List[str], _raw: List[int]) -> List[str]:
+    countdown_display_.on_input()
+    return keys
 
 
 if __name__ == '__main__':
@@ -1,21 +1,43 @@
 #!/usr/bin/env python3
+from concurrent.futures import Future
+from functools import partial
 from typing import List, Tuple, Any, Callable, Dict, Union, Optional
 
 from urwid import (
-    Text, ListBox, SimpleFocusListWalker, Edit, LineBox, Frame, Filler, TOP, ExitMainLoop,
+    Text, ListBox, SimpleFocusListWalker, Edit, LineBox, Frame, Filler, TOP, ExitMainLoop, Widget,
+    Pile, connect_signal,
 )
 
 from just_start import (
     get_client_config, NULLARY_ACTION_KEYS, UNARY_ACTION_KEYS, UNARY_ACTION_PROMPTS, JustStartError,
-    UserInputError, ActionRunner, Action,
+    UserInputError, ActionRunner, Action, TaskData,
 )
 from just_start import constants as const
+from just_start.bulk import BulkOperation
+from just_start_urwid.completion import TaskCompleter
+from just_start_urwid.countdown import CountdownDisplay
+from just_start_urwid.details import TaskDetails
+from just_start_urwid.render import RenderScheduler
+from just_start_urwid.rows import RowCache
+from just_start_urwid.sorting import TaskSorter
 
 
 IGNORED_KEYS_DURING_ACTION = ('up', 'down')
+COMPLETED_ACTIONS = (Action.ADD, Action.MODIFY, Action.BULK)
+# Kills the TaskWarrior or sudo commands that are still running, e.g. a hanging sync
+CANCEL_COMMANDS_KEY = 'ctrl x'
+COMMANDS_CANCELLED = 'Running commands cancelled'
+SORT_KEY = 'o'
+GROUP_KEY = 'g'
 
 pomodoro_status = Text('')
+pomodoro_countdown = Text('')
 status = Text('')
+render_scheduler = RenderScheduler()
+countdown_display = CountdownDisplay(pomodoro_countdown)
+task_details_text = Text('')
+task_details = TaskDetails(task_details_text, render_scheduler.schedule)
+task_completer = TaskCompleter()
 
 
 class ActionNotInProgress(Exception):
@@ -23,15 +45,19 @@ class ActionNotInProgress(Exception):
 
 
 class ActionHandler:
-    def __init__(self, action_runner: ActionRunner, focused_task: 'FocusedTask'):
+    def __init__(self, action_runner: ActionRunner, focused_task: 'FocusedTask',
+                 completer: Optional[TaskCompleter] = None):
         self.action = None  # type: Optional[Action]
-        self.prev_caption = None
         self.action_runner = action_runner
         self.focused_task = focused_task
+        self.completer = completer or task_completer
+        # Bulk operations are previewed and only run after they're confirmed
+        self.bulk_operation: Optional[BulkOperation] = None
 
         self.key_handlers = {
             'enter': self._run_unary_action_or_write_error,
             'esc': self._cancel_action,
+            'tab': self._complete,
             **{key: lambda: None for key in IGNORED_KEYS_DURING_ACTION}
         }
 
@@ -54,28 +80,57 @@ class ActionHandler:
             error(str(e))
 
     def _cancel_action(self):
-        self._clear_edit_text_and_action()
-        self.focused_task.set_caption(self.prev_caption)
+        self._stop_editing_and_clear_action()
+
+    def _complete(self):
+        if self.action not in COMPLETED_ACTIONS or self.bulk_operation is not None:
+            return
+
+        text, position, candidates = self.completer.complete(self.focused_task.edit_text,
+                                                             self.focused_task.edit_pos)
+        self.focused_task.edit_text = text
+        self.focused_task.edit_pos = position
+        if candidates:
+            write_status(' '.join(candidates))
 
     def _run_unary_action(self):
         user_input = self.focused_task.edit_text
+        if self.action is Action.BULK and self.bulk_operation is None:
+            self._preview_bulk_operation(user_input)
+            return
+
         try:
             if self.action is Action.MODIFY:
-                self.action_runner(self.action, self.focused_task.task_id, user_input)
+                self._run(self.action, self.focused_task.task_id, user_input)
+            elif self.action is Action.BULK:
+                self._confirm_bulk_operation(user_input)
             else:
-                try:
-                    self.action_runner(self.action, user_input)
-                except JustStartError as e:
-                    error(str(e))
+                self._run(self.action, user_input)
         finally:
-            if self.action in UNARY_ACTION_PROMPTS:
-                self.focused_task.set_caption(self.prev_caption)
+            self._stop_editing_and_clear_action()
+
+    def _preview_bulk_operation(self, command: str):
+        try:
+            self.bulk_operation = self.action_runner.preview_bulk(command)
+        except JustStartError:
+            self._stop_editing_and_clear_action()
+            raise
+
+        row, _, _ = self.focused_task.caption.rpartition('\n')
+        self.focused_task.set_caption(
+            f'{row}\n{self.bulk_operation.preview}\n{const.CONFIRM_PROMPT} ')
+        self.focused_task.edit_text = ''
 
-            self._clear_edit_text_and_action()
+    def _confirm_bulk_operation(self, answer: str):
+        if answer.strip().lower() in ('y', 'yes'):
+            self._run(Action.BULK, self.bulk_operation)
+        else:
+            write_status(const.INPUT_CANCELLED)
 
-    def _clear_edit_text_and_action(self):
+    def _stop_editing_and_clear_action(self):
         self.action = None
-        self.focused_task.edit_text = ''
+        self.bulk_operation = None
+        self.focused_task.stop_editing()
 
     def start_action(self, key: str):
         try:
@@ -92,17 +147,20 @@ class ActionHandler:
             except KeyError:
                 raise UserInputError(f'{const.INVALID_ACTION_KEY} "{key}"')
 
-            if action in (Action.DELETE, Action.COMPLETE):
-                self.action_runner(action, self.focused_task.task_id)
+            if action in (Action.DELETE, Action.COMPLETE, Action.TRACK_TASK):
+                self._run(action, self.focused_task.task_id)
             else:
                 prompt_message = UNARY_ACTION_PROMPTS[action]
                 self._set_caption_and_action(prompt_message, action)
         else:
-            self.action_runner(action)
+            self._run(action)
+
+    def _run(self, action: Action, *args):
+        # Actions finish on just-start's worker, so their errors are written when they're done
+        self.action_runner(action, *args).add_done_callback(_write_action_error)
 
     def _set_caption_and_action(self, caption: str, action: Action):
-        self.prev_caption = self.focused_task.caption
-        self.focused_task.set_caption(f'{self.prev_caption}\n{caption} ')
+        self.focused_task.start_editing(f'{self.focused_task.caption}\n{caption} ')
         self.action = action
 
 
@@ -111,23 +169,112 @@ class FocusedTask:
         super().__setattr__('task_list', task_list)
 
     def __getattr__(self, item: str):
-        return getattr(self.task_list.focus, item)
+        return getattr(self.task_list.focus.base_widget, item)
 
     def __setattr__(self, key: str, value: Any):
-        return setattr(self.task_list.focus, key, value)
+        return setattr(self.task_list.focus.base_widget, key, value)
+
+    def start_editing(self, caption: str):
+        self.task_list.start_editing(caption)
+
+    def stop_editing(self):
+        self.task_list.stop_editing()
 
 
 class TaskListBox(ListBox):
     def __init__(self):
-        body = SimpleFocusListWalker([])
-        super().__init__(body)
+        self.walker = SimpleFocusListWalker([])
+        super().__init__(self.walker)
         self.action_handler = None  # type: Optional[ActionHandler]
+        self.row_cache = RowCache()
+        self.task_details = None  # type: Optional[TaskDetails]
+        self.task_sorter = TaskSorter()
+        self._report_rows: List[Widget] = []
+        self._edited_row: Optional[Tuple[int, Widget]] = None
+        self._pending_task_list = None  # type: Optional[List[str]]
+        connect_signal(self.walker, 'modified', self._show_focused_task_details)
+
+    def set_task_rows(self, task_list_: List[str]):
+        # Refreshes wait until the edited row is done, so that its input isn't lost
+        if self._edited_row is not None:
+            self._pending_task_list = task_list_
+            return
+
+        focus_position = self.walker.focus or 0
+        self._report_rows = self.row_cache.get_widgets(task_list_)
+        self.walker[:] = self.task_sorter.arrange(self._report_rows)
+        if self.walker:
+            self.walker.set_focus(min(focus_position, len(self.walker) - 1))
+
+    def set_task_data(self, task_data: List[TaskData]):
+        # Runs on just-start's worker, the rows are rearranged by the render scheduler
+        if self.task_details is not None:
+            self.task_details.set_task_data(task_data)
+        self.task_sorter.set_task_data(task_data)
+        render_scheduler.schedule((self, 'arrange'), self.arrange_rows)
+
+    def arrange_rows(self):
+        # The same widgets are only reordered, and the focus stays on the same task
+        if self._edited_row is not None or not self.walker:
+            return
+
+        focused_row = self.walker[self.walker.focus or 0]
+        self.walker[:] = self.task_sorter.arrange(self._report_rows)
+        try:
+            self.walker.set_focus(self.walker.index(focused_row))
+        except ValueError:
+            self.walker.set_focus(0)
+
+    def start_editing(self, caption: str):
+        # Only the row being modified becomes an Edit, the rest stay read-only text
+        position = self.walker.focus
+        self._edited_row = position, self.walker[position]
+        self.walker[position] = TaskWidget(caption)
+
+    def stop_editing(self):
+        if self._edited_row is None:
+            return
+
+        position, row = self._edited_row
+        self._edited_row = None
+        self.walker[position] = row
+
+        pending_task_list, self._pending_task_list = self._pending_task_list, None
+        if pending_task_list is not None:
+            self.set_task_rows(pending_task_list)
+
+    def _sort_or_group(self, key: str):
+        if key == SORT_KEY:
+            write_status(f'Sorted by {self.task_sorter.next_order().value}')
+        else:
+            write_status('Grouped by project' if self.task_sorter.toggle_grouping()
+                         else 'Not grouped')
+        self.arrange_rows()
+
+    def _show_focused_task_details(self):
+        # The walker reports focus changes too, so the details follow j/k and the arrows
+        if self.task_details is None:
+            return
+
+        position = self.walker.focus
+        task_ids = [getattr(self.walker[position_].base_widget, 'task_id', None)
+                    for position_ in (position, position - 1, position + 1)
+                    if position_ is not None and 0 <= position_ < len(self.walker)]
+        focused_task_id = task_ids[0] if task_ids else None
+        self.task_details.show(focused_task_id, [id_ for id_ in task_ids[1:] if id_])
 
     def keypress(self, size: int, key: str):
         assert self.action_handler
 
         if key == 'q':
             raise ExitMainLoop()
+        if key == CANCEL_COMMANDS_KEY:
+            self.action_handler.action_runner.cancel_commands()
+            write_status(COMMANDS_CANCELLED)
+            return None
+        if key in (SORT_KEY, GROUP_KEY) and self.action_handler.action is None:
+            self._sort_or_group(key)
+            return None
         if key in ('down', 'j'):
             return super().keypress(size, 'down')
         if key in ('up', 'k'):
@@ -139,12 +286,25 @@ class TaskListBox(ListBox):
             self.action_handler.start_action(key)
 
 
+def _write_action_error(future: Future) -> None:
+    exception = future.exception()
+    if isinstance(exception, JustStartError):
+        error(str(exception))
+    elif exception is not None:
+        error(const.UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH)
+
+
 def error(status_: str):
     write_status(('error', status_))
 
 
 def write_status(status_: Union[str, Tuple[str, str]]) -> None:
-    status.set_text(status_)
+    render_scheduler.schedule(status, partial(status.set_text, status_))
+
+
+def write_pomodoro_status(status_: str) -> None:
+    render_scheduler.schedule(pomodoro_status, partial(pomodoro_status.set_text, status_))
+    render_scheduler.schedule(countdown_display, countdown_display.update)
 
 
 class TaskWidget(Edit):
@@ -162,13 +322,18 @@ class TaskWidget(Edit):
 
 
 def on_tasks_refresh(task_list: TaskListBox, task_list_: List[str]) -> None:
-    task_list.body = SimpleFocusListWalker([
-        TaskWidget(task) for task in task_list_[4:]
-    ])
+    render_scheduler.schedule(task_list, partial(task_list.set_task_rows, task_list_))
+
+
+def on_task_data_refresh(task_list: TaskListBox, task_data: List[TaskData]) -> None:
+    task_completer.set_task_data(task_data)
+    task_list.set_task_data(task_data)
 
 
 status_box = LineBox(Filler(status, valign=TOP), title='App Status')
-pomodoro_status_box = LineBox(pomodoro_status, title='Pomodoro Status')
+pomodoro_status_box = LineBox(Pile([pomodoro_status, pomodoro_countdown]),
+                              title='Pomodoro Status')
+task_details_box = LineBox(Filler(task_details_text, valign=TOP), title='Task Details')
 
 
 class TopWidget(Frame):
@@ -0,0 +1,104 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from just_start import TaskData
+
+
+MAX_CANDIDATES = 20
+DATE_ATTRIBUTES = ('due', 'scheduled', 'wait', 'until')
+DATE_KEYWORDS = ('now', 'today', 'yesterday', 'tomorrow', 'sod', 'eod', 'sow', 'eow', 'som',
+                 'eom', 'soy', 'eoy', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+                 'saturday', 'sunday', 'later', 'someday')
+MODIFIABLE_ATTRIBUTES = ('project', 'priority', 'depends', 'recur', *DATE_ATTRIBUTES)
+# Attributes TaskWarrior sets on its own, anything else found in the tasks is a UDA
+CORE_ATTRIBUTES = {'id', 'uuid', 'description', 'entry', 'modified', 'status', 'urgency', 'tags',
+                   'annotations', 'end', 'start', 'mask', 'imask', 'parent', 'rtype',
+                   *MODIFIABLE_ATTRIBUTES}
+
+# Marks the nodes where a word ends, it can't clash with a character
+_END = ''
+
+
+class PrefixTrie:
+    # Nodes are dicts keyed by character, so a lookup only walks the prefix and its completions
+    def __init__(self, words: Iterable[str] = ()):
+        self._root = {}  # type: Dict[str, Any]
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        node = self._root
+        for character in word:
+            node = node.setdefault(character, {})
+        node[_END] = True
+
+    def complete(self, prefix: str, limit: int = MAX_CANDIDATES) -> List[str]:
+        node = self._find(prefix)
+        completions = []  # type: List[str]
+        nodes = [(prefix, node)] if node is not None else []
+        while nodes and len(completions) < limit:
+            word, node = nodes.pop()
+            if _END in node:
+                completions.append(word)
+            nodes.extend((word + character, child)
+                         for character, child in sorted(node.items(), reverse=True)
+                         if character != _END)
+        return completions
+
+    def extend(self, prefix: str) -> str:
+        # As far as every completion agrees
+        node = self._find(prefix)
+        while node is not None and len(node) == 1 and _END not in node:
+            character, node = next(iter(node.items()))
+            prefix += character
+        return prefix
+
+    def _find(self, prefix: str) -> Optional[Dict[str, Any]]:
+        node = self._root
+        for character in prefix:
+            child = node.get(character)
+            if child is None:
+                return None
+            node = child
+        return node
+
+
+class TaskCompleter:
+    # The trie is rebuilt on just-start's worker at every refresh and replaced as a whole, so
+    # completing never waits for TaskWarrior
+    def __init__(self):
+        self._trie = PrefixTrie(_get_words([]))
+
+    def set_task_data(self, task_data: List[TaskData]) -> None:
+        self._trie = PrefixTrie(_get_words(task_data))
+
+    def complete(self, text: str, position: int) -> Tuple[str, int, List[str]]:
+        # Completes the word before the cursor, the candidates are returned when it's ambiguous
+        start = text.rfind(' ', 0, position) + 1
+        trie = self._trie
+        candidates = trie.complete(text[start:position])
+        if not candidates:
+            return text, position, []
+
+        completion = trie.extend(text[start:position])
+        if len(candidates) == 1:
+            # Attribute names are left open for their values
+            completion += '' if completion.endswith(':') else ' '
+            candidates = []
+        return (f'{text[:start]}{completion}{text[position:]}', start + len(completion),
+                candidates)
+
+
+def _get_words(task_data: List[TaskData]) -> Set[str]:
+    words = {f'{attribute}:' for attribute in MODIFIABLE_ATTRIBUTES}
+    words.update(f'{attribute}:{keyword}' for attribute in DATE_ATTRIBUTES
+                 for keyword in DATE_KEYWORDS)
+    for task in task_data:
+        project = task.get('project')
+        if project:
+            # Parent projects can be completed too
+            parts = project.split('.')
+            words.update(f'project:{".".join(parts[:length])}'
+                         for length in range(1, len(parts) + 1))
+        words.update(f'+{tag}' for tag in task.get('tags', ()))
+        words.update(f'{attribute}:' for attribute in task if attribute not in CORE_ATTRIBUTES)
+    return words
@@ -0,0 +1,72 @@
+from math import ceil
+from time import monotonic
+from typing import Any, Callable, Optional
+
+from urwid import MainLoop, Text
+
+from just_start.pomodoro import Countdown
+
+
+# Without input for this long the countdown only changes once per minute
+IDLE_SECONDS = 5 * 60
+
+
+class CountdownDisplay:
+    # A single alarm, aligned to the moment the shown value changes, keeps the countdown live
+    def __init__(self, text: Text, clock: Callable[[], float] = monotonic,
+                 idle_seconds: float = IDLE_SECONDS):
+        self.text = text
+        self.get_countdown: Optional[Callable[[], Countdown]] = None
+        self.clock = clock
+        self.idle_seconds = idle_seconds
+        self._loop: Optional[MainLoop] = None
+        self._alarm: Any = None
+        self._last_input = clock()
+
+    def attach(self, loop: MainLoop, get_countdown: Callable[[], Countdown]) -> None:
+        self._loop = loop
+        self.get_countdown = get_countdown
+        self.update()
+
+    def detach(self) -> None:
+        self._remove_alarm()
+        self._loop = self.get_countdown = None
+
+    def on_input(self) -> None:
+        was_idle = self.is_idle
+        self._last_input = self.clock()
+        if was_idle:
+            self.update()
+
+    @property
+    def is_idle(self) -> bool:
+        return self.clock() - self._last_input >= self.idle_seconds
+
+    def update(self) -> None:
+        self._remove_alarm()
+        if self.get_countdown is None:
+            return
+
+        countdown = self.get_countdown()
+        seconds_left = countdown.get_seconds_left(self.clock())
+        resolution = 60 if self.is_idle else 1
+        self.text.set_text(format_countdown(countdown, seconds_left, resolution))
+
+        if countdown.is_running and seconds_left > 0:
+            assert self._loop
+            delay = seconds_left % resolution or resolution
+            self._alarm = self._loop.set_alarm_in(delay, lambda *_: self.update())
+
+    def _remove_alarm(self) -> None:
+        if self._alarm is not None and self._loop is not None:
+            self._loop.remove_alarm(self._alarm)
+        self._alarm = None
+
+
+def format_countdown(countdown: Countdown, seconds_left: float, resolution: int = 1) -> str:
+    state = '' if countdown.is_running else 'Paused - '
+    if resolution == 60:
+        return f'{state}{countdown.phase.value}: {ceil(seconds_left / 60)} min left'
+
+    minutes, seconds = divmod(ceil(seconds_left), 60)
+    return f'{state}{countdown.phase.value}: {minutes:02d}:{seconds:02d} left'
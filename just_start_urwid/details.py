@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from urwid import Text
+
+from just_start import JustStartError, TaskData, logger
+from just_start.constants import UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH, UNHANDLED_ERROR
+from just_start.os_utils import run_task
+
+
+DETAILS_CACHE_SIZE = 64
+LOADING_DETAILS = 'Loading details...'
+
+# A task's uuid and modification time, edited tasks get a new key and are fetched again
+DetailsKey = Tuple[str, str]
+Schedule = Callable[[Hashable, Callable[[], None]], None]
+
+
+class TaskDetails:
+    # Details are fetched in the background and kept in a bounded LRU cache. The rows around the
+    # focused one are prefetched, so that moving through the list shows them right away
+    def __init__(self, text: Text, schedule: Schedule,
+                 fetch: Callable[[str], str] = lambda task_uuid: run_task(task_uuid, 'info'),
+                 cache_size: int = DETAILS_CACHE_SIZE):
+        self.text = text
+        self.schedule = schedule
+        self.fetch = fetch
+        self.cache_size = cache_size
+        self._keys: Dict[str, DetailsKey] = {}
+        self._cache = OrderedDict()  # type: OrderedDict[DetailsKey, str]
+        self._pending: Dict[DetailsKey, Future] = {}
+        self._focus = None, ()  # type: Tuple[Optional[str], Tuple[str, ...]]
+        self._focused_key = None  # type: Optional[DetailsKey]
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task-details')
+
+    def set_task_data(self, task_data: List[TaskData]) -> None:
+        keys = {str(task['id']): (task['uuid'], task.get('modified') or task['entry'])
+                for task in task_data if task.get('id')}  # type: Dict[str, DetailsKey]
+        with self._lock:
+            self._keys = keys
+        self.schedule(self, partial(self.show, *self._focus))
+
+    def show(self, task_id: Optional[str], neighbour_ids: Iterable[str] = ()) -> None:
+        neighbour_ids = tuple(neighbour_ids)
+        self._focus = task_id, neighbour_ids
+        with self._lock:
+            focused_key = self._keys.get(task_id) if task_id is not None else None
+            neighbour_keys = [self._keys[id_] for id_ in neighbour_ids if id_ in self._keys]
+            details = self._get_cached(focused_key) if focused_key is not None else None
+            self._focused_key = focused_key
+            self._cancel_fetches_except({focused_key, *neighbour_keys})
+
+        if focused_key is None:
+            self.text.set_text('')
+            return
+
+        self.text.set_text(LOADING_DETAILS if details is None else details)
+        for key in (focused_key, *neighbour_keys):
+            self._fetch(key)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_cached(self, key: DetailsKey) -> Optional[str]:
+        try:
+            self._cache.move_to_end(key)
+        except KeyError:
+            return None
+        return self._cache[key]
+
+    def _cancel_fetches_except(self, keys: Set[Optional[DetailsKey]]) -> None:
+        # Rows that were scrolled past aren't worth fetching anymore
+        for key, future in list(self._pending.items()):
+            if key not in keys and future.cancel():
+                del self._pending[key]
+
+    def _fetch(self, key: DetailsKey) -> None:
+        with self._lock:
+            if key in self._cache or key in self._pending:
+                return
+            future = self._executor.submit(self.fetch, key[0])
+            self._pending[key] = future
+        future.add_done_callback(partial(self._on_fetched, key))
+
+    def _on_fetched(self, key: DetailsKey, future: Future) -> None:
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is None:
+                details = future.result()
+                self._cache[key] = details
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            elif isinstance(error, JustStartError):
+                details = str(error)
+            else:
+                logger.error(UNHANDLED_ERROR, exc_info=error)
+                details = UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH
+            focused = key == self._focused_key
+
+        if focused:
+            self.schedule(self.text, partial(self.text.set_text, details))
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from os import write, close
+from threading import Lock
+from time import monotonic
+from typing import Callable, Hashable, Optional
+
+from urwid import MainLoop
+
+
+FRAME_SECONDS = 1 / 30
+
+Mutation = Callable[[], None]
+
+
+# Mutations are keyed by the widget they touch, so only the latest one per widget survives a burst
+class RenderScheduler:
+    def __init__(self, frame_seconds: float = FRAME_SECONDS):
+        self.frame_seconds = frame_seconds
+        self._mutations = OrderedDict()  # type: OrderedDict[Hashable, Mutation]
+        self._lock = Lock()
+        self._loop: Optional[MainLoop] = None
+        self._pipe: Optional[int] = None
+        self._last_flush = 0.
+
+    def attach(self, loop: MainLoop) -> None:
+        self._loop = loop
+        self._pipe = loop.watch_pipe(self._on_wakeup)
+
+    def detach(self) -> None:
+        with self._lock:
+            pipe, self._pipe = self._pipe, None
+        if pipe is not None:
+            # The loop closes the read end with its watch, the write end is ours
+            assert self._loop
+            self._loop.remove_watch_pipe(pipe)
+            close(pipe)
+        self.flush()
+        self._loop = None
+
+    def schedule(self, key: Hashable, mutation: Mutation) -> None:
+        with self._lock:
+            if self._pipe is not None:
+                wake_up = not self._mutations
+                self._mutations[key] = mutation
+                if wake_up:
+                    write(self._pipe, b'.')
+                return
+
+        mutation()
+
+    def flush(self) -> None:
+        with self._lock:
+            mutations = list(self._mutations.values())
+            self._mutations.clear()
+
+        for mutation in mutations:
+            mutation()
+        self._last_flush = monotonic()
+
+    def _on_wakeup(self, _data: bytes) -> bool:
+        assert self._loop
+        delay = self._last_flush + self.frame_seconds - monotonic()
+        if delay > 0:
+            self._loop.set_alarm_in(delay, lambda *_: self.flush())
+        else:
+            self.flush()
+        return True
@@ -0,0 +1,128 @@
+import re
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from urwid import Text, AttrMap, Widget
+
+
+# Rows with at least this urgency get the matching attribute
+HIGH_URGENCY = 10.
+MEDIUM_URGENCY = 5.
+
+HEADER_LINES = 4
+ROW_ATTRIBUTES = ('urgency_high', 'urgency_medium', 'project', 'due', 'overdue', 'blocked')
+ROW_PALETTE = (
+    ('urgency_high', 'light red', ''),
+    ('urgency_medium', 'yellow', ''),
+    ('project', 'light blue', ''),
+    ('due', 'light green', ''),
+    ('overdue', 'light red,bold', ''),
+    ('blocked', 'dark gray', ''),
+    ('focus', 'standout', ''),
+)
+FOCUS_MAP: Dict[Hashable, Hashable] = {attribute: 'focus'
+                                       for attribute in (None, *ROW_ATTRIBUTES)}
+
+Columns = Dict[str, Tuple[int, int]]
+Markup = List[Union[str, Tuple[str, str]]]
+
+
+class TaskRow(Text):
+    # Task rows are read-only, they're only selectable so that the list can focus them
+    _selectable = True
+
+    def __init__(self, row: str, columns: Columns):
+        super().__init__(get_row_markup(row, columns))
+        self.caption = row
+        self.task_id = _get_task_id(row)
+
+    def keypress(self, size: Tuple[int, ...], key: str) -> str:
+        return key
+
+
+class RowCache:
+    # Unchanged rows keep their widgets between refreshes, so urwid reuses their cached canvases
+    def __init__(self):
+        self._widgets = {}  # type: Dict[Tuple[str, str], Widget]
+
+    def get_widgets(self, task_list: List[str]) -> List[Widget]:
+        header, underline = _find_header(task_list[:HEADER_LINES])
+        columns = parse_columns(header, underline)
+
+        previous_widgets, self._widgets = self._widgets, {}
+        widgets = []
+        for row in task_list[HEADER_LINES:]:
+            key = row, underline
+            widget = previous_widgets.pop(key, None)
+            if widget is None:
+                widget = AttrMap(TaskRow(row, columns), None, FOCUS_MAP)
+            self._widgets.setdefault(key, widget)
+            widgets.append(widget)
+        return widgets
+
+
+def parse_columns(header: str, underline: str) -> Columns:
+    # TaskWarrior underlines every column label with dashes when colours are off
+    return {header[match.start():match.end()].strip(): (match.start(), match.end())
+            for match in re.finditer(r'-+', underline)}
+
+
+def get_row_markup(row: str, columns: Columns) -> Markup:
+    if _get_task_id(row) is None:
+        return [row]
+
+    row_attribute = 'blocked' if _get_cell(row, columns, 'Deps') else _get_urgency_attribute(
+        _get_cell(row, columns, 'Urg'))
+    cell_attributes = {}  # type: Dict[Tuple[int, int], str]
+    if _get_cell(row, columns, 'Project'):
+        cell_attributes[columns['Project']] = 'project'
+    due = _get_cell(row, columns, 'Due')
+    if due:
+        cell_attributes[columns['Due']] = 'overdue' if due.startswith('-') else 'due'
+
+    markup = []  # type: Markup
+    position = 0
+    for (start, end), attribute in sorted(cell_attributes.items()):
+        markup.extend(_apply_attribute(row_attribute, row[position:start]))
+        markup.append((attribute, row[start:end]))
+        position = end
+    markup.extend(_apply_attribute(row_attribute, row[position:]))
+    return markup
+
+
+def _find_header(lines: List[str]) -> Tuple[str, str]:
+    for header, underline in zip(lines, lines[1:]):
+        if underline.strip() and set(underline) <= {'-', ' '}:
+            return header, underline
+    return '', ''
+
+
+def _get_cell(row: str, columns: Columns, name: str) -> str:
+    try:
+        start, end = columns[name]
+    except KeyError:
+        return ''
+    return row[start:end].strip()
+
+
+def _get_task_id(row: str) -> Optional[str]:
+    fields = row.split(maxsplit=1)
+    return fields[0] if fields and fields[0].isdigit() else None
+
+
+def _get_urgency_attribute(urgency: str) -> Optional[str]:
+    try:
+        value = float(urgency)
+    except ValueError:
+        return None
+
+    if value >= HIGH_URGENCY:
+        return 'urgency_high'
+    if value >= MEDIUM_URGENCY:
+        return 'urgency_medium'
+    return None
+
+
+def _apply_attribute(attribute: Optional[str], text: str) -> Markup:
+    if not text:
+        return []
+    return [(attribute, text)] if attribute else [text]
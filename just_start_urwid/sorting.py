@@ -0,0 +1,105 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from urwid import AttrMap, Text, Widget
+
+from just_start import TaskData
+
+
+class SortOrder(Enum):
+    REPORT = 'report'
+    URGENCY = 'urgency'
+    DUE = 'due'
+    PROJECT = 'project'
+    ENTRY = 'entry'
+
+
+NO_PROJECT = 'No project'
+SortKey = Tuple[Any, ...]
+NO_PROJECT_KEY = (True, '')  # type: SortKey
+
+
+def _get_sort_keys(task: TaskData) -> Dict[SortOrder, SortKey]:
+    # TaskWarrior's dates (20240101T000000Z) sort like their timestamps, tasks without a due date
+    # or project go last
+    project = task.get('project')
+    due = task.get('due')
+    return {
+        SortOrder.URGENCY: (-task.get('urgency', 0.),),
+        SortOrder.DUE: (due is None, due or ''),
+        SortOrder.PROJECT: (project is None, project or ''),
+        SortOrder.ENTRY: (task.get('entry', ''),),
+    }
+
+
+class TaskSorter:
+    # Sort keys are computed once per refresh, so sorting and grouping only reorder the existing
+    # row widgets
+    def __init__(self):
+        self.order = SortOrder.REPORT
+        self.grouped = False
+        self._keys = {}  # type: Dict[str, Dict[SortOrder, SortKey]]
+        self._group_headers = {}  # type: Dict[Optional[str], Widget]
+
+    def set_task_data(self, task_data: List[TaskData]) -> None:
+        self._keys = {str(task['id']): _get_sort_keys(task) for task in task_data
+                      if task.get('id')}
+
+    def next_order(self) -> SortOrder:
+        orders = list(SortOrder)
+        self.order = orders[(orders.index(self.order) + 1) % len(orders)]
+        return self.order
+
+    def toggle_grouping(self) -> bool:
+        self.grouped = not self.grouped
+        return self.grouped
+
+    def arrange(self, widgets: List[Widget]) -> List[Widget]:
+        task_positions = [position for position, widget in enumerate(widgets)
+                          if _get_task_id(widget) is not None]
+        if not task_positions or (self.order is SortOrder.REPORT and not self.grouped):
+            return widgets
+
+        first, last = task_positions[0], task_positions[-1] + 1
+        task_widgets = widgets[first:last]
+        # The report's position breaks ties
+        positions = sorted(range(len(task_widgets)),
+                           key=lambda position: self._get_key(task_widgets[position], position))
+        task_widgets = [task_widgets[position] for position in positions]
+        if self.grouped:
+            task_widgets = self._add_group_headers(task_widgets)
+        return [*widgets[:first], *task_widgets, *widgets[last:]]
+
+    def _get_key(self, widget: Widget, position: int) -> SortKey:
+        # Tasks without data (added after the last refresh) go after the sorted ones
+        task_keys = self._keys.get(_get_task_id(widget) or '')
+        if task_keys is None:
+            return (*(NO_PROJECT_KEY if self.grouped else ()), True, position)
+
+        group_key = task_keys[SortOrder.PROJECT] if self.grouped else ()
+        order_key = task_keys[self.order] if self.order is not SortOrder.REPORT else ()
+        return (*group_key, False, *order_key, position)
+
+    def _add_group_headers(self, task_widgets: List[Widget]) -> List[Widget]:
+        grouped_widgets = []  # type: List[Widget]
+        current_project = None  # type: Optional[SortKey]
+        for widget in task_widgets:
+            project_key = self._keys.get(_get_task_id(widget) or '', {}).get(
+                SortOrder.PROJECT, NO_PROJECT_KEY)
+            if project_key != current_project:
+                current_project = project_key
+                grouped_widgets.append(self._get_group_header(project_key[1] or None))
+            grouped_widgets.append(widget)
+        return grouped_widgets
+
+    def _get_group_header(self, project: Optional[str]) -> Widget:
+        try:
+            return self._group_headers[project]
+        except KeyError:
+            header = self._group_headers[project] = AttrMap(Text(project or NO_PROJECT),
+                                                            'project')
+            return header
+
+
+def _get_task_id(widget: Widget) -> Optional[str]:
+    return getattr(widget.base_widget, 'task_id', None)
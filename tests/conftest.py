@@ -1,9 +1,12 @@
-from subprocess import CompletedProcess
+from functools import partial
 from unittest.mock import patch
 
 from pytest import fixture
 
+from just_start.action_profiler import action_profiler
 from just_start.logging import file_handler, logger
+from just_start.status_file import StatusFile
+from just_start.task_cache import TaskCache
 
 
 @fixture(scope='session', autouse=True)
@@ -11,11 +14,39 @@ def remove_file_handler_from_log():
     logger.removeHandler(file_handler)
 
 
+class PopenMock:
+    def __init__(self, args, **__):
+        self.args = args
+        self.pid = 0
+        self.returncode = 0
+
+    def communicate(self, **__):
+        return b'', None
+
+
 @fixture(scope='session', autouse=True)
 def mock_os_commands():
-    def run_mock(*args, **__):
-        return CompletedProcess(args, stdout=b'', returncode=0)
-
-    with patch('just_start.os_utils.run', run_mock), \
+    with patch('just_start.os_utils.Popen', PopenMock), \
             patch('just_start.os_utils.spawn', autospec=True):
         yield
+
+
+@fixture(autouse=True)
+def isolate_just_start(tmp_path):
+    # Task snapshots, the timer's state, action profiles and the hosts file's staging and blocklist
+    # caches go to tmp_path, and the real TaskWarrior data isn't watched
+    task_cache = partial(TaskCache, str(tmp_path / 'tasks_snapshots'))
+    status_file = partial(StatusFile, str(tmp_path / 'status'))
+    with patch('just_start._just_start.TaskCache', task_cache), \
+            patch('just_start._just_start_async.TaskCache', task_cache), \
+            patch('just_start._just_start.StatusFile', status_file), \
+            patch('just_start._just_start_async.StatusFile', status_file), \
+            patch('just_start._just_start.TaskWatcher', autospec=True), \
+            patch('just_start._just_start.db', {}), \
+            patch('just_start._just_start_async.db', {}), \
+            patch('just_start.site_blocking.HOSTS_STAGING_PATH', str(tmp_path / 'hosts')), \
+            patch('just_start.site_blocking.BLOCKLIST_CACHE_PATH',
+                  str(tmp_path / 'blocklist_cache')), \
+            patch.multiple(action_profiler, directory=str(tmp_path / 'action_profiles'),
+                           enabled=False):
+        yield
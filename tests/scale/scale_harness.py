@@ -0,0 +1,178 @@
+# Measures how the core and both clients grow with the number of tasks, run it with
+# python tests/scale/scale_harness.py [--sizes 1000 10000 100000]
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from math import log
+from os import environ, pathsep
+from os.path import abspath, dirname, join
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from unittest.mock import patch
+
+from just_start.client_example import diff_task_lists
+from just_start.os_utils import get_task_list, get_task_data, TaskData
+from just_start_urwid.client import TaskListBox
+from just_start_urwid.rows import HEADER_LINES
+from just_start_urwid.sorting import SortOrder
+
+
+SCALE_DIR = dirname(abspath(__file__))
+TASKS_ENV = 'JUST_START_SCALE_TASKS'
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Growth is flagged when doubling the tasks more than doubles time or memory by this exponent
+SUPERLINEAR_EXPONENT = 1.3
+
+PROJECTS = [None, *(f'project{number}' for number in range(20))]
+TAGS = [f'tag{number}' for number in range(10)]
+WORDS = 'write review fix call plan read clean buy send test deploy update'.split()
+START = datetime(2024, 1, 1)
+
+
+class Measurement(NamedTuple):
+    target: str
+    size: int
+    seconds: float
+    peak_bytes: int
+
+
+def generate_tasks(size: int, seed: int = 0) -> List[TaskData]:
+    # Pending tasks, like an unfiltered export, with enough variety for every report column
+    random = Random(seed)
+    tasks = []  # type: List[TaskData]
+    for task_id in range(1, size + 1):
+        task = {
+            'id': task_id,
+            'uuid': f'{random.getrandbits(128):032x}',
+            'description': ' '.join(random.choices(WORDS, k=random.randint(2, 6))),
+            'entry': f'{START + timedelta(minutes=task_id):%Y%m%dT%H%M%SZ}',
+            'status': 'pending',
+            'urgency': round(random.uniform(0, 15), 2),
+        }  # type: TaskData
+        project = random.choice(PROJECTS)
+        if project is not None:
+            task['project'] = project
+        tags = random.sample(TAGS, random.randint(0, 3))
+        if tags:
+            task['tags'] = tags
+        if random.random() < .3:
+            task['due'] = f'{START + timedelta(days=random.randint(-10, 60)):%Y%m%dT%H%M%SZ}'
+        if tasks and random.random() < .1:
+            task['depends'] = [random.choice(tasks)['uuid']]
+        tasks.append(task)
+    return tasks
+
+
+@contextmanager
+def serving(tasks: List[TaskData]) -> Iterator[None]:
+    # The stand-in task script comes first in PATH, so the real commands reach it
+    with TemporaryDirectory() as directory:
+        tasks_path = join(directory, 'tasks.json')
+        with open(tasks_path, 'w', encoding='utf-8') as tasks_file:
+            json.dump(tasks, tasks_file)
+        with patch.dict(environ, {TASKS_ENV: tasks_path,
+                                  'PATH': f'{SCALE_DIR}{pathsep}{environ["PATH"]}'}):
+            yield
+
+
+def measure(target: str, size: int, f: Callable[[], object]) -> Measurement:
+    # Tracing slows everything down, so time and memory come from separate runs
+    start = perf_counter()
+    f()
+    seconds = perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        f()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(target, size, seconds, peak_bytes)
+
+
+def measure_size(size: int) -> List[Measurement]:
+    tasks = generate_tasks(size)
+    with serving(tasks):
+        task_list = get_task_list()
+        # The first task is completed, so the next refresh renumbers everything
+        refreshed_task_list = [*task_list[:HEADER_LINES], *task_list[HEADER_LINES + 1:]]
+    # Urgency grows with age, so a later refresh can change every row a little
+    with serving(_age_tasks(tasks)):
+        aged_task_list = get_task_list()
+    with serving(tasks):
+        return [
+            measure('core', size, lambda: (get_task_list(), get_task_data())),
+            measure('urwid', size, lambda: _show_urwid_tasks(task_list, refreshed_task_list,
+                                                             tasks)),
+            measure('terminal', size, lambda: diff_task_lists(task_list, refreshed_task_list)),
+            measure('modified', size, lambda: diff_task_lists(task_list, aged_task_list)),
+        ]
+
+
+def _age_tasks(tasks: List[TaskData]) -> List[TaskData]:
+    return [{**task, 'urgency': round(task['urgency'] + .5, 2)} for task in tasks]
+
+
+def _show_urwid_tasks(task_list: List[str], refreshed_task_list: List[str],
+                      tasks: List[TaskData]) -> None:
+    task_list_box = TaskListBox()
+    task_list_box.set_task_rows(task_list)
+    task_list_box.set_task_rows(refreshed_task_list)
+    task_list_box.task_sorter.set_task_data(tasks)
+    task_list_box.task_sorter.order = SortOrder.URGENCY
+    task_list_box.arrange_rows()
+
+
+def find_superlinear_growth(measurements: List[Measurement]) -> List[str]:
+    by_target = {}  # type: Dict[str, List[Measurement]]
+    for measurement in sorted(measurements, key=lambda measurement: measurement.size):
+        by_target.setdefault(measurement.target, []).append(measurement)
+
+    warnings = []
+    for target, target_measurements in by_target.items():
+        for smaller, larger in zip(target_measurements, target_measurements[1:]):
+            size_growth = log(larger.size / smaller.size)
+            for name in ('seconds', 'peak_bytes'):
+                exponent = _get_growth_exponent(getattr(smaller, name), getattr(larger, name),
+                                                size_growth)
+                if exponent is not None and exponent > SUPERLINEAR_EXPONENT:
+                    warnings.append(f'{target} {name} grows as n^{exponent:.2f} between'
+                                    f' {smaller.size} and {larger.size} tasks')
+    return warnings
+
+
+def _get_growth_exponent(smaller: float, larger: float, size_growth: float) -> Optional[float]:
+    if smaller <= 0 or larger <= 0 or size_growth <= 0:
+        return None
+    return log(larger / smaller) / size_growth
+
+
+def run(sizes: List[int]) -> List[Measurement]:
+    measurements = []  # type: List[Measurement]
+    for size in sizes:
+        measurements.extend(measure_size(size))
+    return measurements
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description='Measure time and peak memory against the number of tasks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='numbers of synthetic tasks, 1000 10000 100000 by default')
+    measurements = run(parser.parse_args(args).sizes)
+
+    print(f'{"target":10} {"tasks":>8} {"seconds":>9} {"peak MiB":>9}')
+    for measurement in measurements:
+        print(f'{measurement.target:10} {measurement.size:>8} {measurement.seconds:>9.3f}'
+              f' {measurement.peak_bytes / 2 ** 20:>9.1f}')
+    warnings = find_superlinear_growth(measurements)
+    for warning in warnings:
+        print(f'Super-linear growth: {warning}')
+    return 1 if warnings else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
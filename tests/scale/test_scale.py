@@ -0,0 +1,63 @@
+from subprocess import Popen
+from unittest.mock import patch
+
+from just_start.client_example import diff_task_lists
+from just_start.os_utils import get_task_list, get_task_data
+from just_start_urwid.rows import RowCache
+from scale_harness import (
+    generate_tasks, serving, run, find_superlinear_growth, Measurement, SUPERLINEAR_EXPONENT,
+)
+
+
+SIZES = [50, 200]
+
+
+def test_generated_tasks():
+    tasks = generate_tasks(100)
+
+    assert [task['id'] for task in tasks] == list(range(1, 101))
+    assert generate_tasks(100) == tasks
+    assert any('project' in task for task in tasks)
+    assert any('depends' in task for task in tasks)
+
+
+def test_stand_in_serves_tasks():
+    tasks = generate_tasks(10)
+    with serving(tasks), patch('just_start.os_utils.Popen', Popen):
+        task_list = get_task_list()
+        assert get_task_data() == tasks
+
+    widgets = RowCache().get_widgets(task_list)
+    assert [widget.base_widget.task_id for widget in widgets[:10]] == [str(number)
+                                                                       for number in range(1, 11)]
+
+
+def test_every_target_is_measured():
+    with patch('just_start.os_utils.Popen', Popen):
+        measurements = run(SIZES)
+
+    assert {(measurement.target, measurement.size) for measurement in measurements} == {
+        (target, size) for target in ('core', 'urwid', 'terminal', 'modified') for size in SIZES}
+    assert all(measurement.peak_bytes > 0 for measurement in measurements)
+
+
+def test_every_modified_row_is_diffed():
+    tasks = generate_tasks(100)
+    with serving(tasks), patch('just_start.os_utils.Popen', Popen):
+        task_list = get_task_list()
+    aged_tasks = [{**task, 'urgency': task['urgency'] + 1} for task in tasks]
+    with serving(aged_tasks), patch('just_start.os_utils.Popen', Popen):
+        aged_task_list = get_task_list()
+
+    diff = diff_task_lists(task_list, aged_task_list)
+    assert len(diff) == 100
+    assert all(row.startswith('~ ') for row in diff)
+
+
+def test_superlinear_growth_is_flagged():
+    seconds = 2 ** (2 * SUPERLINEAR_EXPONENT)
+    measurements = [Measurement('urwid', 100, 1., 100), Measurement('urwid', 200, seconds, 200)]
+
+    warnings = find_superlinear_growth(measurements)
+    assert len(warnings) == 1
+    assert warnings[0].startswith('urwid seconds')
@@ -0,0 +1,39 @@
+from pstats import Stats
+
+from pytest import fixture
+
+from just_start.constants import PROFILE_ACTIONS_ENV
+from just_start.action_profiler import ActionProfiler
+
+
+def profiled_function():
+    return sum(range(100))
+
+
+@fixture
+def action_profiler(tmp_path):
+    return ActionProfiler(str(tmp_path), enabled=True)
+
+
+def test_action_is_dumped(action_profiler, tmp_path):
+    assert action_profiler.wrap('add', profiled_function)() == 4950
+
+    profile_path, = tmp_path.glob('*-add.pstats')
+    functions = [function for _, _, function in Stats(str(profile_path)).stats]
+    assert 'profiled_function' in functions
+
+
+def test_nested_actions_share_a_profile(action_profiler, tmp_path):
+    with action_profiler.profiling('sync'):
+        action_profiler.wrap('refresh_tasks', profiled_function)()
+
+    assert [path.name.split('-')[-1] for path in tmp_path.iterdir()] == ['sync.pstats']
+
+
+def test_disabled_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv(PROFILE_ACTIONS_ENV, raising=False)
+    action_profiler = ActionProfiler(str(tmp_path))
+    action_profiler.wrap('add', profiled_function)()
+
+    assert not list(tmp_path.iterdir())
+    assert action_profiler.toggle()
@@ -0,0 +1,81 @@
+from threading import Event
+
+from pytest import fixture, raises
+
+from just_start.action_queue import ActionQueue
+from just_start.os_utils import TaskWarriorError
+
+
+TIMEOUT = 5
+
+
+@fixture
+def refreshes():
+    return []
+
+
+@fixture
+def action_queue(refreshes):
+    action_queue = ActionQueue(lambda: refreshes.append('refresh'), refresh_window=0.05)
+    try:
+        yield action_queue
+    finally:
+        action_queue.close()
+
+
+def test_actions_run_in_order(action_queue):
+    calls = []
+    futures = [action_queue.submit(calls.append, number) for number in range(20)]
+
+    for future in futures:
+        future.result(TIMEOUT)
+    assert list(range(20)) == calls
+
+
+def test_action_result(action_queue):
+    assert 'output' == action_queue.submit(lambda: 'output').result(TIMEOUT)
+
+
+def test_action_error(action_queue):
+    def fail():
+        raise TaskWarriorError('error')
+
+    with raises(TaskWarriorError):
+        action_queue.submit(fail).result(TIMEOUT)
+    assert 'next' == action_queue.submit(lambda: 'next').result(TIMEOUT)
+
+
+def test_refresh_requests_are_coalesced(action_queue, refreshes):
+    release = Event()
+    action_queue.submit(release.wait, TIMEOUT)
+    futures = [action_queue.request_refresh() for _ in range(10)]
+    release.set()
+
+    for future in futures:
+        future.result(TIMEOUT)
+    assert ['refresh'] == refreshes
+
+
+def test_refresh_runs_after_window(action_queue, refreshes):
+    action_queue.request_refresh().result(TIMEOUT)
+    action_queue.request_refresh().result(TIMEOUT)
+
+    assert ['refresh', 'refresh'] == refreshes
+
+
+def test_refresh_error(mocker):
+    action_queue = ActionQueue(mocker.Mock(side_effect=TaskWarriorError('error')), 0)
+    try:
+        with raises(TaskWarriorError):
+            action_queue.request_refresh().result(TIMEOUT)
+    finally:
+        action_queue.close()
+
+
+def test_close_runs_pending_refresh(refreshes):
+    action_queue = ActionQueue(lambda: refreshes.append('refresh'), refresh_window=TIMEOUT)
+    future = action_queue.request_refresh()
+    action_queue.close()
+
+    assert future.done()
+    assert ['refresh'] == refreshes
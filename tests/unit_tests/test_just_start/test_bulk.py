@@ -0,0 +1,60 @@
+from pytest import raises, mark
+
+from just_start import UserInputError
+from just_start.bulk import prepare_bulk_operation, match_tasks, PREVIEWED_TASKS
+
+
+TASK_DATA = [
+    {'id': 1, 'uuid': 'aaaaaaaa-1111', 'description': 'write report', 'project': 'work',
+     'tags': ['office']},
+    {'id': 2, 'uuid': 'bbbbbbbb-2222', 'description': 'call mum', 'project': 'home'},
+    {'id': 3, 'uuid': 'cccccccc-3333', 'description': 'review report',
+     'project': 'work.reviews', 'priority': 'H'},
+    {'id': 4, 'uuid': 'dddddddd-4444', 'description': 'buy milk', 'tags': ['errand']},
+]
+
+
+def get_ids(filter_):
+    return [task['id'] for task in match_tasks(filter_.split(), TASK_DATA)]
+
+
+@mark.parametrize('filter_, ids', [
+    ('1,3-4', [1, 3, 4]),
+    ('bbbbbbbb', [2]),
+    ('project:work', [1, 3]),
+    ('project:', [4]),
+    ('+office', [1]),
+    ('-office', [2, 3, 4]),
+    ('priority:H', [3]),
+    ('report', [1, 3]),
+    ('1 2 project:work', [1]),
+])
+def test_match_tasks(filter_, ids):
+    assert get_ids(filter_) == ids
+
+
+@mark.parametrize('filter_', ['due.before:today', 'due:tomorrow', '( project:work', 'or'])
+def test_unsupported_filters_are_rejected(filter_):
+    with raises(UserInputError):
+        get_ids(filter_)
+
+
+def test_prepare_modify():
+    bulk_operation = prepare_bulk_operation('project:work modify +later', TASK_DATA)
+
+    assert bulk_operation.verb == 'modify'
+    assert bulk_operation.modifications == ['+later']
+    assert bulk_operation.preview == '2 tasks will be modified: 1 write report, 3 review report'
+
+
+def test_long_previews_are_truncated():
+    bulk_operation = prepare_bulk_operation('-none done', TASK_DATA * 2)
+    assert bulk_operation.preview.endswith(', ...')
+    assert bulk_operation.preview.count(',') == PREVIEWED_TASKS
+
+
+@mark.parametrize('command', ['project:work', 'done', 'project:work done +later',
+                              'project:work modify', 'project:garden delete'])
+def test_invalid_commands(command):
+    with raises(UserInputError):
+        prepare_bulk_operation(command, TASK_DATA)
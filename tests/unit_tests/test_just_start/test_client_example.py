@@ -1,21 +1,33 @@
+from concurrent.futures import Future
+from io import StringIO
+from os import pipe, write, close
 from unittest.mock import patch
-from pytest import mark, fixture
+from pytest import mark, fixture, raises
 
-from just_start.client_example import main as client_main, read_keys
-from just_start.constants import INVALID_ACTION_KEY
+from just_start.client_example import (
+    main as client_main, read_keys, TaskListPrinter, TASK_LIST_UNCHANGED, FULL_LIST_KEY, Terminal,
+    CLEAR_LINE, confirm_bulk_operation,
+)
+from just_start.constants import INVALID_ACTION_KEY, INPUT_CANCELLED
+from just_start.os_utils import UserInputError
 
 
 @fixture
 def mock_action_runner():
-    return lambda *_: None
+    def run_action(*_):
+        future = Future()
+        future.set_result(None)
+        return future
+
+    return run_action
 
 
 @fixture
 def main_sysout(mocker, capsys, request, mock_action_runner):
-    keypresses = request.param['keypresses']
-    side_effect = *keypresses, 'q'
+    keypresses = iter([*request.param['keypresses'], 'q'])
 
-    mocker.patch('just_start.client_example.prompt', side_effect=side_effect)
+    for reader in ('read_key', 'prompt'):
+        mocker.patch(f'just_start.client_example.{reader}', lambda _: next(keypresses))
     for var in ('GREEN', 'BLUE', 'RED', 'RESTORE_COLOR'):
         mocker.patch(f'just_start.client_example.{var}', '')
 
@@ -34,6 +46,8 @@ def simulate_keypresses(*args):
         ('m', 'task data', '1',),
         ('!', 'task',),
         ('!', 'command',),
+        ('t', '1',),
+        ('w', 'work',),
         ('h',),
         ('p',),
         ('p', 'p',),
@@ -44,9 +58,24 @@ def test_right_action(main_sysout):
     assert_no_sysout_errors_except(main_sysout)
 
 
-@mark.parametrize('main_sysout', simulate_keypresses('w'), indirect=True)
+@mark.parametrize('main_sysout', simulate_keypresses('z'), indirect=True)
 def test_wrong_action(main_sysout):
-    assert_no_sysout_errors_except(main_sysout, f'{INVALID_ACTION_KEY} "w"')
+    assert_no_sysout_errors_except(main_sysout, f'{INVALID_ACTION_KEY} "z"')
+
+
+@mark.parametrize('key', ['y', 'n'])
+def test_bulk_operation_needs_confirmation(key, mocker):
+    action_runner = mocker.Mock()
+    read_key = mocker.patch('just_start.client_example.read_key', return_value=key)
+
+    if key == 'y':
+        assert confirm_bulk_operation(action_runner, '1 done') is (
+            action_runner.preview_bulk.return_value)
+    else:
+        with raises(UserInputError, match=INPUT_CANCELLED):
+            confirm_bulk_operation(action_runner, '1 done')
+    action_runner.preview_bulk.assert_called_once_with('1 done')
+    assert read_key.call_args[0][0].startswith(str(action_runner.preview_bulk().preview))
 
 
 def test_main(mocker):
@@ -63,3 +92,107 @@ def assert_no_sysout_errors_except(sysout, *expected_errors):
 
 def raise_keyboard_interrupt(*_, **__):
     raise KeyboardInterrupt
+
+
+class TestTaskListPrinter:
+    def test_first_refresh_prints_full_list(self, capsys):
+        TaskListPrinter()(['ID Description', '1 first'])
+        assert capsys.readouterr()[0] == 'ID Description\n1 first\n'
+
+    def test_later_refresh_prints_diff(self, capsys):
+        printer = TaskListPrinter()
+        printer(['1 first', '2 second', '3 third'])
+        capsys.readouterr()
+
+        printer(['1 first', '2 second changed', '4 fourth'])
+        assert capsys.readouterr()[0].split('\n')[1:-1] == [
+            '+ 4 fourth', '- 3 third', '~ 2 second changed',
+        ]
+
+    def test_renumbered_rows_are_unchanged(self, capsys):
+        printer = TaskListPrinter()
+        printer(['1 write report', '2 buy milk', '3 call bob'])
+        capsys.readouterr()
+
+        printer(['1 buy milk', '2 call bob'])
+        assert capsys.readouterr()[0].split('\n')[1:-1] == ['- 1 write report']
+
+    def test_renumbered_row_modified(self, capsys):
+        printer = TaskListPrinter()
+        printer([' 9 write report', '10 buy milk'])
+        capsys.readouterr()
+
+        printer(['9 buy more milk'])
+        assert capsys.readouterr()[0].split('\n')[1:-1] == [
+            '-  9 write report', '~ 9 buy more milk',
+        ]
+
+    def test_moved_rows_are_unchanged(self, capsys):
+        printer = TaskListPrinter()
+        printer(['1 write report', '2 buy milk', '3 call bob'])
+        capsys.readouterr()
+
+        printer(['1 call bob', '2 write report', '3 buy oat milk'])
+        assert capsys.readouterr()[0].split('\n')[1:-1] == ['~ 3 buy oat milk']
+
+    def test_unchanged_refresh(self, capsys):
+        printer = TaskListPrinter()
+        printer(['1 first', '', '1 task'])
+        printer(['1 first', '', '1 task'])
+        assert capsys.readouterr()[0].endswith(f'{TASK_LIST_UNCHANGED}\n')
+
+    def test_print_full_list(self, capsys):
+        printer = TaskListPrinter()
+        printer(['1 first'])
+        printer(['1 first', '2 second'])
+        capsys.readouterr()
+
+        printer.print_full_list()
+        assert capsys.readouterr()[0] == '1 first\n2 second\n'
+
+
+@mark.parametrize('main_sysout', simulate_keypresses((FULL_LIST_KEY,)), indirect=True)
+def test_full_list_key(main_sysout):
+    assert_no_sysout_errors_except(main_sysout)
+
+
+class TestTerminal:
+    @fixture
+    def keys(self):
+        read_fd, write_fd = pipe()
+        yield read_fd, write_fd
+        close(read_fd)
+        close(write_fd)
+
+    @fixture
+    def terminal(self, keys):
+        return Terminal(keys[0], StringIO())
+
+    def test_read_key(self, terminal, keys):
+        write(keys[1], b'a')
+        assert terminal.read_key('Action') == 'a'
+        assert terminal.output.getvalue() == f'Action: {CLEAR_LINE}'
+
+    def test_escape_sequences_are_one_key(self, terminal, keys):
+        write(keys[1], b'\x1b[A')
+        assert terminal.read_key('Action') == '\x1b'
+
+    def test_read_line_with_backspace(self, terminal, keys):
+        write(keys[1], b'tasl\x7fk\r')
+        assert terminal.read_line('Data') == 'task'
+
+    def test_escape_cancels_line(self, terminal, keys):
+        write(keys[1], b'ta\x1b')
+        with raises(UserInputError, match=INPUT_CANCELLED):
+            terminal.read_line('Data')
+
+    def test_output_redraws_prompt(self, terminal):
+        terminal._show_prompt('Data: ')
+        terminal._typed = 'ta'
+        terminal.write('Pomodoro status')
+
+        assert terminal.output.getvalue().endswith(f'{CLEAR_LINE}Pomodoro status\nData: ta')
+
+    def test_raw_mode_without_terminal(self, terminal):
+        with terminal.raw_mode():
+            pass
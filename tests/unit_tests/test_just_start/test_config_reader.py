@@ -1,12 +1,79 @@
+from os import stat
+from stat import S_IMODE
 from unittest.mock import patch
 
-from just_start.config_reader import get_general_config, get_client_config
+from pytest import fixture
+
+# noinspection PyProtectedMember
+from just_start.config_reader import get_general_config, get_client_config, _Config
 
 
 def test_get_config_without_file():
-    with patch('just_start.config_reader.load', side_effect=FileNotFoundError()):
+    with patch('just_start.config_reader.loads', side_effect=FileNotFoundError()):
         assert get_general_config()
 
 
 def test_client_config():
     assert not get_client_config('unconfigured_client')
+
+
+@fixture
+def config_path(tmp_path):
+    path = tmp_path / 'preferences.toml'
+    path.write_text('[pomodoro]\npomodoro_length = 30\n')
+    return path
+
+
+@fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache' / 'config_cache')
+
+
+class TestConfigCache:
+    def test_cached_config_skips_validation(self, config_path, cache_path):
+        assert _Config(str(config_path), cache_path).pomodoro.pomodoro_length == 30
+
+        with patch('just_start.config_reader.loads') as loads:
+            config = _Config(str(config_path), cache_path)
+            assert config.pomodoro.pomodoro_length == 30
+            loads.assert_not_called()
+
+    def test_cache_is_private(self, config_path, cache_path):
+        _Config(str(config_path), cache_path).read_config
+        assert S_IMODE(stat(cache_path).st_mode) == 0o600
+
+    def test_changed_file_is_revalidated(self, config_path, cache_path):
+        _Config(str(config_path), cache_path).read_config
+        config_path.write_text('[pomodoro]\npomodoro_length = 45\n')
+
+        assert _Config(str(config_path), cache_path).pomodoro.pomodoro_length == 45
+
+    def test_corrupt_cache_is_revalidated(self, config_path, cache_path):
+        _Config(str(config_path), cache_path).read_config
+        with open(cache_path, 'wb') as cache_file:
+            cache_file.write(b'corrupt')
+
+        assert _Config(str(config_path), cache_path).pomodoro.pomodoro_length == 30
+
+
+class TestProfileOverride:
+    @fixture
+    def config(self, tmp_path, cache_path):
+        path = tmp_path / 'preferences.toml'
+        path.write_text('[pomodoro]\npomodoro_length = 30\n\n'
+                        '[[locations]]\nname = "work"\n'
+                        '[locations.activation]\nstart = "00:00"\nend = "00:00"\ndays = [1]\n'
+                        '[locations.pomodoro]\npomodoro_length = 60\n')
+        return _Config(str(path), cache_path)
+
+    def test_profile_names(self, config):
+        assert config.get_profile_names() == ['default', 'work']
+
+    def test_override_pins_location(self, config):
+        config.profile_override = 'work'
+        assert config.location_name == 'work'
+        assert config.pomodoro.pomodoro_length == 60
+
+    def test_default_override(self, config):
+        config.profile_override = 'default'
+        assert config.pomodoro.pomodoro_length == 30
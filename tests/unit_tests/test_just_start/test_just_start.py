@@ -1,6 +1,17 @@
+from threading import Event
+from unittest.mock import patch, Mock
+
+from pytest import mark
+
 import just_start.constants as const
+from just_start.action_queue import ActionQueue
+from just_start.os_utils import TaskWarriorError, CommandClass
 # noinspection PyProtectedMember
-from just_start._just_start import _handle_errors
+from just_start._just_start import _handle_errors, just_start, ActionRunner, Action
+
+
+JUST_START_MODULE = 'just_start._just_start'
+TASK_CACHE_MODULE = 'just_start.task_cache'
 
 
 def test_unhandled_error_message(capsys):
@@ -9,3 +20,101 @@ def test_unhandled_error_message(capsys):
         raise ex
 
     assert const.UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH in capsys.readouterr()[1]
+
+
+def test_warm_start_shows_snapshot_before_refresh():
+    refreshed = Event()
+    task_lists, statuses = [], []
+
+    def on_tasks_refresh(task_list):
+        task_lists.append(task_list)
+        if len(task_lists) == 2:
+            refreshed.set()
+
+    with patch(f'{TASK_CACHE_MODULE}.load_task_snapshot', return_value=['1 cached']), \
+            patch(f'{JUST_START_MODULE}.get_task_list', return_value=['1 fresh']), \
+            patch(f'{TASK_CACHE_MODULE}.save_task_snapshot') as save_task_snapshot:
+        with just_start(statuses.append, on_tasks_refresh, lambda _: None):
+            assert task_lists[0] == ['1 cached']
+            assert refreshed.wait(5)
+
+    assert task_lists == [['1 cached'], ['1 fresh']]
+    assert statuses[0] == const.STALE_TASKS
+    save_task_snapshot.assert_called_once()
+    assert save_task_snapshot.call_args[0][0] == ['1 fresh']
+
+
+def test_cold_start_refreshes_synchronously():
+    task_lists, task_data = [], []
+    fresh_task_data = [{'id': 1, 'uuid': 'uuid-1'}]
+    with patch(f'{TASK_CACHE_MODULE}.load_task_snapshot', return_value=None), \
+            patch(f'{JUST_START_MODULE}.get_task_list', return_value=['1 fresh']), \
+            patch(f'{JUST_START_MODULE}.get_task_data', return_value=fresh_task_data), \
+            patch(f'{TASK_CACHE_MODULE}.save_task_snapshot'):
+        with just_start(print, task_lists.append, lambda _: None, task_data.append):
+            assert task_lists == [['1 fresh']]
+            assert task_data == [fresh_task_data]
+
+
+def test_task_data_is_only_exported_for_a_preview_without_task_data_clients():
+    with patch(f'{TASK_CACHE_MODULE}.load_task_snapshot', return_value=None), \
+            patch(f'{JUST_START_MODULE}.get_task_list', return_value=['1 fresh']), \
+            patch(f'{JUST_START_MODULE}.get_task_data',
+                  return_value=[{'id': 1, 'uuid': 'uuid-1'}]) as get_task_data, \
+            patch(f'{TASK_CACHE_MODULE}.save_task_snapshot'):
+        with just_start(print, lambda _: None, lambda _: None) as action_runner:
+            get_task_data.assert_not_called()
+            assert action_runner.preview_bulk('1 done').tasks == [{'id': 1, 'uuid': 'uuid-1'}]
+            get_task_data.assert_called_once()
+
+
+@mark.parametrize('exception, status', [
+    (TaskWarriorError('task failed'), 'task failed'),
+    (RuntimeError('bug'), const.UNHANDLED_ERROR_MESSAGE_WITH_LOG_PATH),
+])
+def test_refresh_action_reports_errors(exception, status):
+    statuses = []
+    action_queue = ActionQueue(Mock(side_effect=exception), refresh_window=0)
+    action_runner = ActionRunner(Mock(), statuses.append, Mock(), action_queue)
+    try:
+        future = action_runner(Action.REFRESH_TASKS)
+        assert future.exception(5) is exception
+        # Done callbacks run after the future's waiters are woken up
+        action_queue.submit(lambda: None).result(5)
+    finally:
+        action_runner.close()
+
+    assert statuses == [status]
+
+
+def test_toggle_profiler_profiles_actions(tmp_path):
+    statuses = []
+    action_runner = ActionRunner(Mock(), statuses.append, Mock())
+    try:
+        action_runner(Action.TOGGLE_PROFILER).result(5)
+        action_runner(Action.SHOW_HELP).result(5)
+    finally:
+        action_runner.close()
+
+    assert statuses[1] == f'Profiling actions to {tmp_path / "action_profiles"}'
+    assert [path.name.split('-')[-1] for path in (tmp_path / 'action_profiles').iterdir()] == [
+        'show_help.pstats']
+
+
+def test_bulk_runs_one_command_on_the_previewed_tasks():
+    refreshes = []
+    action_queue = ActionQueue(lambda: refreshes.append(None), refresh_window=0)
+    action_runner = ActionRunner(Mock(), print, Mock(), action_queue)
+    action_runner.task_data = [{'id': 1, 'uuid': 'uuid-1', 'project': 'work'},
+                               {'id': 2, 'uuid': 'uuid-2', 'project': 'home'}]
+    try:
+        bulk_operation = action_runner.preview_bulk('project:work done')
+        with patch(f'{JUST_START_MODULE}.run_task', return_value='') as run_task:
+            action_runner(Action.BULK, bulk_operation).result(5)
+    finally:
+        # Pending refreshes run before the queue stops
+        action_runner.close()
+
+    run_task.assert_called_once_with(const.CONFIRMATION_OFF, const.RECURRENCE_OFF, 'uuid-1',
+                                     'done', command_class=CommandClass.WRITE)
+    assert len(refreshes) == 1
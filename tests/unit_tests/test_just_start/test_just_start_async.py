@@ -0,0 +1,108 @@
+from asyncio import run, sleep, gather, ensure_future
+from unittest.mock import patch
+
+from pytest import fixture
+
+from just_start import Action, just_start_async
+from just_start.os_utils import TASK_DATA_COMMAND
+
+
+ASYNC_MODULE = 'just_start._just_start_async'
+TASK_CACHE_MODULE = 'just_start.task_cache'
+
+
+@fixture
+def task_calls():
+    return []
+
+
+@fixture(autouse=True)
+def fake_task(task_calls):
+    running = []
+
+    async def run_task_async(*args, **_):
+        running.append(args)
+        task_calls.append((args, len(running)))
+        await sleep(0.05)
+        running.remove(args)
+        if 'export' in args:
+            return '[{"id": 1, "uuid": "uuid-1", "description": "task"}]'
+        return 'ID Description\n1  task' if not args else 'output'
+
+    with patch(f'{ASYNC_MODULE}.run_task_async', run_task_async), \
+            patch(f'{TASK_CACHE_MODULE}.load_task_snapshot', return_value=None), \
+            patch(f'{TASK_CACHE_MODULE}.save_task_snapshot'), \
+            patch(f'{ASYNC_MODULE}.block_sites'):
+        yield
+
+
+def run_with_action_runner(coroutine_function, task_lists=None):
+    async def main():
+        async with just_start_async(print, (task_lists if task_lists is not None
+                                            else []).append) as action_runner:
+            return await coroutine_function(action_runner)
+
+    return run(main())
+
+
+def test_cold_start_refreshes_before_entering():
+    task_lists = []
+    run_with_action_runner(lambda _: sleep(0), task_lists)
+    assert task_lists == [['ID Description', '1  task']]
+
+
+def test_writes_are_serialized(task_calls):
+    async def add_tasks(action_runner):
+        task_calls.clear()
+        await gather(action_runner(Action.ADD, 'first'), action_runner(Action.ADD, 'second'))
+
+    run_with_action_runner(add_tasks)
+    assert [concurrency for args, concurrency in task_calls if args] == [1, 1]
+
+
+def test_executor_writes_wait_for_the_write_lock():
+    writes = []
+
+    async def add_and_annotate(action_runner):
+        async def run_task_async(*args, **_):
+            await sleep(0.05)
+            writes.extend(arg for arg in args if arg == 'add')
+            return 'output'
+
+        with patch(f'{ASYNC_MODULE}.run_task_async', run_task_async):
+            add = ensure_future(action_runner(Action.ADD, 'first'))
+            await sleep(0)
+            await action_runner.submit_write(lambda: writes.append('annotate'))
+            await add
+
+    run_with_action_runner(add_and_annotate)
+    assert writes == ['add', 'annotate']
+
+
+def test_reads_run_concurrently(task_calls):
+    async def track_tasks(action_runner):
+        task_calls.clear()
+        await gather(action_runner(Action.TRACK_TASK, '1'), action_runner(Action.TRACK_TASK, '2'))
+        await action_runner(Action.STOP_TIMER)
+
+    run_with_action_runner(track_tasks)
+    assert [concurrency for _, concurrency in task_calls] == [1, 2]
+
+
+def test_refresh_requests_are_coalesced(task_calls):
+    async def refresh(action_runner):
+        task_calls.clear()
+        await gather(*(action_runner.refresh_tasks() for _ in range(5)))
+
+    run_with_action_runner(refresh)
+    assert [args for args, _ in task_calls] == [(), TASK_DATA_COMMAND]
+
+
+def test_timer_events():
+    async def toggle_timer(action_runner):
+        await action_runner(Action.TOGGLE_TIMER)
+        event = await action_runner.timer_events.__anext__()
+        await action_runner(Action.STOP_TIMER)
+        return event
+
+    assert 'Work' in run_with_action_runner(toggle_timer)
@@ -0,0 +1,49 @@
+import tracemalloc
+
+from pytest import fixture
+
+from just_start.constants import TRACE_MEMORY_ENV
+from just_start.memory_diagnostics import MemoryDiagnostics, get_rss, format_size
+
+
+@fixture
+def memory_diagnostics():
+    memory_diagnostics = MemoryDiagnostics(frames=1)
+    memory_diagnostics.start()
+    try:
+        yield memory_diagnostics
+    finally:
+        memory_diagnostics.stop()
+
+
+def test_growth_is_logged(memory_diagnostics, caplog):
+    memory_diagnostics.take_snapshot()
+    allocations = [f'row {number}' for number in range(10000)]
+    memory_diagnostics.take_snapshot()
+
+    assert memory_diagnostics.traced_delta > 0
+    assert 'test_memory_diagnostics.py' in caplog.text
+    assert allocations
+
+
+def test_report(memory_diagnostics):
+    memory_diagnostics.take_snapshot()
+    assert 'traced' in memory_diagnostics.report()
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv(TRACE_MEMORY_ENV, raising=False)
+    memory_diagnostics = MemoryDiagnostics()
+    memory_diagnostics.start()
+    memory_diagnostics.take_snapshot()
+
+    assert not tracemalloc.is_tracing()
+    assert TRACE_MEMORY_ENV in memory_diagnostics.report()
+
+
+def test_get_rss():
+    assert get_rss() > 0
+
+
+def test_format_size():
+    assert format_size(3 * 2 ** 19, signed=True) == '+1.5 MiB'
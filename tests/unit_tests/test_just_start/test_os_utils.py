@@ -1,9 +1,17 @@
 import shelve
-from subprocess import CompletedProcess
+from asyncio import run
+from os import environ
+from subprocess import CompletedProcess, Popen
+from threading import Timer, Thread
 from unittest.mock import patch
 
+from pexpect import TIMEOUT
+
 from just_start.config_reader import GeneralConfig
-from just_start.os_utils import run_task, TaskWarriorError, run_sudo, Db
+from just_start.os_utils import (
+    run_task, TaskWarriorError, run_sudo, Db, save_task_snapshot, load_task_snapshot,
+    CommandSupervisor, ActionError, run_task_async, format_command_stats, get_task_data,
+)
 from pytest import raises, fixture
 
 
@@ -31,6 +39,33 @@ def test_run_task_raises_error_after_command_failure(mocker):
         run_command.assert_called_once()
 
 
+def test_run_task_uses_taskrc_path(mocker, tmp_path):
+    taskrc = tmp_path / 'taskrc'
+    taskrc.touch()
+    mocker.patch('just_start.os_utils.get_general_config',
+                 return_value=GeneralConfig(taskrc_path=str(taskrc)))
+    process = CompletedProcess([], stdout=b'', returncode=0)
+    run_command = mocker.patch('just_start.os_utils.run_command', return_value=process)
+    run_task()
+    assert run_command.call_args[1]['env']['TASKRC'] == str(taskrc)
+
+
+def test_get_task_data(mocker):
+    export = b'[{"id": 1, "uuid": "uuid-1"}]'
+    run_command = mocker.patch('just_start.os_utils.run_command',
+                               return_value=CompletedProcess([], stdout=export, returncode=0))
+    assert get_task_data() == [{'id': 1, 'uuid': 'uuid-1'}]
+    assert 'export' in run_command.call_args[0]
+
+
+def test_run_task_keeps_taskrc_by_default(mocker):
+    mocker.patch('just_start.os_utils.get_general_config', return_value=GeneralConfig())
+    process = CompletedProcess([], stdout=b'', returncode=0)
+    run_command = mocker.patch('just_start.os_utils.run_command', return_value=process)
+    run_task()
+    assert run_command.call_args[1]['env'] is None
+
+
 def test_run_sudo():
     run_sudo('test_command', _get_config_with_password)
 
@@ -44,3 +79,89 @@ def test_run_sudo_handles_os_error(caplog):
 
 def _get_config_with_password():
     return GeneralConfig(password='password')
+
+
+def test_task_snapshot_round_trip(tmp_path):
+    snapshot_path = str(tmp_path / 'snapshot')
+    save_task_snapshot(['ID Description', '1 first'], snapshot_path)
+    assert load_task_snapshot(snapshot_path) == ['ID Description', '1 first']
+
+
+def test_missing_task_snapshot(tmp_path):
+    assert load_task_snapshot(str(tmp_path / 'missing')) is None
+
+
+class TestCommandSupervisor:
+    @fixture
+    def supervisor(self):
+        with patch('just_start.os_utils.Popen', Popen):
+            yield CommandSupervisor()
+
+    def test_run(self, supervisor):
+        completed_process = supervisor.run(['echo', 'output'], 5, ActionError)
+        assert completed_process.stdout == b'output\n'
+        assert completed_process.returncode == 0
+
+    def test_timeout_kills_process_group(self, supervisor):
+        with raises(TaskWarriorError, match='timed out'):
+            supervisor.run(['sh', '-c', 'sleep 10 & sleep 10'], 0.2, TaskWarriorError)
+        assert supervisor.stats == {'timeouts': 1, 'kills': 1}
+
+    def test_cancel(self, supervisor):
+        canceller = Timer(0.2, supervisor.cancel)
+        canceller.start()
+        with raises(ActionError, match='cancelled'):
+            supervisor.run(['sleep', '10'], 10, ActionError)
+        assert supervisor.stats == {'cancellations': 1, 'kills': 1}
+
+    def test_concurrent_counts(self, supervisor):
+        def count():
+            for _ in range(1000):
+                supervisor.count('kills')
+
+        counters = [Thread(target=count) for _ in range(4)]
+        for counter in counters:
+            counter.start()
+        for counter in counters:
+            counter.join()
+        assert supervisor.get_stats() == {'kills': 4000}
+
+
+def test_format_command_stats():
+    assert format_command_stats({'timeouts': 1, 'kills': 2}) == 'commands: 2 kills, 1 timeouts'
+    assert format_command_stats({}) == 'commands: no timeouts, cancellations or kills'
+
+
+def test_run_sudo_timeout():
+    with patch('just_start.os_utils.spawn') as spawn, raises(ActionError, match='timed out'):
+        spawn.return_value.expect.side_effect = TIMEOUT('')
+        run_sudo('test_command', _get_config_with_password)
+    spawn.return_value.terminate.assert_called_once_with(force=True)
+
+
+class TestRunTaskAsync:
+    @fixture
+    def fake_task(self, tmp_path, monkeypatch):
+        def write_script(body: str):
+            script = tmp_path / 'task'
+            script.write_text(f'#!/bin/sh\n{body}\n')
+            script.chmod(0o755)
+
+        monkeypatch.setenv('PATH', f'{tmp_path}:{environ["PATH"]}')
+        return write_script
+
+    def test_output(self, fake_task):
+        fake_task('echo "$@"')
+        assert run(run_task_async('list')) == 'list\n'
+
+    def test_error(self, fake_task):
+        fake_task('echo failure; exit 1')
+        with raises(TaskWarriorError, match='failure'):
+            run(run_task_async())
+
+    def test_timeout(self, fake_task, mocker):
+        fake_task('sleep 10')
+        mocker.patch('just_start.os_utils.get_general_config').return_value.command_timeouts \
+            .read = 0.2
+        with raises(TaskWarriorError, match='timed out'):
+            run(run_task_async())
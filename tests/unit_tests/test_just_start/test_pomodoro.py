@@ -1,16 +1,198 @@
-from pytest import fixture
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
-from just_start.pomodoro import PomodoroTimer
+from pytest import fixture, mark, approx
+
+from pydantic import PositiveInt
+
+from just_start.config_reader import SuspendPolicy, PomodoroConfig
+from just_start.constants import SUSPEND_PAUSE_MESSAGE
+from just_start.pomodoro import (
+    PomodoroTimer, PomodoroPhase, PomodoroSerializer, SUSPEND_CHECK_SECONDS,
+)
+from just_start.status_file import StatusFile
+from just_start_status import read_status
+
+
+class FakeClock:
+    def __init__(self):
+        self.monotonic_seconds = 0.
+        self.boottime_seconds = 0.
+
+    def monotonic(self) -> float:
+        return self.monotonic_seconds
+
+    def boottime(self) -> float:
+        return self.boottime_seconds
+
+    def now(self) -> datetime:
+        return datetime(2020, 1, 1) + timedelta(seconds=self.boottime_seconds)
+
+    def advance(self, seconds: float, suspended_seconds: float = 0.):
+        self.monotonic_seconds += seconds
+        self.boottime_seconds += seconds + suspended_seconds
+
+
+class FakeTimerRunner:
+    def __init__(self):
+        self.seconds = None
+        self.callback = None
+
+    def start(self, seconds, callback):
+        self.seconds = seconds
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def fire(self):
+        callback, self.callback = self.callback, None
+        callback()
 
 
 @fixture
-def pomodoro_timer():
-    timer = PomodoroTimer(print)
+def clock():
+    return FakeClock()
+
+
+@fixture
+def timer_runner():
+    return FakeTimerRunner()
+
+
+@fixture
+def notifications():
+    return []
+
+
+@fixture
+def pomodoro_timer(clock, timer_runner, notifications):
+    timer = PomodoroTimer(notifications.append, timer_runner, clock)
     try:
         yield timer
     finally:
         timer.reset()
 
 
+def run_until_next_phase(pomodoro_timer, clock, timer_runner):
+    phase = pomodoro_timer.pomodoro_phase
+    while pomodoro_timer.pomodoro_phase is phase:
+        clock.advance(timer_runner.seconds)
+        timer_runner.fire()
+
+
 class TestPomodoroTimer:
-    pass
+    @mark.parametrize('elapsed_seconds', [0.25, 0.7, 1.3])
+    def test_no_drift_after_pause_resume_cycles(self, elapsed_seconds, pomodoro_timer, clock):
+        duration = pomodoro_timer.seconds_left
+        cycles = 500
+
+        for _ in range(cycles):
+            pomodoro_timer.toggle()
+            clock.advance(elapsed_seconds)
+            pomodoro_timer.toggle()
+            clock.advance(3)
+
+        assert pomodoro_timer.seconds_left == approx(duration - cycles * elapsed_seconds,
+                                                     abs=1e-9)
+
+    def test_status_file_follows_timer_state(self, clock, timer_runner, tmp_path):
+        path = str(tmp_path / 'status')
+        timer = PomodoroTimer(lambda _: None, timer_runner, clock, status_file=StatusFile(path))
+        assert read_status(path)['end'] == ''
+
+        timer.toggle()
+        run_until_next_phase(timer, clock, timer_runner)
+        status = read_status(path)
+        assert (status['phase'], status['work_count']) == (timer.pomodoro_phase.name, '1')
+        assert status['end']
+        timer.reset()
+
+    def test_restored_cycle_fits_the_current_config(self, clock, timer_runner):
+        pomodoro_config = PomodoroConfig(cycles_before_long_rest=PositiveInt(2))
+        with patch('just_start.pomodoro.get_pomodoro_config', return_value=pomodoro_config):
+            timer = PomodoroTimer(lambda _: None, timer_runner, clock)
+            # Saved during the fourth pomodoro of a four pomodoro round
+            PomodoroSerializer(timer).set_serialized_timer_data(
+                {'pomodoro_phase': PomodoroPhase.WORK, 'cycle_position': 6})
+
+        assert timer.cycle_position == 2
+        assert next(timer.pomodoro_cycle) is PomodoroPhase.LONG_REST
+
+    def test_countdown_follows_timer_state(self, pomodoro_timer, clock, timer_runner):
+        duration = pomodoro_timer.seconds_left
+        assert not pomodoro_timer.countdown.is_running
+
+        pomodoro_timer.toggle()
+        clock.advance(SUSPEND_CHECK_SECONDS)
+        timer_runner.fire()
+        clock.advance(10)
+        assert pomodoro_timer.countdown.get_seconds_left(clock.monotonic()) == approx(
+            duration - SUSPEND_CHECK_SECONDS - 10)
+
+        pomodoro_timer.toggle()
+        clock.advance(100)
+        assert pomodoro_timer.countdown.get_seconds_left(clock.monotonic()) == approx(
+            duration - SUSPEND_CHECK_SECONDS - 10)
+
+    def test_phase_ends_after_its_duration(self, pomodoro_timer, clock, timer_runner):
+        duration = pomodoro_timer.seconds_left
+        pomodoro_timer.toggle()
+
+        run_until_next_phase(pomodoro_timer, clock, timer_runner)
+
+        assert clock.monotonic() == duration
+        assert pomodoro_timer.pomodoro_phase is PomodoroPhase.SHORT_REST
+        assert timer_runner.seconds == SUSPEND_CHECK_SECONDS
+
+    def test_late_callbacks_do_not_drift(self, pomodoro_timer, clock, timer_runner):
+        work, rest = (pomodoro_timer.phase_duration[phase]
+                      for phase in (PomodoroPhase.WORK, PomodoroPhase.SHORT_REST))
+        pomodoro_timer.toggle()
+
+        clock.advance(work + 0.5)
+        for _ in range(int(work // SUSPEND_CHECK_SECONDS) + 1):
+            timer_runner.fire()
+
+        assert pomodoro_timer.seconds_left == rest - 0.5
+
+    def test_suspension_pauses_timer(self, pomodoro_timer, clock, timer_runner, notifications):
+        duration = pomodoro_timer.seconds_left
+        pomodoro_timer.toggle()
+
+        clock.advance(10, suspended_seconds=3600)
+        timer_runner.fire()
+
+        assert not pomodoro_timer.is_running
+        assert pomodoro_timer.seconds_left == duration - 10
+        assert notifications[-1] == SUSPEND_PAUSE_MESSAGE
+
+    def test_suspension_skips_ahead(self, pomodoro_timer, clock, timer_runner):
+        pomodoro_timer.suspend_policy = SuspendPolicy.SKIP
+        work, rest = (pomodoro_timer.phase_duration[phase]
+                      for phase in (PomodoroPhase.WORK, PomodoroPhase.SHORT_REST))
+        pomodoro_timer.toggle()
+
+        clock.advance(10, suspended_seconds=work)
+        timer_runner.fire()
+
+        assert pomodoro_timer.is_running
+        assert pomodoro_timer.pomodoro_phase is PomodoroPhase.SHORT_REST
+        assert pomodoro_timer.seconds_left == rest - 10
+
+    def test_short_clock_noise_is_not_a_suspension(self, pomodoro_timer, clock, timer_runner):
+        pomodoro_timer.toggle()
+
+        clock.advance(10, suspended_seconds=1)
+        timer_runner.fire()
+
+        assert pomodoro_timer.is_running
+
+    def test_work_time_is_tracked_per_task(self, pomodoro_timer, clock, timer_runner):
+        work = pomodoro_timer.seconds_left
+        pomodoro_timer.track_task('uuid-1', '1')
+
+        run_until_next_phase(pomodoro_timer, clock, timer_runner)
+        run_until_next_phase(pomodoro_timer, clock, timer_runner)
+
+        assert pomodoro_timer.task_tracker.totals == {'uuid-1': work}
@@ -0,0 +1,131 @@
+from datetime import datetime
+from time import perf_counter
+from unittest.mock import patch
+
+from pytest import fixture
+
+# noinspection PyProtectedMember
+from just_start.config_reader import _Config
+from just_start.pomodoro import PomodoroPhase, PomodoroTimer
+from just_start.simulation import SimulatedClock, simulate_day, main
+
+
+START = datetime(2020, 1, 6, 8)
+
+
+@fixture
+def clock():
+    return SimulatedClock(START)
+
+
+def test_fast_forward_thousands_of_phases(clock):
+    phases = []
+    pomodoro_timer = PomodoroTimer(phases.append, clock, clock)
+    pomodoro_timer.toggle()
+
+    start = perf_counter()
+    clock.advance(30 * 24 * 60 * 60)
+    assert perf_counter() - start < 5
+
+    assert pomodoro_timer.work_count > 2000
+    assert len(phases) == pomodoro_timer.work_count + 1
+
+
+def test_long_rest_placement(clock):
+    phases = []
+    pomodoro_timer = PomodoroTimer(lambda _: phases.append(pomodoro_timer.pomodoro_phase),
+                                   clock, clock)
+    pomodoro_timer.toggle()
+
+    clock.advance(24 * 60 * 60)
+
+    long_rests = [index for index, phase in enumerate(phases)
+                  if phase is PomodoroPhase.LONG_REST]
+    assert long_rests[:3] == [7, 15, 23]
+
+
+def test_suspension_delays_timer(clock):
+    pomodoro_timer = PomodoroTimer(lambda _: None, clock, clock)
+    pomodoro_timer.toggle()
+
+    clock.suspend(60 * 60)
+    clock.advance(60)
+
+    assert not pomodoro_timer.is_running
+    assert pomodoro_timer.pomodoro_phase is PomodoroPhase.WORK
+
+
+def test_location_transitions(clock, tmp_path):
+    config_path = tmp_path / 'preferences.toml'
+    config_path.write_text('''
+[[locations]]
+    name = "work"
+    [locations.activation]
+    start = "08:00"
+    end = "12:00"
+    days = []
+[[locations]]
+    name = "home"
+    [locations.activation]
+    start = "12:00"
+    end = "18:00"
+    days = [1]
+''')
+    notifications = []
+    with patch('just_start.config_reader._config',
+               _Config(str(config_path), str(tmp_path / 'cache'))):
+        simulate_day(clock, datetime(2020, 1, 6, 14), notifications.append, lambda _: None)
+
+    assert 'so far at work' in notifications[0]
+    assert 'so far at home' in notifications[-2]
+
+
+def test_location_change_replans_at_the_next_phase(clock, tmp_path):
+    config_path = tmp_path / 'preferences.toml'
+    config_path.write_text('''
+[[locations]]
+    name = "home"
+    [locations.activation]
+    start = "08:00"
+    end = "12:00"
+    days = []
+    [locations.pomodoro]
+    pomodoro_length = 50
+    cycles_before_long_rest = 2
+[[locations]]
+    name = "work"
+    [locations.activation]
+    start = "12:00"
+    end = "18:00"
+    days = []
+''')
+    clock.start_datetime = datetime(2020, 1, 6, 11)
+    phases = []
+    with patch('just_start.config_reader._config',
+               _Config(str(config_path), str(tmp_path / 'cache'))):
+        pomodoro_timer = PomodoroTimer(lambda _: phases.append(
+            (f'{clock.now():%H:%M}', pomodoro_timer.pomodoro_phase, pomodoro_timer.seconds_left)),
+            clock, clock)
+        pomodoro_timer.toggle()
+        clock.run_until(datetime(2020, 1, 6, 13, 30))
+
+    # Home's long rest would have come after its second pomodoro, work's round has two more
+    assert phases == [
+        ('11:00', PomodoroPhase.WORK, 50 * 60),
+        ('11:50', PomodoroPhase.SHORT_REST, 5 * 60),
+        ('11:55', PomodoroPhase.WORK, 50 * 60),
+        ('12:45', PomodoroPhase.SHORT_REST, 5 * 60),
+        ('12:50', PomodoroPhase.WORK, 25 * 60),
+        ('13:15', PomodoroPhase.SHORT_REST, 5 * 60),
+        ('13:20', PomodoroPhase.WORK, 25 * 60),
+    ]
+    assert pomodoro_timer.work_count == 6
+    assert pomodoro_timer.location_name == 'work'
+
+
+def test_what_if_cli(capsys):
+    main(['--date', '2020-01-06', '--start', '09:00', '--hours', '0.75'])
+
+    output = capsys.readouterr()[0].split('\n')
+    assert output[0].startswith('[09:00] Work and switch tasks')
+    assert output[-2] == '2 phases finished'
@@ -0,0 +1,128 @@
+from subprocess import run
+from unittest.mock import patch
+
+from pexpect.utils import split_command_line
+from pytest import fixture
+
+from just_start.config_reader import GeneralConfig
+from just_start.site_blocking import (
+    block_sites, get_blocked_domains, normalize_blocklist_line, APP_SPECIFIC_COMMENT,
+)
+# noinspection PyProtectedMember
+from just_start.site_blocking import _get_install_command
+
+
+HOSTS = '127.0.0.1\tlocalhost\n::1\tlocalhost'
+
+
+@fixture
+def blocklist_file(tmp_path):
+    path = tmp_path / 'blocklist'
+    path.write_text('# comment\n0.0.0.0 ads.example.com tracker.example.com\n'
+                    'Example.org.\nwww.example.org\n\n127.0.0.1 localhost\n')
+    return path
+
+
+@fixture
+def config(blocklist_file):
+    return GeneralConfig(password='password', blocked_sites=['news.example.net'],
+                         blocklist_files=[blocklist_file])
+
+
+@fixture
+def hosts_path(tmp_path):
+    path = tmp_path / 'hosts'
+    path.write_text(HOSTS)
+    return path
+
+
+def test_normalize_blocklist_line():
+    assert list(normalize_blocklist_line('0.0.0.0 WWW.Example.com. other.com # ads')) == [
+        'example.com', 'other.com',
+    ]
+
+
+def test_blocked_domains_are_normalized_and_sorted(config, tmp_path):
+    assert get_blocked_domains(config, str(tmp_path / 'cache')) == [
+        'ads.example.com', 'example.org', 'news.example.net', 'tracker.example.com',
+    ]
+
+
+def test_blocked_domains_are_read_from_cache(config, tmp_path):
+    cache_path = str(tmp_path / 'cache')
+    expected = get_blocked_domains(config, cache_path)
+
+    with patch('just_start.site_blocking._blocked_domains_by_key', {}), \
+            patch('just_start.site_blocking._normalize_blocklist') as normalize:
+        assert get_blocked_domains(config, cache_path) == expected
+    normalize.assert_not_called()
+
+
+def test_changed_blocklist_file_is_reread(config, blocklist_file, tmp_path):
+    cache_path = str(tmp_path / 'cache')
+    get_blocked_domains(config, cache_path)
+    blocklist_file.write_text('new.example.com\n')
+
+    assert 'new.example.com' in get_blocked_domains(config, cache_path)
+
+
+class TestBlockSites:
+    @fixture
+    def run_sudo(self):
+        with patch('just_start.site_blocking.run_sudo') as run_sudo:
+            yield run_sudo
+
+    def block_sites(self, block, config, hosts_path, tmp_path):
+        staging_path = tmp_path / 'staging'
+        block_sites(block, lambda: config, str(hosts_path), str(staging_path),
+                    str(tmp_path / 'blocklist_cache'))
+        return staging_path
+
+    def test_block(self, config, hosts_path, tmp_path, run_sudo):
+        staging_path = self.block_sites(True, config, hosts_path, tmp_path)
+
+        lines = staging_path.read_text().split('\n')
+        assert '\n'.join(lines[:2]) == HOSTS
+        assert f'127.0.0.1\twww.example.org\t{APP_SPECIFIC_COMMENT}' in lines
+        run_sudo.assert_called_once()
+        assert str(hosts_path) in run_sudo.call_args[0][0]
+
+    def test_unblock(self, config, hosts_path, tmp_path, run_sudo):
+        hosts_path.write_text(self.block_sites(True, config, hosts_path, tmp_path).read_text())
+
+        staging_path = self.block_sites(False, config, hosts_path, tmp_path)
+
+        assert staging_path.read_text() == f'{HOSTS}\n'
+        assert run_sudo.call_count == 2
+
+    def test_unchanged_hosts_file_is_not_rewritten(self, config, hosts_path, tmp_path,
+                                                   run_sudo):
+        self.block_sites(False, config, hosts_path, tmp_path)
+        run_sudo.assert_not_called()
+
+    def test_install_command_quotes_paths(self, tmp_path):
+        directory = tmp_path / "it's a dir"
+        directory.mkdir()
+        staging_path, hosts_path = directory / 'staging', directory / 'hosts; touch pwned'
+        staging_path.write_text('staged')
+
+        sudo, *command = split_command_line(
+            _get_install_command(str(staging_path), str(hosts_path)))
+        run(command, check=True, cwd=directory)
+
+        assert sudo == 'sudo'
+        assert hosts_path.read_text() == 'staged'
+        assert not (directory / 'pwned').exists()
+
+    def test_nothing_is_done_without_password(self, hosts_path, tmp_path, run_sudo):
+        self.block_sites(True, GeneralConfig(), hosts_path, tmp_path)
+        run_sudo.assert_not_called()
+
+
+def test_default_paths_are_resolved_when_called(config, hosts_path, tmp_path):
+    # conftest moves the default paths to tmp_path, so the developer's files are never touched
+    with patch('just_start.site_blocking.run_sudo'):
+        block_sites(True, lambda: config, str(hosts_path))
+
+    assert (tmp_path / 'hosts').exists()
+    assert (tmp_path / 'blocklist_cache').exists()
@@ -0,0 +1,19 @@
+from just_start.task_cache import TaskCache
+
+
+def test_profiles_keep_their_own_tasks(tmp_path):
+    task_cache = TaskCache(str(tmp_path))
+    task_cache.set('home', ['1 home task'])
+    task_cache.set('work/office', ['1 work task'])
+
+    assert task_cache.get('home') == ['1 home task']
+    assert task_cache.get('work/office') == ['1 work task']
+
+
+def test_tasks_are_read_from_disk(tmp_path):
+    TaskCache(str(tmp_path)).set('home', ['1 home task'])
+    assert TaskCache(str(tmp_path)).get('home') == ['1 home task']
+
+
+def test_missing_profile(tmp_path):
+    assert TaskCache(str(tmp_path)).get('home') is None
@@ -0,0 +1,66 @@
+from threading import Event
+from time import sleep
+from unittest.mock import patch
+
+from pytest import fixture
+
+from just_start.config_reader import GeneralConfig
+from just_start.task_watcher import TaskWatcher, get_data_location
+
+
+TIMEOUT = 5
+
+
+@fixture
+def changes():
+    return Event()
+
+
+@fixture
+def task_watcher(tmp_path, changes):
+    (tmp_path / 'pending.data').write_text('')
+    task_watcher = TaskWatcher(changes.set, str(tmp_path), debounce_seconds=0.05)
+    task_watcher.mark_refreshed()
+    task_watcher.start()
+    try:
+        yield task_watcher
+    finally:
+        task_watcher.stop()
+
+
+def test_change_triggers_refresh(task_watcher, tmp_path, changes):
+    (tmp_path / 'pending.data').write_text('[description:"new task"]\n')
+    assert changes.wait(TIMEOUT)
+
+
+def test_unrelated_files_are_ignored(task_watcher, tmp_path, changes):
+    (tmp_path / 'unrelated').write_text('ignored')
+    assert not changes.wait(0.3)
+
+
+def test_already_refreshed_change_is_ignored(task_watcher, tmp_path, changes):
+    (tmp_path / 'pending.data').write_text('[description:"new task"]\n')
+    task_watcher.mark_refreshed()
+    sleep(0.3)
+    assert not changes.is_set()
+
+
+def test_missing_data_location_is_not_watched(tmp_path, changes):
+    task_watcher = TaskWatcher(changes.set, str(tmp_path / 'missing'))
+    task_watcher.start()
+    task_watcher.stop()
+
+
+def test_get_data_location(tmp_path):
+    taskrc = tmp_path / 'taskrc'
+    taskrc.write_text('# data.location=ignored\ndata.location = ~/tasks  # comment\n')
+    assert get_data_location(str(taskrc)).endswith('/tasks')
+    assert get_data_location(str(tmp_path / 'missing')).endswith('.task')
+
+
+def test_get_data_location_follows_taskrc_environment(tmp_path, monkeypatch):
+    taskrc = tmp_path / 'taskrc'
+    taskrc.write_text('data.location=/tmp/tasks\n')
+    monkeypatch.setenv('TASKRC', str(taskrc))
+    with patch('just_start.task_watcher.get_general_config', return_value=GeneralConfig()):
+        assert get_data_location() == '/tmp/tasks'
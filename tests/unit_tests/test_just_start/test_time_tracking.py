@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+from pytest import fixture
+
+from just_start.os_utils import TaskWarriorError, CommandClass
+from just_start.time_tracking import (
+    TaskTimeTracker, add_task_time_totals, format_duration, TRACKED_TIME_ANNOTATION,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.seconds = 0.
+
+    def monotonic(self):
+        return self.seconds
+
+
+@fixture
+def clock():
+    return FakeClock()
+
+
+@fixture
+def tracker(clock):
+    tracker = TaskTimeTracker(clock)
+    tracker.track('uuid-1', '1')
+    return tracker
+
+
+class TestTaskTimeTracker:
+    def test_totals_accumulate_across_pauses(self, tracker, clock):
+        for _ in range(3):
+            tracker.start()
+            clock.seconds += 600
+            tracker.stop()
+            clock.seconds += 100
+
+        assert tracker.totals == {'uuid-1': 1800}
+
+    def test_switching_task_records_previous_task(self, tracker, clock):
+        tracker.start()
+        clock.seconds += 60
+        tracker.track('uuid-2', '2')
+        tracker.start()
+        clock.seconds += 120
+        tracker.stop()
+
+        assert tracker.totals_by_id() == {'1': 60, '2': 120}
+
+    def test_ids_are_not_restored(self, tracker, clock):
+        tracker.start()
+        clock.seconds += 60
+        tracker.stop()
+
+        restored_tracker = TaskTimeTracker(clock)
+        restored_tracker.state = tracker.state
+        assert restored_tracker.totals == {'uuid-1': 60}
+        assert restored_tracker.totals_by_id() == {}
+
+    def test_time_is_written_once(self, tracker, clock):
+        tracker.start()
+        clock.seconds += 1500
+        tracker.stop()
+
+        with patch('just_start.time_tracking.run_task') as run_task:
+            tracker.write_time()
+            tracker.write_time()
+        run_task.assert_called_once_with('uuid-1', 'annotate', f'25m {TRACKED_TIME_ANNOTATION}',
+                                         command_class=CommandClass.WRITE)
+
+    def test_time_under_a_minute_is_not_written(self, tracker, clock):
+        tracker.start()
+        clock.seconds += 30
+        tracker.stop()
+
+        with patch('just_start.time_tracking.run_task') as run_task:
+            tracker.write_time()
+        run_task.assert_not_called()
+
+    def test_failed_write_is_retried(self, tracker, clock):
+        tracker.start()
+        clock.seconds += 60
+        tracker.stop()
+
+        with patch('just_start.time_tracking.run_task', side_effect=TaskWarriorError()):
+            tracker.write_time()
+        with patch('just_start.time_tracking.run_task') as run_task:
+            tracker.write_time()
+        run_task.assert_called_once()
+
+
+def test_add_task_time_totals(tracker, clock):
+    tracker.start()
+    clock.seconds += 3900
+    tracker.stop()
+
+    assert add_task_time_totals(['ID Description', '1 first', '2 second', ''], tracker) == [
+        'ID Description', '1 first [1h05m]', '2 second', '',
+    ]
+
+
+def test_set_task_ids_follows_renumbered_tasks(tracker, clock):
+    tracker.start()
+    clock.seconds += 60
+    tracker.track('uuid-2', '2')
+    tracker.start()
+    clock.seconds += 120
+    tracker.stop()
+
+    tracker.set_task_ids([{'id': 1, 'uuid': 'uuid-2'}, {'id': 2, 'uuid': 'uuid-1'}])
+    assert tracker.totals_by_id() == {'1': 120, '2': 60}
+
+
+def test_set_task_ids_drops_unlisted_tasks(tracker, clock):
+    tracker.start()
+    clock.seconds += 60
+    tracker.track('uuid-2', '2')
+    tracker.start()
+    clock.seconds += 120
+    tracker.stop()
+    tracker.track('uuid-3', '3')
+
+    tracker.set_task_ids([{'id': 1, 'uuid': 'uuid-2'}])
+    assert tracker.totals == {'uuid-2': 120}
+    assert tracker.state['unwritten'] == {'uuid-1': 60, 'uuid-2': 120}
+
+
+def test_format_duration():
+    assert format_duration(59) == '0m'
+    assert format_duration(7200) == '2h00m'
@@ -0,0 +1,47 @@
+import sys
+from subprocess import run
+
+from just_start.status_file import StatusFile
+from just_start_status import read_status, format_status, main
+
+
+STATUS = {'phase': 'WORK', 'end': '1000', 'seconds_left': '1500', 'work_count': '2',
+          'location': 'home'}
+
+
+def test_format_running_status():
+    assert format_status(STATUS, now=1000 - 61.5) == 'Work 01:01'
+
+
+def test_format_paused_status():
+    assert format_status({**STATUS, 'end': ''}) == 'Paused - Work 25:00'
+
+
+def test_custom_format():
+    assert format_status(STATUS, '{work_count} at {location}', now=0) == '2 at home'
+
+
+def test_finished_phase_shows_zero():
+    assert format_status(STATUS, now=2000).endswith('00:00')
+
+
+def test_read_status_written_by_timer(tmp_path):
+    path = str(tmp_path / 'status')
+    StatusFile(path).write('SHORT_REST', 300, False, 1, 'work')
+    assert read_status(path) == {'phase': 'SHORT_REST', 'end': '', 'seconds_left': '300',
+                                 'work_count': '1', 'location': 'work'}
+
+
+def test_missing_status(tmp_path):
+    assert read_status(str(tmp_path / 'missing')) is None
+
+
+def test_main_without_status(tmp_path, monkeypatch):
+    monkeypatch.setattr('just_start_status.STATUS_FILE_PATH', str(tmp_path / 'missing'))
+    assert main([]) == 1
+
+
+def test_just_start_is_not_imported(tmp_path):
+    check = ('import sys, just_start_status; just_start_status.main([]);'
+             ' sys.exit(any(module in sys.modules for module in ("just_start", "json", "re")))')
+    run([sys.executable, '-c', check], check=True, env={'XDG_DATA_HOME': str(tmp_path)})
@@ -0,0 +1,52 @@
+from pytest import fixture, mark
+
+from just_start_urwid.completion import PrefixTrie, TaskCompleter
+
+
+TASK_DATA = [
+    {'id': 1, 'description': 'write report', 'project': 'work.reports', 'tags': ['office']},
+    {'id': 2, 'description': 'call', 'project': 'home', 'tags': ['phone', 'office'],
+     'estimate': 'PT1H'},
+]
+
+
+@fixture
+def completer():
+    completer = TaskCompleter()
+    completer.set_task_data(TASK_DATA)
+    return completer
+
+
+class TestPrefixTrie:
+    def test_complete(self):
+        trie = PrefixTrie(['car', 'cart', 'cat', 'dog'])
+        assert trie.complete('ca') == ['car', 'cart', 'cat']
+        assert trie.complete('ca', limit=2) == ['car', 'cart']
+        assert trie.complete('x') == []
+
+    def test_extend(self):
+        trie = PrefixTrie(['project:home', 'project:work'])
+        assert trie.extend('pr') == 'project:'
+        assert trie.extend('x') == 'x'
+
+
+class TestTaskCompleter:
+    @mark.parametrize('text, completed', [
+        ('+off', '+office '),
+        ('call project:w', 'call project:work'),
+        ('call project:work.r', 'call project:work.reports '),
+        ('est', 'estimate:'),
+        ('due:tom', 'due:tomorrow '),
+        ('xyz', 'xyz'),
+    ])
+    def test_word_before_cursor_is_completed(self, completer, text, completed):
+        assert completer.complete(text, len(text))[:2] == (completed, len(completed))
+
+    def test_ambiguous_words_return_candidates(self, completer):
+        text, position, candidates = completer.complete('+ call', 1)
+        assert (text, position) == ('+ call', 1)
+        assert candidates == ['+office', '+phone']
+
+    def test_refresh_replaces_words(self, completer):
+        completer.set_task_data([])
+        assert completer.complete('+off', 4)[0] == '+off'
@@ -0,0 +1,85 @@
+from pytest import fixture
+from urwid import Text
+
+from just_start.pomodoro import Countdown, PomodoroPhase
+from just_start_urwid.countdown import CountdownDisplay, format_countdown
+
+
+class FakeLoop:
+    def __init__(self):
+        self.alarms = []
+
+    def set_alarm_in(self, seconds, callback):
+        alarm = seconds, callback
+        self.alarms.append(alarm)
+        return alarm
+
+    def remove_alarm(self, alarm):
+        self.alarms.remove(alarm)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+@fixture
+def clock():
+    return FakeClock()
+
+
+@fixture
+def loop():
+    return FakeLoop()
+
+
+@fixture
+def display(clock):
+    return CountdownDisplay(Text(''), clock, idle_seconds=300)
+
+
+def test_running_countdown_ticks_on_second_boundaries(display, loop, clock):
+    display.attach(loop, lambda: Countdown(PomodoroPhase.WORK, 90.5, measured_at=0.))
+
+    assert display.text.text == 'Work and switch tasks: 01:31 left'
+    [(delay, callback)] = loop.alarms
+    assert delay == 0.5
+
+    clock.now = 0.5
+    callback()
+    assert display.text.text == 'Work and switch tasks: 01:30 left'
+    assert [delay for delay, _ in loop.alarms] == [1]
+
+
+def test_idle_countdown_ticks_every_minute(display, loop, clock):
+    clock.now = 300.
+    display.attach(loop, lambda: Countdown(PomodoroPhase.WORK, 1000., measured_at=280.))
+
+    assert display.text.text == 'Work and switch tasks: 17 min left'
+    assert [delay for delay, _ in loop.alarms] == [20]
+
+    display.on_input()
+    assert display.text.text == 'Work and switch tasks: 16:20 left'
+    assert len(loop.alarms) == 1
+
+
+def test_paused_countdown_has_no_alarm(display, loop):
+    display.attach(loop, lambda: Countdown(PomodoroPhase.SHORT_REST, 300.))
+
+    assert display.text.text == 'Paused - Short break: 05:00 left'
+    assert not loop.alarms
+
+
+def test_detach_removes_alarm(display, loop):
+    display.attach(loop, lambda: Countdown(PomodoroPhase.WORK, 10., measured_at=0.))
+    display.detach()
+
+    assert not loop.alarms
+
+
+def test_format_countdown():
+    countdown = Countdown(PomodoroPhase.LONG_REST, 0.)
+    assert format_countdown(countdown, 59.2, 60) == 'Paused - LONG BREAK!!!: 1 min left'
@@ -0,0 +1,92 @@
+from pytest import fixture
+from urwid import Text
+
+from just_start import TaskWarriorError
+from just_start_urwid.details import TaskDetails, LOADING_DETAILS
+
+
+TASK_DATA = [
+    {'id': 1, 'uuid': 'uuid-1', 'entry': '20240101T000000Z'},
+    {'id': 2, 'uuid': 'uuid-2', 'entry': '20240101T000000Z', 'modified': '20240102T000000Z'},
+    {'id': 3, 'uuid': 'uuid-3', 'entry': '20240101T000000Z'},
+]
+
+
+@fixture
+def fetched():
+    return []
+
+
+@fixture
+def task_details(fetched):
+    def fetch(task_uuid):
+        fetched.append(task_uuid)
+        return f'{task_uuid} info'
+
+    task_details = TaskDetails(Text(''), lambda _key, mutation: mutation(), fetch)
+    task_details.set_task_data(TASK_DATA)
+    yield task_details
+    task_details.close()
+
+
+def wait_for_fetches(task_details):
+    # Fetches run in order on a single worker, so an empty one finishes after all of them
+    task_details._executor.submit(lambda: None).result(5)
+
+
+def get_text(task_details):
+    return task_details.text.get_text()[0]
+
+
+class TestTaskDetails:
+    def test_focused_task_is_fetched(self, task_details, fetched):
+        task_details.show('2')
+        assert get_text(task_details) in (LOADING_DETAILS, 'uuid-2 info')
+
+        wait_for_fetches(task_details)
+        assert get_text(task_details) == 'uuid-2 info'
+        assert fetched == ['uuid-2']
+
+    def test_neighbours_are_prefetched(self, task_details, fetched):
+        task_details.show('2', ['1', '3'])
+        wait_for_fetches(task_details)
+
+        task_details.show('3', ['2'])
+        assert get_text(task_details) == 'uuid-3 info'
+        assert fetched == ['uuid-2', 'uuid-1', 'uuid-3']
+
+    def test_modified_task_is_fetched_again(self, task_details, fetched):
+        task_details.show('1')
+        wait_for_fetches(task_details)
+
+        task_details.set_task_data([{**TASK_DATA[0], 'modified': '20240103T000000Z'}])
+        wait_for_fetches(task_details)
+        assert fetched == ['uuid-1', 'uuid-1']
+
+    def test_least_recently_used_details_are_evicted(self, task_details, fetched):
+        task_details.cache_size = 1
+        for task_id in ('1', '2', '1'):
+            task_details.show(task_id)
+            wait_for_fetches(task_details)
+
+        assert fetched == ['uuid-1', 'uuid-2', 'uuid-1']
+
+    def test_rows_without_task_are_blank(self, task_details, fetched):
+        task_details.show(None)
+        assert get_text(task_details) == ''
+        assert not fetched
+
+    def test_errors_are_shown_but_not_cached(self, task_details):
+        task_details.fetch = _raise_task_warrior_error
+        task_details.show('1')
+        wait_for_fetches(task_details)
+        assert get_text(task_details) == 'no such task'
+
+        task_details.fetch = lambda task_uuid: 'recovered'
+        task_details.show('1')
+        wait_for_fetches(task_details)
+        assert get_text(task_details) == 'recovered'
+
+
+def _raise_task_warrior_error(_task_uuid):
+    raise TaskWarriorError('no such task')
@@ -0,0 +1,105 @@
+from os import pipe, read, close
+from threading import Thread
+from unittest.mock import Mock
+
+from pytest import fixture
+
+from just_start_urwid.render import RenderScheduler
+
+
+class FakeLoop:
+    def __init__(self):
+        self.callback = None
+        self.alarms = []
+        self.read_end, self.write_end = pipe()
+
+    def watch_pipe(self, callback):
+        self.callback = callback
+        return self.write_end
+
+    def remove_watch_pipe(self, write_end):
+        assert write_end == self.write_end
+        self.callback = None
+        close(self.read_end)
+        self.read_end = None
+        return True
+
+    def set_alarm_in(self, seconds, callback):
+        self.alarms.append((seconds, callback))
+
+    def wake_up(self):
+        return self.callback(read(self.read_end, 512))
+
+
+@fixture
+def loop():
+    loop = FakeLoop()
+    yield loop
+    if loop.read_end is not None:
+        close(loop.read_end)
+
+
+@fixture
+def scheduler(loop):
+    scheduler = RenderScheduler(frame_seconds=0)
+    scheduler.attach(loop)
+    return scheduler
+
+
+def test_mutation_runs_immediately_without_loop():
+    mutation = Mock()
+    RenderScheduler().schedule('widget', mutation)
+    mutation.assert_called_once_with()
+
+
+def test_burst_is_applied_once_on_the_loop(scheduler, loop):
+    first, second, other = Mock(), Mock(), Mock()
+    threads = [Thread(target=scheduler.schedule, args=args)
+               for args in (('status', first), ('status', second), ('tasks', other))]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    first.assert_not_called()
+    loop.wake_up()
+
+    first.assert_not_called()
+    second.assert_called_once_with()
+    other.assert_called_once_with()
+
+
+def test_burst_wakes_the_loop_once(scheduler, loop):
+    for _ in range(10):
+        scheduler.schedule('status', Mock())
+    assert read(loop.read_end, 512) == b'.'
+
+
+def test_flush_is_delayed_until_next_frame(loop):
+    scheduler = RenderScheduler(frame_seconds=60)
+    scheduler.attach(loop)
+    scheduler.flush()
+    mutation = Mock()
+
+    scheduler.schedule('status', mutation)
+    loop.wake_up()
+    mutation.assert_not_called()
+
+    [(_, alarm)] = loop.alarms
+    alarm()
+    mutation.assert_called_once_with()
+
+
+def test_detach_applies_pending_mutations(scheduler):
+    mutation = Mock()
+    scheduler.schedule('status', mutation)
+    scheduler.detach()
+    mutation.assert_called_once_with()
+
+
+def test_detach_removes_the_watch(scheduler, loop):
+    scheduler.detach()
+    assert loop.callback is None and loop.read_end is None
+
+    mutation = Mock()
+    scheduler.schedule('status', mutation)
+    mutation.assert_called_once_with()
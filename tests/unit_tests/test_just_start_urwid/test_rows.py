@@ -0,0 +1,78 @@
+from pytest import fixture
+
+from just_start_urwid.rows import RowCache, TaskRow, parse_columns, get_row_markup
+
+
+HEADER = 'ID Age Deps Project Due  Description       Urg '
+UNDERLINE = '-- --- ---- ------- ---- ----------------- ----'
+TASK_LIST = [
+    '[task next ( -BLOCKED )]',
+    '',
+    HEADER,
+    UNDERLINE,
+    ' 1 2d       home    -1d  Overdue chores    12.3',
+    ' 2 1d  1                 Blocked task       6.0',
+    ' 3 5m               2d   Plain task         5.5',
+    ' 4 5m                    Low urgency task   0.8',
+    '',
+    '4 tasks',
+]
+
+
+@fixture
+def columns():
+    return parse_columns(HEADER, UNDERLINE)
+
+
+def test_parse_columns(columns):
+    assert columns['ID'] == (0, 2)
+    assert columns['Urg'] == (43, 47)
+
+
+def test_high_urgency_overdue_row(columns):
+    markup = get_row_markup(TASK_LIST[4], columns)
+    assert ('project', 'home   ') in markup
+    assert ('overdue', '-1d ') in markup
+    assert markup[0][0] == 'urgency_high'
+
+
+def test_blocked_row(columns):
+    assert {attribute for attribute, _ in get_row_markup(TASK_LIST[5], columns)} == {'blocked'}
+
+
+def test_due_and_medium_urgency_row(columns):
+    markup = get_row_markup(TASK_LIST[6], columns)
+    assert ('due', '2d  ') in markup
+    assert markup[0][0] == 'urgency_medium'
+
+
+def test_low_urgency_row_has_no_attributes(columns):
+    assert get_row_markup(TASK_LIST[7], columns) == [TASK_LIST[7]]
+
+
+def test_footer_has_no_attributes(columns):
+    assert get_row_markup('4 tasks', columns) == ['4 tasks']
+
+
+def test_task_row(columns):
+    task_row = TaskRow(TASK_LIST[4], columns)
+    assert task_row.task_id == '1'
+    assert task_row.caption == TASK_LIST[4]
+    assert task_row.selectable()
+
+
+class TestRowCache:
+    def test_unchanged_rows_are_reused(self):
+        row_cache = RowCache()
+        widgets = row_cache.get_widgets(TASK_LIST)
+        changed_task_list = [*TASK_LIST[:5], TASK_LIST[5].replace('Blocked', 'Changed'),
+                             *TASK_LIST[6:]]
+        new_widgets = row_cache.get_widgets(changed_task_list)
+
+        assert new_widgets[0] is widgets[0]
+        assert new_widgets[1] is not widgets[1]
+        assert new_widgets[2:] == widgets[2:]
+
+    def test_duplicate_rows_get_their_own_widgets(self):
+        widgets = RowCache().get_widgets(TASK_LIST)
+        assert widgets[4] is not widgets[0] and len({id(widget) for widget in widgets}) == 6
@@ -0,0 +1,62 @@
+from pytest import fixture
+from urwid import Text
+
+from just_start_urwid.rows import TaskRow
+from just_start_urwid.sorting import TaskSorter, SortOrder, NO_PROJECT
+
+
+COLUMNS = {'ID': (0, 2)}
+TASK_DATA = [
+    {'id': 1, 'entry': '20240103T000000Z', 'urgency': 1., 'project': 'work'},
+    {'id': 2, 'entry': '20240101T000000Z', 'urgency': 5., 'due': '20240110T000000Z'},
+    {'id': 3, 'entry': '20240102T000000Z', 'urgency': 3., 'project': 'home',
+     'due': '20240105T000000Z'},
+]
+
+
+@fixture
+def widgets():
+    return [TaskRow(f'{task_id} task', COLUMNS) for task_id in '123'] + [Text('3 tasks')]
+
+
+@fixture
+def sorter():
+    sorter = TaskSorter()
+    sorter.set_task_data(TASK_DATA)
+    return sorter
+
+
+def get_rows(widgets):
+    return [widget.base_widget.get_text()[0] for widget in widgets]
+
+
+class TestTaskSorter:
+    def test_report_order_is_kept(self, sorter, widgets):
+        assert sorter.arrange(widgets) is widgets
+
+    def test_orders_cycle(self, sorter):
+        orders = [sorter.next_order() for _ in SortOrder]
+        assert orders == [*list(SortOrder)[1:], SortOrder.REPORT]
+
+    def test_urgency_order(self, sorter, widgets):
+        sorter.order = SortOrder.URGENCY
+        assert get_rows(sorter.arrange(widgets)) == ['2 task', '3 task', '1 task', '3 tasks']
+
+    def test_tasks_without_due_date_go_last(self, sorter, widgets):
+        sorter.order = SortOrder.DUE
+        assert get_rows(sorter.arrange(widgets)) == ['3 task', '2 task', '1 task', '3 tasks']
+
+    def test_tasks_without_data_go_last(self, sorter, widgets):
+        sorter.order = SortOrder.ENTRY
+        widgets.insert(0, TaskRow('4 task', COLUMNS))
+        assert get_rows(sorter.arrange(widgets)) == ['2 task', '3 task', '1 task', '4 task',
+                                                     '3 tasks']
+
+    def test_grouping_adds_project_headers(self, sorter, widgets):
+        sorter.toggle_grouping()
+        assert get_rows(sorter.arrange(widgets)) == ['home', '3 task', 'work', '1 task',
+                                                     NO_PROJECT, '2 task', '3 tasks']
+
+    def test_group_headers_are_reused(self, sorter, widgets):
+        sorter.toggle_grouping()
+        assert sorter.arrange(widgets)[0] is sorter.arrange(widgets)[0]
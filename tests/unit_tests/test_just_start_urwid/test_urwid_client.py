@@ -9,8 +9,9 @@ from just_start import (
 from just_start.pomodoro import PomodoroTimer
 from just_start_urwid.client import (
     ActionHandler, ActionNotInProgress, TaskWidget, IGNORED_KEYS_DURING_ACTION, TaskListBox,
-    get_error_colors, FocusedTask, ExitMainLoop,
+    get_error_colors, FocusedTask, ExitMainLoop, CANCEL_COMMANDS_KEY, SORT_KEY,
 )
+from just_start_urwid.completion import TaskCompleter
 
 
 CLIENT_MODULE = 'just_start_urwid.client'
@@ -29,7 +30,7 @@ def focused_task(mocker):
 
 @fixture
 def action_handler(action_runner, focused_task):
-    return ActionHandler(action_runner, focused_task)
+    return ActionHandler(action_runner, focused_task, TaskCompleter())
 
 
 @fixture
@@ -124,6 +125,84 @@ class TestTaskListBox:
     def test_action_key(self, task_list_box):
         task_list_box.keypress(0, 'h')
 
+    def test_cancel_commands_key(self, task_list_box):
+        with patch(f'{CLIENT_MODULE}.ActionRunner.cancel_commands') as cancel_commands, \
+                patch(f'{CLIENT_MODULE}.write_status'):
+            task_list_box.keypress(0, CANCEL_COMMANDS_KEY)
+        cancel_commands.assert_called_once()
+
+    def test_focus_shows_task_details(self, task_list_box, mocker):
+        task_list_box.task_details = mocker.Mock()
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------',
+                                     '1  first', '2  second', '3  third'])
+        task_list_box.walker.set_focus(1)
+
+        task_list_box.task_details.show.assert_called_with('2', ['1', '3'])
+
+    def test_edit_only_focused_row(self, task_list_box):
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------',
+                                     '1  first', '2  second'])
+        task_list_box.start_editing('1  first\nprompt ')
+
+        assert isinstance(task_list_box.focus, TaskWidget)
+        assert not isinstance(task_list_box.walker[1], TaskWidget)
+
+        task_list_box.stop_editing()
+        assert not isinstance(task_list_box.focus, TaskWidget)
+
+    def test_refresh_waits_for_edit(self, task_list_box):
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------', '1  first'])
+        task_list_box.start_editing('1  first\nprompt ')
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------', '1  first',
+                                     '2  second'])
+        assert len(task_list_box.walker) == 1
+
+        task_list_box.stop_editing()
+        assert len(task_list_box.walker) == 2
+
+    def test_sort_key_keeps_focused_task(self, task_list_box):
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------',
+                                     '1  first', '2  second'])
+        task_list_box.task_sorter.set_task_data([{'id': 1, 'urgency': 1.},
+                                                 {'id': 2, 'urgency': 2.}])
+        with patch(f'{CLIENT_MODULE}.write_status') as write_status:
+            task_list_box.keypress(0, SORT_KEY)
+
+        write_status.assert_called_once_with('Sorted by urgency')
+        assert [row.base_widget.task_id for row in task_list_box.walker] == ['2', '1']
+        assert task_list_box.walker.focus == 1
+
+    def test_tab_completes_add_prompt(self, task_list_box):
+        task_list_box.action_handler.focused_task = FocusedTask(task_list_box)
+        task_list_box.action_handler.completer.set_task_data([{'id': 1, 'tags': ['office']}])
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------', '1  first'])
+
+        task_list_box.keypress(0, 'a')
+        task_list_box.focus.set_edit_text('call +of')
+        task_list_box.focus.set_edit_pos(8)
+        task_list_box.keypress(0, 'tab')
+
+        assert task_list_box.focus.edit_text == 'call +office '
+        assert task_list_box.focus.edit_pos == 13
+
+    def test_bulk_action_is_previewed_and_confirmed(self, task_list_box, action_runner):
+        task_list_box.action_handler.focused_task = FocusedTask(task_list_box)
+        task_list_box.set_task_rows(['', '', 'ID Description', '-- -----------', '1  first'])
+        action_runner.task_data = [{'id': 1, 'uuid': 'uuid-1', 'description': 'first'}]
+
+        task_list_box.keypress(0, 'b')
+        task_list_box.focus.edit_text = '1 done'
+        task_list_box.keypress(0, 'enter')
+        assert '1 task will be completed: 1 first' in task_list_box.focus.caption
+
+        task_list_box.focus.edit_text = 'y'
+        with patch.object(ActionRunner, '__call__') as run_action:
+            task_list_box.keypress(0, 'enter')
+        bulk_operation = run_action.call_args[0][1]
+        assert run_action.call_args[0][0] is Action.BULK
+        assert bulk_operation.tasks == action_runner.task_data
+        assert task_list_box.action_handler.bulk_operation is None
+
     @staticmethod
     def assert_key_translates_to(key: str, translated_key: str, task_list_box):
         with patch(f'{CLIENT_MODULE}.ListBox.keypress', autospec=True) as spec: